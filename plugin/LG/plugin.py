@@ -22,13 +22,27 @@
 # 1.1.6   02-01-2020  Auto drop commands after 5 minutes no activity
 # 1.1.7   26-04-2020  Drop command wehn not send for 30 in heartbeart
 # 1.1.8   30-05-2020  Cleanup connection when commands are drop 
+# 1.1.9   18-10-2026  Lazy log formatting via plugincore
+# 1.1.10  18-10-2026  Callback latency histograms via plugincore.callbackstats
+# 1.1.11  18-10-2026  Opt-in capture of received data via plugincore.capture
+# 1.1.12  18-10-2026  Reconnect with exponential backoff via plugincore.supervisor
+# 1.1.13  18-10-2026  Warm start state via plugincore.snapshot
+# 1.1.14  18-10-2026  Per instance state (__slots__)
+# 1.1.15  18-10-2026  Flight recorder of recent log events, dumped on errors
+# 1.1.16  18-10-2026  OpenMetrics endpoint via plugincore.metrics
+# 1.1.17  18-10-2026  Profiling mode via plugincore.profiler
+# 1.1.18  18-10-2026  Errors dump the flight recorder at every debug level, optional dump push button
+# 1.1.19  18-10-2026  Restored state stays stale until the device confirms it
+# 1.1.20  18-10-2026  Status poll and queue purge as scheduler tasks, heartbeat is the wheel resolution
+# 1.1.21  18-10-2026  Removed unused html import, remaining log messages formatted lazily
+# 1.1.22  18-10-2026  Errors filtered out by the debug level dump only the last 16 flight recorder events
 
 """
-<plugin key="LGtv" name="LG TV" author="elgringo" version="1.1.7" externallink="https://github.com/ericstaal/domoticz/blob/master/">
+<plugin key="LGtv" name="LG TV" author="elgringo" version="1.1.22" externallink="https://github.com/ericstaal/domoticz/blob/master/">
   <params>
     <param field="Address" label="IP address" width="200px" required="true" default="192.168.13.15"/>
     <param field="Port" label="Port" width="30px" required="false" default="8080"/>
-    <param field="Mode2" label="Heartbeat interval" width="50px" required="true">
+    <param field="Mode2" label="Poll interval" width="50px" required="true">
       <options>
         <option label="5" value="5"/>
         <option label="8" value="8"/>
@@ -77,44 +91,30 @@ import Domoticz
 import collections 
 import base64
 import binascii
-from html import escape
+
+# shared helpers (plugin/plugincore)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from plugincore import pluginlog
+from plugincore import callbackstats
+from plugincore import capture
+from plugincore import supervisor
+from plugincore import snapshot
+from plugincore import flightrecorder
+from plugincore import metrics
+from plugincore import profiler
+from plugincore import scheduler
 
 # additional imports
 import re
 import time
 
 class BasePlugin:
-  
-  connection = None           # Network connection
-  logLevel = 0                # logLevel
- 
-  ip = None
-  port = 8080
-  
-  tvmuted = False
-  lastConnected = False
-  key = ""  # pairing key
+  # state per instance, no shared class level lists / dictionaries
+  __slots__ = ("connection", "logLevel", "snapshot", "ip", "port", "tvmuted", "lastConnected", "key", "source", "queuedCommands", "sessionState", "session", "maxQueued", "selectorMap", "srcLastLive", "srcRadio", "srcTv", "srcOff", "srcHdmi", "srcAv", "lastCommandTime", "recorder", "metrics", "scheduler")
   
   regexIp = re.compile('^((25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$')
-  
-  source = 0 # based on mode1 and mode5 (1 is actual, 5 is name)
-  
-  queuedCommands = []
-  sessionState = 0 # 0 = pairing, 1 = session, 2 = command/poll
-  session = None # session ID
-  maxQueued = 1
-  selectorMap = {}
-  
-  srcLastLive = 0
-  srcRadio = 0
-  srcTv = 0
-  srcOff = 0
-  srcHdmi = []
-  srcAv = []
-  
-  lastStartConnectTime = 0
-  lastCommandTime = 0
-  
   # dictionary with all codes
   LGCodes = { "status_bar": 35, "quick_menu": 69, "home_menu": 67, "premium_menu": 89, "installation_menu": 207, "factory_advanced_menu1": 251, "factory_advanced_menu2": 255,
               "power_off": 8, "sleep_timer": 14, "left": 7, "right": 6, "up": 64, "down": 65, "select": 68, "back": 40, "exit": 91, "red": 114, "green": 113, "yellow": 99,
@@ -127,34 +127,47 @@ class BasePlugin:
               "audio_description": 145
   }
   
-  def checkConnection(self, checkonly = False):
-    # Check connection and connect none
-    isConnected = False
+  def __init__(self):
+    self.connection = None           # Network connection (supervisor.ConnectionSupervisor)
+    self.logLevel = 0                # logLevel
+    self.recorder = flightrecorder.FlightRecorder() # recent log events, also the filtered ones
+    self.metrics = metrics.Registry("domoticz_lg") # readings served by plugincore.metrics
+    self.snapshot = None             # warm start state
+    self.scheduler = None            # status poll and queue purge with their own interval
     
-    if self.connection is None:
-      self.connection = Domoticz.Connection(Name="LG_TCP", Transport="TCP/IP", Protocol="HTTP", Address=Parameters["Address"], Port=Parameters["Port"])
-      self.Log("checkConnection: Connection created", 9, 1)
-    else:
-      if self.connection.Connected():
-        isConnected = True
-      else:
-        if (not self.connection.Connecting()) and (not checkonly):
-          self.connection.Connect()
-          self.lastStartConnectTime = time.time()
-          self.Log("checkConnection: Trying to connect", 9, 1)
-        else:
-          nu = time.time()
-          if (nu - self.lastStartConnectTime) > 60:
-            self.connection = None
-            self.Log("checkConnection: last connection attempt took more than "+str(round(nu -self.lastStartConnectTime,1))+" seconds. Destroy connection", 5, 3)
+    self.ip = None
+    self.port = 8080
+    
+    self.tvmuted = False
+    self.lastConnected = False
+    self.key = ""  # pairing key
+    
+    self.source = 0 # based on mode1 and mode5 (1 is actual, 5 is name)
     
-    return isConnected
+    self.queuedCommands = []
+    self.sessionState = 0 # 0 = pairing, 1 = session, 2 = command/poll
+    self.session = None # session ID
+    self.maxQueued = 1
+    self.selectorMap = {}
+    
+    self.srcLastLive = 0
+    self.srcRadio = 0
+    self.srcTv = 0
+    self.srcOff = 0
+    self.srcHdmi = []
+    self.srcAv = []
+    
+    self.lastCommandTime = 0
+
+  def createConnection(self):
+    self.Log("Connection created", 9, 1)
+    return Domoticz.Connection(Name="LG_TCP", Transport="TCP/IP", Protocol="HTTP", Address=Parameters["Address"], Port=Parameters["Port"])
     
   def onStart(self):
     try:
       self.logLevel = int(Parameters["Mode6"])
     except:
-      self.Log("Debuglevel '"+Parameters["Mode6"]+"' is not an integer", 1, 3)
+      self.Log("Debuglevel '%s' is not an integer", 1, 3, Parameters["Mode6"])
       
     if self.logLevel == 10:
       Domoticz.Debugging(1)
@@ -163,22 +176,34 @@ class BasePlugin:
     if (self.regexIp.match(Parameters["Address"] )):
       self.ip = Parameters["Address"]
     else:
-      self.Log("'"+Parameters["Address"]+"' is not a valid IP address.", 1, 3 )
+      self.Log("'%s' is not a valid IP address.", 1, 3, Parameters["Address"])
     
     try:
       self.port = int(Parameters["Port"])
     except Exception as e:
-      self.Log("Port is not a number: "+ Parameters["Port"], 1, 3)
+      self.Log("Port is not a number: %s", 1, 3, Parameters["Port"])
         
     try:
       self.maxQueued = int(Parameters["Mode3"])
     except Exception as e:
-      self.Log("'"+Parameters["Mode3"]+"' is not a number.", 1, 3 )
+      self.Log("'%s' is not a number.", 1, 3, Parameters["Mode3"])
       
+    heartbeat = 10
     try: 
-      Domoticz.Heartbeat(int(Parameters["Mode2"]))
+      heartbeat = int(Parameters["Mode2"])
     except:
       pass
+    
+    # heartbeat is the wheel resolution, the TV is polled on the first tick and every Mode2 seconds
+    # after that, commands that could not be send are dropped within 5 seconds after they expired
+    self.scheduler = scheduler.Scheduler(1)
+    Domoticz.Heartbeat(int(self.scheduler.resolution))
+    self.scheduler.Add("purge", 5, self.purgeQueue)
+    self.scheduler.Add("poll", heartbeat, self.poll, Delay=0)
+    
+    # every poll / command is a new HTTP connection, a TV that is off is polled at most every 2 minutes
+    # a connect attempt taking more than 60 seconds destroys the connection
+    self.connection = supervisor.ConnectionSupervisor(self.createConnection, MinBackoff=heartbeat, MaxBackoff=max(120, heartbeat), ConnectTimeout=60, Log=self.Log)
       
     self.key = Parameters["Mode4"] 
     
@@ -202,13 +227,13 @@ class BasePlugin:
         self.srcAv.append(dictValue)
         self.selectorMap[dictValue] = item
       else:
-        self.Log("Unknown source type '"+str(item)+"' with value "+str(dictValue), Level = 2, Type = 3)
+        self.Log("Unknown source type '%s' with value %s", 2, 3, item, dictValue)
         self.selectorMap[dictValue] = item
       dictValue = dictValue + 10
         
     srcLastLive = self.srcTv
     if (Parameters["Mode1"].count('|') != Parameters["Mode5"].count('|')):
-      self.Log("Sources ("+Parameters["Mode1"]+") and names ("+Parameters["Mode5"]+") do not match! Using only sources", 1, 3)
+      self.Log("Sources (%s) and names (%s) do not match! Using only sources", 1, 3, Parameters["Mode1"], Parameters["Mode5"])
       
       sourceOptions = {'LevelActions': '|'*Parameters["Mode1"].count('|'),
                'LevelNames': Parameters["Mode1"],
@@ -247,18 +272,29 @@ class BasePlugin:
       Domoticz.Device(Name="Channel up",    Unit=4, TypeName="Switch", Image=Images["LGtvchannelup"].ID).Create()
     if (5 not in Devices):
       Domoticz.Device(Name="Channel down",  Unit=5, TypeName="Switch", Image=Images["LGtvchanneldown"].ID).Create()
+    # warm start: when the TV was on, keep source, mute and session of the last run (stale until the TV
+    # answers) instead of showing off until the first status message
+    self.snapshot = snapshot.Snapshot(snapshot.FileName(Parameters))
+    restored = self.snapshot.Load() and self.snapshot.Get("lastConnected", False)
+    if restored:
+      self.source = self.snapshot.Get("source", self.source)
+      self.srcLastLive = self.snapshot.Get("srcLastLive", self.srcLastLive)
+      self.tvmuted = self.snapshot.Get("tvmuted", self.tvmuted)
+      self.session = self.snapshot.Get("session", self.session)
+      self.Log("Restored state: source %s, muted %s, session %s", 4, 1, self.source, self.tvmuted, self.session)
+    
     if (8 not in Devices):
       Domoticz.Device(Name="Mute",          Unit=8, TypeName="Switch", Image=Images["LGtvmute"].ID).Create()
-    else:
+    elif not restored:
       self.UpdateDevice(8,0,"Off")
       
     if (9 not in Devices):
       Domoticz.Device(Name="Exit",          Unit=9, TypeName="Switch", Image=Images["LGtvexit"].ID).Create()
     if (11 not in Devices): 
       Domoticz.Device(Name="Channel",       Unit=11, Type=243, Subtype=19, Switchtype=0).Create()
-    else:
+    elif not restored:
       self.UpdateDevice(11,0,"Off")
-    self.lastConnected = False
+    self.lastConnected = restored
     
     self.DumpConfigToLog()
     
@@ -266,11 +302,16 @@ class BasePlugin:
 
   def onStop(self):
     self.Log("onStop called", 9,1)
+    self.Log("Connection %s", 6, 1, self.connection.Summary())
+    self.storeState()
+    self.snapshot.Save(True)
     return
 
   def onConnect(self, Connection, Status, Description):
+    self.connection.OnConnect(Status)
+    self.snapshot.Confirm("lastConnected")
     if (Status == 0):
-      self.Log("Connected successfully to: "+Connection.Address+":"+Connection.Port, 5, 2)
+      self.Log("Connected successfully to: %s:%s", 5, 2, Connection.Address, Connection.Port)
       
       # device connected
       if not self.lastConnected: # last state was offline
@@ -296,16 +337,20 @@ class BasePlugin:
           self.sessionState = 1
           self.sendMessage(Message=pairCmd, URL="/hdcp/api/auth")
           
+        elif self.snapshot.IsStale("session"): # restored session, a status request checks it before keys are sent
+          self.sessionState = 2
+          self.sendMessage(Message="", URL="/hdcp/api/data?target=cur_channel&session="+self.session, Verb="GET")
+          
         else: # message
           items = len(self.queuedCommands)
           self.sessionState = 2
           if items > 0:
             cmd = self.queuedCommands.pop(0)
-            self.Log("Sending command '" + cmd +"', still "+str(items-1)+" command in queue", 5, 1)
+            self.Log("Sending command '%s', still %d command in queue", 5, 1, cmd, items-1)
             if cmd in self.LGCodes:
               cmdText = '<?xml version="1.0" encoding="utf-8"?><command><session>'+self.session+'</session><name>HandleKeyInput</name><value>'+str(self.LGCodes[cmd])+'</value></command>'
             else:
-              self.Log("Command '"+str(cmd)+" is not known in dictionay, send as actual value", 5, 1)
+              self.Log("Command '%s' is not known in dictionay, send as actual value", 5, 1, cmd)
               cmdText = '<?xml version="1.0" encoding="utf-8"?><command><session>'+self.session+'</session><name>HandleKeyInput</name><value>'+str(cmd)+'</value></command>'
             self.sendMessage(Message=cmdText, URL="/hdcp/api/dtv_wifirc") 
           else: # just request the status
@@ -318,7 +363,7 @@ class BasePlugin:
         loglevel=7
         logtype=1
         
-      self.Log("Failed to connect ("+str(Status)+") to: "+Connection.Address+":"+Connection.Port+" with error: "+Description+" dropped "+str(len(self.queuedCommands))+" commands", loglevel, logtype) 
+      self.Log("Failed to connect (%s) to: %s:%s with error: %s dropped %d commands", loglevel, logtype, Status, Connection.Address, Connection.Port, Description, len(self.queuedCommands))
       
         
       self.setSourceDevice(self.srcOff)
@@ -329,31 +374,36 @@ class BasePlugin:
       self.sessionState = 0
       self.UpdateDevice(8,0,"Off") 
       
+    self.storeState()
     return
 
   def onMessage(self, Connection, Data):
-    self.DumpVariable(Data, "OnMessage SessionState: "+ str(self.sessionState) + ", Data", Level=7, BytesAsStr = True)
+    if self.logLevel >= 7:
+      self.DumpVariable(Data, "OnMessage SessionState: %d, Data" % self.sessionState, Level=7, BytesAsStr = True)
     
     if ('Status' in Data) and ('Data' in Data):
       datastr = (Data['Data'].decode("utf-8"))
       self.DumpVariable(datastr, "data string", Level=7, BytesAsStr = True)
       
       if Data['Status'] == '200':
+        self.snapshot.Confirm("session")
         if self.sessionState == 1:
           self.session = self.getTag(datastr, 'session')
-          self.Log("Session ID: "+self.session , 7, 1)
+          self.Log("Session ID: %s", 7, 1, self.session)
         else:
           self.determineSource(datastr)
       if Data['Status'] == '401':
         self.Log("Received error while sending data; retry connection" , 4, 1)
+        self.recorder.Dump("session lost", Written=self.logLevel >= 4) # what lead to the 401
         self.session = None
         self.sessionState = 0
 
+    self.storeState()
     return
 
   def onCommand(self, Unit, Command, Level, Hue):
     CommandStr = str(Command)
-    self.Log("onCommand called for Unit " + str(Unit) + ": Parameter '" + CommandStr + "', Level: " + str(Level)+", Hue: " + str(Hue), 8, 1)
+    self.Log("onCommand called for Unit %s: Parameter '%s', Level: %s, Hue: %s", 8, 1, Unit, Command, Level, Hue)
 
     #self.DumpVariable(self.selectorMap, "selectormap: ", Level=7, BytesAsStr = True)
     currentlen = len(self.queuedCommands)
@@ -366,7 +416,7 @@ class BasePlugin:
         if self.lastCommandTime == 0:
           self.Log("onCommand: no command send yet. Insert additional exit to wake TV", 4, 2)
         else:
-          self.Log("onCommand: last command send "+str(round(nu - self.lastCommandTime,1))+" seconds ago. Insert additional exit to wake TV", 4, 2)
+          self.Log("onCommand: last command send %.1f seconds ago. Insert additional exit to wake TV", 4, 2, nu - self.lastCommandTime)
         self.queuedCommands.append("exit") 
         
       self.lastCommandTime = time.time()
@@ -377,7 +427,7 @@ class BasePlugin:
           if Level != self.source:
             newsrc = Level
             if (Level == self.srcRadio or Level == self.srcTv): # check what last live source was
-              if self.srcLastLive != Level and self.source != self.srcTv and self.source != self.srcRadio:
+              if (self.srcLastLive != Level or self.snapshot.IsStale("srcLastLive")) and self.source != self.srcTv and self.source != self.srcRadio:
                 self.queuedCommands.append(self.selectorMap[Level]) 
                 self.queuedCommands.append("stopSending") 
               self.queuedCommands.append(self.selectorMap[Level])
@@ -404,7 +454,12 @@ class BasePlugin:
       elif (Unit == 5):
         self.queuedCommands.append("channel_down")
       elif (Unit == 8):
-        if (CommandStr == "On" and not self.tvmuted):
+        if self.snapshot.IsStale("tvmuted"):
+          # restored and the TV does not report mute, send the key and follow the own keys from now on
+          self.queuedCommands.append("mute")
+          self.tvmuted = (CommandStr == "On")
+          self.snapshot.Confirm("tvmuted")
+        elif (CommandStr == "On" and not self.tvmuted):
           self.queuedCommands.append("mute")
           self.tvmuted = True
         elif (CommandStr == "Off" and self.tvmuted):
@@ -420,52 +475,67 @@ class BasePlugin:
       
       self.DumpVariable(self.queuedCommands, "queuedCommands")
       if len(self.queuedCommands) > 0 and currentlen == 0:
-        self.checkConnection()
+        self.connection.Kick() # connect now, also when backing off
     else:
-      self.Log("Still "+ str(len(self.queuedCommands))+ " commands queued, drop this command" , 4, 1)
+      self.Log("Still %d commands queued, drop this command", 4, 1, len(self.queuedCommands))
       
     return
 
   def onNotification(self, Name, Subject, Text, Status, Priority, Sound, ImageFile):
-    self.Log("onNotification: " + Name + "," + Subject + "," + Text + "," + Status + "," + str(Priority) + "," + Sound + "," + ImageFile, 8, 1)
+    self.Log("onNotification: %s,%s,%s,%s,%s,%s,%s", 8, 1, Name, Subject, Text, Status, Priority, Sound, ImageFile)
     return
 
   def onDisconnect(self, Connection):
+    self.connection.OnDisconnect()
     items = len(self.queuedCommands)
     if items > 0:
-      self.Log("onDisconnect "+Connection.Address+":"+Connection.Port+", still "+ str(items)+" in the queue", 4, 2)
+      self.Log("onDisconnect %s:%s, still %d in the queue", 4, 2, Connection.Address, Connection.Port, items)
       if (len(self.key) > 2): # if there are still command continue (and key must be present of course)
         self.DumpVariable(self.queuedCommands, "queuedCommands", Level=6)
         if (self.queuedCommands[0] == "stopSending"):
           self.Log("stopSending command found, wait until next connection to continue", 4, 2)
         else:
-          self.checkConnection()
+          self.connection.Check()
     else:
-      self.Log("onDisconnect "+Connection.Address+":"+Connection.Port+", no more commands in the queue", 6, 2)
+      self.Log("onDisconnect %s:%s, no more commands in the queue", 6, 2, Connection.Address, Connection.Port)
         
     return
 
   def onHeartbeat(self):
+    self.scheduler.Run()
+    self.snapshot.Save()
+    return
+
+####################### Specific helper functions for plugin #######################   
+  def purgeQueue(self):
     #clean up old not executed command (older than 30 seconds)
     currentlen = len(self.queuedCommands)
     nu = time.time()
     if ((nu - self.lastCommandTime) > 30) and (currentlen > 0) :
-      self.Log("onHeartbeat: last command send "+str(round(nu - self.lastCommandTime,1))+" seconds ago, still "+str(currentlen)+" commands waiting, all dropped", 4, 3)
+      self.Log("purgeQueue: last command send %.1f seconds ago, still %d commands waiting, all dropped", 4, 3, nu - self.lastCommandTime, currentlen)
       self.queuedCommands.clear()
-      currentlen = 0
-      self.connection = None
+      self.connection.Reset()
+      self.scheduler.Reschedule("poll", 0)  # check the connection on the next tick
     
+  def poll(self):
+    currentlen = len(self.queuedCommands)
     if (currentlen == 0 ): 
-      self.Log("onHeartbeat called, check connection", 9,1)
-      self.checkConnection()
-    elif ((currentlen > 0) and self.queuedCommands[0] == "stopSending"):
-      self.Log("onHeartbeat called, stopSending command dropped, check connection", 4,1)
+      self.Log("poll called, check connection", 9,1)
+      self.connection.Check()
+    elif (self.queuedCommands[0] == "stopSending"):
+      self.Log("poll called, stopSending command dropped, check connection", 4,1)
       self.queuedCommands.pop(0)
-      self.checkConnection()
-
+      self.connection.Check()
+    
+  def storeState(self):
+    # warm start state, written by snapshot.Save()
+    self.snapshot.Set("lastConnected", self.lastConnected)
+    self.snapshot.Set("source", self.source)
+    self.snapshot.Set("srcLastLive", self.srcLastLive)
+    self.snapshot.Set("tvmuted", self.tvmuted)
+    self.snapshot.Set("session", self.session)
     return
-
-####################### Specific helper functions for plugin #######################   
+    
   def setSourceDevice(self, src, txt = None):
     if (txt is None):
       if (src == self.srcOff):
@@ -485,10 +555,10 @@ class BasePlugin:
       self.source = src
       self.UpdateDevice(1, self.source, self.source)
       self.UpdateDevice(11,0,txt)
-      self.Log("Set source from "+str(self.source)+" to "+str(src)+" and text to '"+txt+"'", 5, 1)
+      self.Log("Set source from %s to %s and text to '%s'", 5, 1, self.source, src, txt)
     elif (src == self.srcTv or src == self.srcRadio):
       self.UpdateDevice(11,0,txt)
-      self.Log("Set text to '"+txt+"'", 5, 1)
+      self.Log("Set text to '%s'", 5, 1, txt)
       
       
   def determineSource(self, xmldata):
@@ -515,6 +585,7 @@ class BasePlugin:
           else:
             src = self.srcTv
           self.srcLastLive = src
+          self.snapshot.Confirm("srcLastLive")
         elif type == "terrestrial" and major == 0: # av 
           txt = "AV"
           if len(self.srcAv) > 0:
@@ -537,13 +608,15 @@ class BasePlugin:
         minor = self.getTag(xmldata, 'minor')
         
         if (error):
-          self.Log("Could not determine source type:'"+type+", major:"+str(major)+", minor:"+minor+", physicalNum:"+physicalNum+", sourceIndex:"+sourceIndex+", name:"+name, 2, 3)
+          self.Log("Could not determine source type:'%s, major:%s, minor:%s, physicalNum:%s, sourceIndex:%s, name:%s", 2, 3, type, major, minor, physicalNum, sourceIndex, name)
         else:
           if src in self.selectorMap:
-            self.Log("Source determined as "+str(src)+"("+self.selectorMap[src] +"), '"+txt+"' (type:'"+type+", major:"+str(major)+", minor:"+minor+", physicalNum:"+physicalNum+", sourceIndex:"+sourceIndex+", name:"+name+")", 5, 1)
+            self.Log("Source determined as %s(%s), '%s' (type:'%s, major:%s, minor:%s, physicalNum:%s, sourceIndex:%s, name:%s)", 5, 1, src, self.selectorMap[src], txt, type, major, minor, physicalNum, sourceIndex, name)
           else:
-            self.Log("Source determined as "+str(src)+", '"+txt+"' (type:'"+type+", major:"+str(major)+", minor:"+minor+", physicalNum:"+physicalNum+", sourceIndex:"+sourceIndex+", name:"+name+")", 5, 1)
+            self.Log("Source determined as %s, '%s' (type:'%s, major:%s, minor:%s, physicalNum:%s, sourceIndex:%s, name:%s)", 5, 1, src, txt, type, major, minor, physicalNum, sourceIndex, name)
         
+    if len(type) > 0 and not error:
+      self.snapshot.Confirm("source")
     self.setSourceDevice(src, txt)
     
     #except:
@@ -591,79 +664,28 @@ class BasePlugin:
         sValue = str(sValue1)+";"+str(sValue2)
         
       if (Devices[Unit].nValue != nValue) or (Devices[Unit].sValue != sValue):
-        self.Log("Update ["+Devices[Unit].Name+"] from: ('"+str(Devices[Unit].nValue)+":'"+str(Devices[Unit].sValue )+"') to: ("+str(nValue)+":'"+str(sValue)+"')", 5, 1)
+        self.Log("Update [%s] from: ('%s:'%s') to: (%s:'%s')", 5, 1, Devices[Unit].Name, Devices[Unit].nValue, Devices[Unit].sValue, nValue, sValue)
         Devices[Unit].Update(nValue, sValue)
     return
    
-  def DumpDeviceToLog(self,Unit):
-    self.Log(str(Devices[Unit].ID)+":"+Devices[Unit].Name+", (n:"+str(Devices[Unit].nValue)+", s:"+Devices[Unit].sValue+", Sgl:"+str(Devices[Unit].SignalLevel)+", bl:"+str(Devices[Unit].BatteryLevel)+", img:"+ str(Devices[Unit].Image)+", typ:"+ str(Devices[Unit].Type)+", styp:"+ str(Devices[Unit].SubType)+")", 6, 1)
-    return   
-    
   def DumpConfigToLog(self):
-    for x in Parameters:
-      if Parameters[x] != "":
-        self.Log( "'" + x + "':'" + str(Parameters[x]) + "'", 7, 1)
-    self.Log("Device count: " + str(len(Devices)), 6, 1)
-    for x in Devices:
-      self.DumpDeviceToLog(x)
+    pluginlog.DumpConfigToLog(Parameters, Devices, self.logLevel)
     return
     
   def DumpVariable(self, Item, Varname, Level = 5, BytesAsStr = False, Prefix=""):
+    self.recorder.RecordData(Varname, Item)
     if self.logLevel >= Level:
-      Prefix = str(Prefix)
-      if isinstance(Item, dict):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        for b in Item:
-          if isinstance(b, str):
-            self.DumpVariable( Item[b], "'"+str(b) + "'", Level, BytesAsStr, Prefix)
-          else:
-            self.DumpVariable( Item[b], str(b), Level, BytesAsStr, Prefix)
-         
-      elif isinstance(Item, (bytes, bytearray)):
-        if BytesAsStr:
-          txt = escape(Item.decode("utf-8", "ignore"))
-        else:
-          txt = "[ " 
-          for b in Item:
-            txt += '0x{:02X} '.format(b)
-          txt +=  "]"
-        
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): " + txt, Level, 1)
-      elif isinstance(Item, (tuple, list)):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        idx = 0
-        for b in Item:
-          self.DumpVariable( b, "["+str(idx) + "]", Level, BytesAsStr, Prefix)
-          idx=idx+1
-
-      elif isinstance(Item, str):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): '"+Item+"'", Level, 1)
-      else:
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"): "+str(Item), Level, 1)
-           
+      pluginlog.DumpVariable(Item, Varname, BytesAsStr, Prefix)
     return
 
-  def Log(self, Message, Level, Type):
-    # Message = string, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+  def Log(self, Message, Level, Type, *Args):
+    # Message = string, format string with Args or callable, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+    # Message is only formatted when Level is not filtered out, the flight recorder keeps it unformatted
+    self.recorder.Record(Message, Args)
     if self.logLevel >= Level:
-      if Type == 2:
-        Domoticz.Status(Message)
-      elif Type == 3:
-        Domoticz.Error(Message)
-      else:
-        Domoticz.Log(Message)
+      pluginlog.Write(Message, Type, Args)
+    if Type == 3:
+      self.recorder.Dump("error", Written=self.logLevel >= Level) # a short tail when the error is filtered out
     
     return
     
@@ -709,3 +731,17 @@ def onHeartbeat():
   global _plugin
   _plugin.onHeartbeat()
 
+# opt-in push button for a flight recorder dump, see plugincore/flightrecorder.py
+_recorderButton = flightrecorder.Instrument(globals())
+
+# opt-in profiling of the callbacks, see plugincore/profiler.py
+_profiler = profiler.Instrument(globals())
+
+# opt-in recording of the received data, see plugincore/capture.py
+_capture = capture.Instrument(globals())
+
+# latency histograms of the callbacks above, see plugincore/callbackstats.py
+_stats = callbackstats.Instrument(globals())
+
+# opt-in OpenMetrics endpoint of the readings and counters, see plugincore/metrics.py
+_metrics = metrics.Instrument(globals())
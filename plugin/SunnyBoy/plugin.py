@@ -9,9 +9,21 @@
 #
 # History:
 # 1.0.0   27-06-2020  Initial version
+# 1.0.1   18-10-2026  Lazy log formatting via plugincore
+# 1.0.2   18-10-2026  Write-behind device updates via plugincore.devicecache
+# 1.0.3   18-10-2026  Callback latency histograms via plugincore.callbackstats
+# 1.0.4   18-10-2026  Blocking I/O on a worker thread via plugincore.workerpool
+# 1.0.5   18-10-2026  Per instance state (__slots__)
+# 1.0.6   18-10-2026  Flight recorder of recent log events, dumped on errors
+# 1.0.7   18-10-2026  Frame layouts via plugincore.codec
+# 1.0.8   18-10-2026  OpenMetrics endpoint via plugincore.metrics
+# 1.0.9   18-10-2026  Profiling mode via plugincore.profiler
+# 1.0.10  18-10-2026  Errors dump the flight recorder at every debug level, optional dump push button
+# 1.0.11  18-10-2026  Removed unused html import, remaining log messages formatted lazily
+# 1.0.12  18-10-2026  Errors filtered out by the debug level dump only the last 16 flight recorder events
 
 """
-<plugin key="SunnyBoy_Modbus" name="Sunnyboy inverter via Modbus" author="elgringo" version="1.0.0" externallink="https://github.com/ericstaal/domoticz/blob/master/">
+<plugin key="SunnyBoy_Modbus" name="Sunnyboy inverter via Modbus" author="elgringo" version="1.0.12" externallink="https://github.com/ericstaal/domoticz/blob/master/">
   <params>
     <param field="Address" label="IP Address" width="200px" required="true" default="127.0.0.1"/>
     <param field="Port" label="Port" width="30px" required="true" default="502"/>
@@ -54,24 +66,55 @@ import Domoticz
 import datetime
 import collections 
 import base64
-from html import escape
+
+# shared helpers (plugin/plugincore)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from plugincore import pluginlog
+from plugincore import callbackstats
+from plugincore import devicecache
+from plugincore import workerpool
+from plugincore import flightrecorder
+from plugincore import metrics
+from plugincore import profiler
+from plugincore import codec
 
 # additional imports
 from pymodbus.client.sync import ModbusTcpClient
 #from pymodbus.transaction import ModbusRtuFramer  
-import struct
 
 class BasePlugin:
+  # state per instance, several inverters can be read
+  __slots__ = ("connection", "workers", "logLevel", "deviceCache", "totalEnergy", "unitid", "address", "port", "recorder", "registerBuffer", "metrics")
   
-  connection = None           # ModBusConnection
-
-  logLevel = 0                # logLevel
-  totalEnergy = 0.0           # inital values
+  readTimeout = 3             # seconds per modbus request
+  # 32 bit values are two registers, high word first
+  registerWords = codec.Frame(">", ((0,"H","high"), (2,"H","low")))
+  registerValues = {"U32": codec.Frame(">", ((0,"I","value"),)), "S32": codec.Frame(">", ((0,"i","value"),))}
+  # device unit: metric, see plugincore/metrics.py
+  unitMetrics = {1: "temperature_celsius", 4: "power_watts"}
   
-  unitid = 0
+  def __init__(self):
+    self.connection = None           # ModBusConnection, only used by the worker thread
+    self.workers = None              # worker thread for the modbus reads
+    
+    self.logLevel = 0                # logLevel
+    self.recorder = flightrecorder.FlightRecorder() # recent log events, also the filtered ones
+    self.metrics = metrics.Registry("domoticz_sunnyboy") # readings served by plugincore.metrics
+    self.metrics.Define("temperature_celsius", "gauge", "Inverter temperature")
+    self.metrics.Define("power_watts", "gauge", "Output power")
+    self.metrics.Define("energy_watthours", "counter", "Total energy produced")
+    self.deviceCache = None          # write-behind cache for device updates
+    self.totalEnergy = 0.0           # inital values
     
+    self.unitid = 0
+    self.address = ""
+    self.port = 502
+    self.registerBuffer = bytearray(4) # two registers, worker thread only
+
   def checkConnection(self, checkonly = False):
-    # Check connection and connect none
+    # Check connection and connect none, runs on the worker thread
     isConnected = False
     try:
       if (not self.connection is None):
@@ -79,13 +122,12 @@ class BasePlugin:
           if (not checkonly):
             self.connection.connect()
       else:
-        self.connection = ModbusTcpClient(host=Parameters["Address"], port=int(Parameters["Port"]))
+        self.connection = ModbusTcpClient(host=self.address, port=self.port, timeout=self.readTimeout)
         self.connection.connect()
         
       isConnected = self.connection.is_socket_open()
     except:
       self.connection = None
-      self.Log("CheckConnection error, try to reset",1,3)
     
     return isConnected
     
@@ -93,19 +135,25 @@ class BasePlugin:
     try:
       self.logLevel = int(Parameters["Mode6"])
     except:
-      self.Log("Debuglevel '"+Parameters["Mode6"]+"' is not an integer",1,3)
+      self.Log("Debuglevel '%s' is not an integer", 1, 3, Parameters["Mode6"])
       
     try:
       self.unitid = int(Parameters["Mode1"])
     except:
       self.unitid = 1
-      self.Log("Unit ID '"+Parameters["Mode1"]+"' is not an integer, using 1",1,2)
+      self.Log("Unit ID '%s' is not an integer, using 1", 1, 2, Parameters["Mode1"])
       
     if self.logLevel == 10:
       Domoticz.Debugging(1)
-    self.Log("onStart called, heartbeat interval " +str(Parameters["Mode3"])+" seconds", 4, 1)  
+    self.Log("onStart called, heartbeat interval %s seconds", 4, 1, Parameters["Mode3"])  
     
     Domoticz.Heartbeat(int(Parameters["Mode3"])) 
+    self.deviceCache = devicecache.DeviceCache(Devices)
+    
+    # modbus reads on a worker thread, the results are handled in the next heartbeat
+    self.address = Parameters["Address"]
+    self.port = int(Parameters["Port"])
+    self.workers = workerpool.WorkerPool(Threads=1, MaxQueue=2, Timeout=int(Parameters["Mode3"]))
     
     # create devices if needed
     if (1 not in Devices):
@@ -119,15 +167,20 @@ class BasePlugin:
     else:
       Domoticz.Device(Name="Power", Unit=4, Type=243, Subtype=29, Switchtype=4, Image=0).Create()
     
-    self.Log("Current total energy: "+str(self.totalEnergy), 1, 2)
+    self.Log("Current total energy: %s", 1, 2, self.totalEnergy)
     # id 1= temperature
     # id 3= Status (system status) + temp deriation ??
     # id 4= Power
      
     self.DumpConfigToLog()
+    self.deviceCache.Flush()
     return
 
   def onStop(self):
+    if not self.workers.Stop():
+      self.Log("Modbus read still running at stop", 1, 2)
+    self.Log("Worker %s", 6, 1, self.workers.Summary())
+    self.deviceCache.Flush(True)
     if (not self.connection is None):
       self.connection.close()
       self.connection = None
@@ -145,125 +198,152 @@ class BasePlugin:
     return
 
   def onCommand(self, Unit, Command, Level, Hue):
-    self.Log("onCommand called for Unit " + str(Unit) + ": Parameter '" + str(Command) + "', Level: " + str(Level)+", Hue: " + str(Hue), 8, 1)
+    self.Log("onCommand called for Unit %s: Parameter '%s', Level: %s, Hue: %s", 8, 1, Unit, Command, Level, Hue)
     return
 
   def onNotification(self, Name, Subject, Text, Status, Priority, Sound, ImageFile):
-    self.Log("onNotification: " + Name + "," + Subject + "," + Text + "," + Status + "," + str(Priority) + "," + Sound + "," + ImageFile, 8, 1)
+    self.Log("onNotification: %s,%s,%s,%s,%s,%s,%s", 8, 1, Name, Subject, Text, Status, Priority, Sound, ImageFile)
     return
 
   def onDisconnect(self, Connection):
-    self.Log("onDisconnect "+Connection.Address+":"+Connection.Port, 7, 1)
+    self.Log("onDisconnect %s:%s", 7, 1, Connection.Address, Connection.Port)
     return
 
   def onHeartbeat(self):
     self.Log("onHeartbeat called", 8, 1)
     
+    # handle the reads of the previous heartbeat, then start the next ones
+    self.workers.Drain()
+    if not self.workers.Submit(self.readRegisters, Callback=self.updateRegisters, Name="registers"):
+      self.Log("Previous modbus read still running", 5, 2)
+    
+    # null values of a failed read and the new values are merged into one write per unit
+    self.deviceCache.Flush()
+      
+    return
+
+####################### Specific helper functions for plugin #######################    
+  def readRegisters(self):
+    # worker thread: reads the registers, returns None when not connected or a list of (address, result, value, error)
+    if not self.checkConnection(): # checks if connect if not retry
+      if not self.connection is None:
+        self.connection.close()
+        self.connection = None
+      return None
+      
+    reads = []
+    for smaadr, datatype in ((30219, "U32"), (30201, "U32"), (30775, "U32"), (30529, "U32"), (30953, "S32"), (30211, "U32")):
+      if smaadr == 30211 and self.logLevel < 8:
+        break                         # debug, user action
+      res, resvalue, error = self.readAddress(smaadr, datatype)
+      reads.append((smaadr, res, resvalue, error))
+      if error is not None:
+        break                         # probably connection lost
+      if smaadr == 30219 and not res:
+        break                         # read of register faield, probably since there is no sun :)
+    return reads
+    
+  def updateRegisters(self, Reads, Error):
+    # plugin thread: result of readRegisters
     try:
-      if self.checkConnection(): # checks if connect if not retry
-        # status
-        status = "Unknown"
-        deriation = ""
+      if Error is not None:
+        self.Log("Modbus read failed: %s", 1, 3, Error)
+        self.sendNullValues()
+        return
+      if Reads is None:
+        self.Log("Not connected to %s:%d", 6, 2, self.address, self.port)
+        self.sendNullValues()
+        return
         
-        # Temp deriation
-        result = self.readAddress(30219, "U32")
-        if result[0]:
-          if result[1] == 557:
-            deriation = ", Temperature derating"
-          elif result[1] == 1704:
-            deriation = ", WMAX derating"
-          elif result[1] == 1705:
-            deriation = ", Frequency derating"
-          elif result[1] == 1706:
-            deriation = ", Current limitation"
-        else:
-          # read of register faield, probably since there is no sun :)
+      results = {}
+      for smaadr, res, resvalue, error in Reads:
+        if error is not None:
+          self.Log("Failed to read address: %d, %s", 1, 2, smaadr, error) #probably connection lost
           self.sendNullValues()
           return
-        
-        # status
-        result = self.readAddress(30201, "U32")
-        if result[0]:
-          if result[1] == 35:
-            status = "Error"
-          elif result[1] == 303:
-            status = "Off"
-          elif result[1] == 307:
-            status = "OK"
-          elif result[1] == 455:
-            status = "Warning"
-          else:
-            status = "Unknown(%d)" % result[1]
-
-        self.UpdateDevice(3, 0, status + deriation)
-       
-
-        # current power
-        currentpower = 0 
-        result = self.readAddress(30775, "U32")
-        if result[0]:
-          currentpower = result[1]
-                  
-        #total power
-        result = self.readAddress(30529, "U32")
-        if result[0]:
-          self.totalEnergy = result[1]
-        
-        self.UpdateDevice(4, 0, currentpower, self.totalEnergy)
-        
-        # temperature
-        result = self.readAddress(30953, "S32")
-        if result[0]:
-          self.UpdateDevice(1, 0, result[1]/10 )
-          
-        # debug
-        if (self.logLevel >= 8):
-          self.readAddress(30211, "U32") # user action
-          
+        self.Log("Read address:%d, value: %d (hex: 0x%x) result: %s", 6, 2, smaadr, resvalue, resvalue, res)
+        if res:
+          results[smaadr] = resvalue
+    
+      # status
+      status = "Unknown"
+      deriation = ""
+      
+      # Temp deriation
+      if 30219 in results:
+        if results[30219] == 557:
+          deriation = ", Temperature derating"
+        elif results[30219] == 1704:
+          deriation = ", WMAX derating"
+        elif results[30219] == 1705:
+          deriation = ", Frequency derating"
+        elif results[30219] == 1706:
+          deriation = ", Current limitation"
       else:
+        # read of register faield, probably since there is no sun :)
         self.sendNullValues()
-        self.connection.close()
-        self.connection = None
+        return
+      
+      # status
+      if 30201 in results:
+        if results[30201] == 35:
+          status = "Error"
+        elif results[30201] == 303:
+          status = "Off"
+        elif results[30201] == 307:
+          status = "OK"
+        elif results[30201] == 455:
+          status = "Warning"
+        else:
+          status = "Unknown(%d)" % results[30201]
+
+      self.UpdateDevice(3, 0, status + deriation)
+
+      # current power
+      currentpower = results.get(30775, 0)
+                
+      #total power
+      if 30529 in results:
+        self.totalEnergy = results[30529]
+      
+      self.UpdateDevice(4, 0, currentpower, self.totalEnergy)
+      
+      # temperature
+      if 30953 in results:
+        self.UpdateDevice(1, 0, results[30953]/10 )
 
     except Exception as e:
-      self.Log("OnHeartbeat Error: "+ str(e), 1, 3 )
+      self.Log("OnHeartbeat Error: %s", 1, 3, e)
       
     return
 
-####################### Specific helper functions for plugin #######################    
   def readAddress(self, smaadr, datatype):
+    # worker thread, returns (valid, value, error)
     res = True
     resvalue = 0
 
     modbusresult = self.connection.read_holding_registers(address = smaadr, count = 2, unit=self.unitid)
     
     if modbusresult.isError():
-      res = False
-      self.Log("Failed to read address: "+ str(smaadr), 1, 2 ) #probably connection lost
-      
-      self.sendNullValues()
       self.connection.close()
       self.connection = None
+      return False, 0, str(modbusresult)
     else:
       
-      w1 = struct.pack('H', modbusresult.registers[0]) # Assuming register values are unsigned short's
-      w2 = struct.pack('H', modbusresult.registers[1]) # Assuming register values are unsigned short's
+      if datatype not in self.registerValues:
+        return False, 0, "Unknown datatype: "+ str(datatype)
+      
+      self.registerWords.PackInto(self.registerBuffer, 0, modbusresult.registers[0], modbusresult.registers[1]) # Assuming register values are unsigned short's
+      resvalue = self.registerValues[datatype].Unpack(self.registerBuffer)[0]
       
       if datatype == 'S32':
-        resvalue = struct.unpack('i', w2 + w1)[0]
         if resvalue >= 2147483647 or resvalue <= -2147483647: 
           res = False
       elif datatype== 'U32':
-        resvalue = struct.unpack('I', w2 + w1)[0]
         if resvalue == 16777213:
           res = False        
-      else:
-        self.Log("Unknown datatype: "+ str(datatype), 1, 3 )
-        res = False
-      
-    self.Log("Read address:"+str(smaadr)+", value: "+str(resvalue)+" (hex: "+hex(resvalue)+") result: "+str(res), 6, 2 )
     
-    return res, resvalue
+    return res, resvalue, None
     
     
   def sendNullValues(self):
@@ -280,7 +360,7 @@ class BasePlugin:
     try:
       returnValue = float(str(sValue).split(';')[1])
     except:
-      self.Log("could not convert "+str(sValue), 1,3)
+      self.Log("could not convert %s", 1, 3, sValue)
       pass
     return returnValue
   
@@ -296,6 +376,11 @@ class BasePlugin:
     return minutes  
    
   def UpdateDevice(self, Unit, nValue, sValue1, sValue2 = None):
+    if Unit in self.unitMetrics:
+      self.metrics.Set(self.unitMetrics[Unit], sValue1)
+      if sValue2 is not None:
+        self.metrics.Set("energy_watthours", sValue2)
+        
     # Make sure that the Domoticz device still exists (they can be deleted) before updating it 
     if (Unit in Devices):
       if sValue2 is None:
@@ -304,79 +389,28 @@ class BasePlugin:
         sValue = str(sValue1)+";"+str(sValue2)
         
       if (Devices[Unit].nValue != nValue) or (Devices[Unit].sValue != sValue):
-        self.Log("Update ["+Devices[Unit].Name+"] from: ('"+str(Devices[Unit].nValue)+":'"+str(Devices[Unit].sValue )+"') to: ("+str(nValue)+":'"+str(sValue)+"')", 5, 1)
-        Devices[Unit].Update(nValue, sValue)
+        self.Log("Update [%s] from: ('%s:'%s') to: (%s:'%s')", 5, 1, Devices[Unit].Name, Devices[Unit].nValue, Devices[Unit].sValue, nValue, sValue)
+      self.deviceCache.Update(Unit, nValue, sValue) # written by deviceCache.Flush()
     return
    
-  def DumpDeviceToLog(self,Unit):
-    self.Log(str(Devices[Unit].ID)+":"+Devices[Unit].Name+", (n:"+str(Devices[Unit].nValue)+", s:"+Devices[Unit].sValue+", Sgl:"+str(Devices[Unit].SignalLevel)+", bl:"+str(Devices[Unit].BatteryLevel)+", img:"+ str(Devices[Unit].Image)+", typ:"+ str(Devices[Unit].Type)+", styp:"+ str(Devices[Unit].SubType)+")", 6, 1)
-    return   
-    
   def DumpConfigToLog(self):
-    for x in Parameters:
-      if Parameters[x] != "":
-        self.Log( "'" + x + "':'" + str(Parameters[x]) + "'", 7, 1)
-    self.Log("Device count: " + str(len(Devices)), 6, 1)
-    for x in Devices:
-      self.DumpDeviceToLog(x)
+    pluginlog.DumpConfigToLog(Parameters, Devices, self.logLevel)
     return
     
   def DumpVariable(self, Item, Varname, Level = 5, BytesAsStr = False, Prefix=""):
+    self.recorder.RecordData(Varname, Item)
     if self.logLevel >= Level:
-      Prefix = str(Prefix)
-      if isinstance(Item, dict):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        for b in Item:
-          if isinstance(b, str):
-            self.DumpVariable( Item[b], "'"+str(b) + "'", Level, BytesAsStr, Prefix)
-          else:
-            self.DumpVariable( Item[b], str(b), Level, BytesAsStr, Prefix)
-         
-      elif isinstance(Item, (bytes, bytearray)):
-        if BytesAsStr:
-          txt = escape(Item.decode("utf-8", "ignore"))
-        else:
-          txt = "[ " 
-          for b in Item:
-            txt += '0x{:02X} '.format(b)
-          txt +=  "]"
-        
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): " + txt, Level, 1)
-      elif isinstance(Item, (tuple, list)):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        idx = 0
-        for b in Item:
-          self.DumpVariable( b, "["+str(idx) + "]", Level, BytesAsStr, Prefix)
-          idx=idx+1
-
-      elif isinstance(Item, str):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): '"+Item+"'", Level, 1)
-      else:
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"): "+str(Item), Level, 1)
-           
+      pluginlog.DumpVariable(Item, Varname, BytesAsStr, Prefix)
     return
 
-  def Log(self, Message, Level, Type):
-    # Message = string, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+  def Log(self, Message, Level, Type, *Args):
+    # Message = string, format string with Args or callable, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+    # Message is only formatted when Level is not filtered out, the flight recorder keeps it unformatted
+    self.recorder.Record(Message, Args)
     if self.logLevel >= Level:
-      if Type == 2:
-        Domoticz.Status(Message)
-      elif Type == 3:
-        Domoticz.Error(Message)
-      else:
-        Domoticz.Log(Message)
+      pluginlog.Write(Message, Type, Args)
+    if Type == 3:
+      self.recorder.Dump("error", Written=self.logLevel >= Level) # a short tail when the error is filtered out
     
     return
     
@@ -422,3 +456,14 @@ def onHeartbeat():
   global _plugin
   _plugin.onHeartbeat()
 
+# opt-in push button for a flight recorder dump, see plugincore/flightrecorder.py
+_recorderButton = flightrecorder.Instrument(globals())
+
+# opt-in profiling of the callbacks, see plugincore/profiler.py
+_profiler = profiler.Instrument(globals())
+
+# latency histograms of the callbacks above, see plugincore/callbackstats.py
+_stats = callbackstats.Instrument(globals())
+
+# opt-in OpenMetrics endpoint of the readings and counters, see plugincore/metrics.py
+_metrics = metrics.Instrument(globals())
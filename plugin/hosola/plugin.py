@@ -14,9 +14,23 @@
 # 1.0.6   03-07-2018  Fixed logging, robust for invalid messages
 # 1.0.7   08-07-2018  Report start and end of incorrect message
 # 1.0.8   06-08-2018  Update logging
+# 1.0.9   18-10-2026  Lazy log formatting via plugincore
+# 1.0.10  18-10-2026  Offset annotated frame dump
+# 1.0.11  18-10-2026  Write-behind device updates via plugincore.devicecache
+# 1.0.12  18-10-2026  Callback latency histograms via plugincore.callbackstats
+# 1.0.13  18-10-2026  Opt-in capture of received data via plugincore.capture
+# 1.0.14  18-10-2026  Reconnect with exponential backoff via plugincore.supervisor
+# 1.0.15  18-10-2026  Per instance state (__slots__), preallocated receive buffer
+# 1.0.16  18-10-2026  Flight recorder of recent log events, dumped on errors
+# 1.0.17  18-10-2026  Frame layouts via plugincore.codec
+# 1.0.18  18-10-2026  OpenMetrics endpoint via plugincore.metrics
+# 1.0.19  18-10-2026  Profiling mode via plugincore.profiler
+# 1.0.20  18-10-2026  Errors dump the flight recorder at every debug level, optional dump push button
+# 1.0.21  18-10-2026  Removed unused html import, remaining log messages formatted lazily
+# 1.0.22  18-10-2026  Errors filtered out by the debug level dump only the last 16 flight recorder events
 
 """
-<plugin key="Hosola_Omnik" name="Hosola / Omnik solar inverter" author="elgringo" version="1.0.8" externallink="https://github.com/ericstaal/domoticz/blob/master/">
+<plugin key="Hosola_Omnik" name="Hosola / Omnik solar inverter" author="elgringo" version="1.0.22" externallink="https://github.com/ericstaal/domoticz/blob/master/">
   <params>
     <param field="Address" label="IP Address" width="200px" required="true" default="127.0.0.1"/>
     <param field="Port" label="Port" width="30px"  required="true" default="8899"/>
@@ -69,60 +83,82 @@ import Domoticz
 import datetime
 import collections 
 import base64
-from html import escape
+
+# shared helpers (plugin/plugincore)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from plugincore import pluginlog
+from plugincore import callbackstats
+from plugincore import capture
+from plugincore import devicecache
+from plugincore import supervisor
+from plugincore import framebuffer
+from plugincore import flightrecorder
+from plugincore import metrics
+from plugincore import profiler
+from plugincore import codec
 
 # additional imports
 
 class BasePlugin:
+  # state per instance, no shared class level lists / buffers
+  __slots__ = ("connection", "outstandingMessages", "maxOutstandingMessages", "logLevel", "deviceCache", "totalEnergy", "inverterId", "readBytes",
+               "errorReported", "errorIncorrectStartReported", "nofIncorrectMessages", "lastIncorrectStart", "recorder", "metrics")
   
-  connection = None           # Network connection
-  outstandingMessages = 0     # Open messages without reply
-  maxOutstandingMessages = 0  # lose connection after
-  logLevel = 0                # logLevel
-  
-  totalEnergy = 0.0           # inital values
-  inverterId = bytearray()
-  readBytes = bytearray()
-  
-  errorReported = False
-  errorIncorrectStartReported = False
-  nofIncorrectMessages = 0
-  lastIncorrectStart = datetime.datetime.now()
+  # inverter frame, big endian, start (3 bytes) .. "OK" (2 bytes)
+  frame = codec.Frame(">", ((0,"3s","start"), (31,"H","temperature"), (33,"H","VDC 1"), (35,"H","VDC 2"), (37,"H","VDC 3"), (51,"H","VAC 1"), (53,"H","VAC 2"), (55,"H","VAC 3"),
+                            (59,"H","PAC 1"), (63,"H","PAC 2"), (67,"H","PAC 3"), (71,"I","total energy"), (154,"2s","end")))
+  frameSize = frame.size      # 156
+  frameLayout = frame.Layout
+  # device unit: (metric, phase), see plugincore/metrics.py
+  unitMetrics = {1: ("temperature_celsius", None), 2: ("ac_volts", 1), 3: ("dc_volts", 1), 4: ("power_watts", 1), 5: ("ac_volts", 2), 6: ("dc_volts", 2),
+                 7: ("power_watts", 2), 8: ("ac_volts", 3), 9: ("dc_volts", 3), 10: ("power_watts", 3)}
   
-  def checkConnection(self, checkonly = False):
-    # Check connection and connect none
-    isConnected = False
-    try:
-      if not self.connection is None:
-        if self.connection.Connected():
-          isConnected = True
-        else:
-          if (not self.connection.Connecting()) and (not checkonly):
-            self.outstandingMessages = 0
-            self.connection.Connect()
-      else:
-        self.outstandingMessages = 0
-        self.connection = Domoticz.Connection(Name="Hosola_OmnikBinair", Transport="TCP/IP", Protocol="None", Address=Parameters["Address"], Port=Parameters["Port"])
-        self.connection.Connect()
-    except:
-      self.connection = None
-      self.Log("CheckConnection error, try to reset",1,3)
+  def __init__(self):
+    self.connection = None           # Network connection (supervisor.ConnectionSupervisor)
+    self.outstandingMessages = 0     # Open messages without reply
+    self.maxOutstandingMessages = 0  # lose connection after
+    self.logLevel = 0                # logLevel
+    self.recorder = flightrecorder.FlightRecorder() # recent log events, also the filtered ones
+    self.metrics = metrics.Registry("domoticz_hosola") # readings served by plugincore.metrics
+    self.metrics.Define("temperature_celsius", "gauge", "Inverter temperature")
+    self.metrics.Define("ac_volts", "gauge", "AC voltage per phase")
+    self.metrics.Define("dc_volts", "gauge", "DC voltage per string")
+    self.metrics.Define("power_watts", "gauge", "Output power per phase")
+    self.metrics.Define("energy_watthours", "counter", "Total energy produced")
+    self.deviceCache = None          # write-behind cache for device updates
+    
+    self.totalEnergy = 0.0           # inital values
+    self.inverterId = bytearray()    # request frame, created in onStart
+    self.readBytes = None            # framebuffer.FrameBuffer, allocated in onStart
+    
+    self.errorReported = False
+    self.errorIncorrectStartReported = False
+    self.nofIncorrectMessages = 0
+    self.lastIncorrectStart = datetime.datetime.now()
     
-    return isConnected
+  def createConnection(self):
+    return Domoticz.Connection(Name="Hosola_OmnikBinair", Transport="TCP/IP", Protocol="None", Address=Parameters["Address"], Port=Parameters["Port"])
     
   def onStart(self):
     try:
       self.logLevel = int(Parameters["Mode6"])
     except:
-      self.Log("Debuglevel '"+Parameters["Mode6"]+"' is not an integer",1,3)
+      self.Log("Debuglevel '%s' is not an integer", 1, 3, Parameters["Mode6"])
       
     if self.logLevel == 10:
       Domoticz.Debugging(1)
-    self.Log("onStart called, heartbeat interval " +str(Parameters["Mode3"])+" seconds", 4, 1)  
+    self.Log("onStart called, heartbeat interval %s seconds", 4, 1, Parameters["Mode3"])  
     
     self.maxOutstandingMessages = int(Parameters["Mode2"])
     Domoticz.Heartbeat(int(Parameters["Mode3"])) 
+    # one frame per heartbeat, writes more often than half a heartbeat are merged
+    self.deviceCache = devicecache.DeviceCache(Devices, int(Parameters["Mode3"]) / 2)
+    # the inverter is off at night, reconnects are backed off up to 5 minutes
+    self.connection = supervisor.ConnectionSupervisor(self.createConnection, MinBackoff=int(Parameters["Mode3"]), MaxBackoff=max(300, int(Parameters["Mode3"])), Log=self.Log)
     self.createInverterId()
+    self.readBytes = framebuffer.FrameBuffer(2*self.frameSize)
     
     # add temperature if not exists
     if (1 not in Devices):
@@ -135,7 +171,7 @@ class BasePlugin:
       self.totalEnergy = self.GetTotalEnergy(Devices[7].sValue)
     elif  (10 in Devices):
       self.totalEnergy = self.GetTotalEnergy(Devices[10].sValue)
-    self.Log("Current total energy: "+str(self.totalEnergy), 1, 2)
+    self.Log("Current total energy: %s", 1, 2, self.totalEnergy)
     # id 1= temp
     # id 2= VAC phase 1
     # id 3= VDC phase 1
@@ -154,66 +190,64 @@ class BasePlugin:
 
   def onStop(self):
     self.Log("onStop called", 9, 1)
+    self.Log("Connection %s", 6, 1, self.connection.Summary())
+    self.deviceCache.Flush(True)
     
     return
 
   def onConnect(self, Connection, Status, Description):
+    self.connection.OnConnect(Status)
     if (Status == 0):
-      self.Log("Connected successfully to: "+Connection.Address+":"+Connection.Port, 2, 2)
+      self.Log("Connected successfully to: %s:%s", 2, 2, Connection.Address, Connection.Port)
+      self.outstandingMessages = 0
       self.sendNullValues()
       if self.errorReported:
         self.errorReported = False
     else:
       if not self.errorReported:
-        self.Log("Failed to connect ("+str(Status)+") to: "+Connection.Address+":"+Connection.Port+" with error: "+Description, 2, 2)
+        self.Log("Failed to connect (%s) to: %s:%s with error: %s", 2, 2, Status, Connection.Address, Connection.Port, Description)
         self.errorReported = True
     return
 
   def onMessage(self, Connection, Data):
     self.DumpVariable(Data, "OnMessage Data")
     
-    self.readBytes.extend(Data) 
+    self.readBytes.Extend(Data) 
+    frame = self.readBytes.data
     if len(self.readBytes) > 3:
-      if (self.readBytes[0] != 0x68 or self.readBytes[1] != 0x73 or self.readBytes[2] != 0x41):
+      if (frame[0] != 0x68 or frame[1] != 0x73 or frame[2] != 0x41):
         # incorrect message, purge it
         self.outstandingMessages = self.outstandingMessages - 1
         if not self.errorIncorrectStartReported:
-          self.DumpVariable(self.readBytes, "Incorrect start message purge it", Level = 4)
+          self.DumpVariable(self.readBytes.Bytes(), "Incorrect start message purge it", Level = 4)
           
           self.nofIncorrectMessages = self.nofIncorrectMessages +1
           self.lastIncorrectStart = datetime.datetime.now()
           
-          self.Log("Incorrect message received. Occurrences: "+ str(self.nofIncorrectMessages), 3, 3)
+          self.Log("Incorrect message received. Occurrences: %d", 3, 3, self.nofIncorrectMessages)
           self.errorIncorrectStartReported = True
-        self.readBytes.clear()
+        self.readBytes.Clear()
     
-    if len(self.readBytes) > 155:
+    if len(self.readBytes) >= self.frameSize:
       self.outstandingMessages = self.outstandingMessages - 1
-      if (self.readBytes[154 ]== 0x4F and self.readBytes[155] == 0x4B): 
+      if (frame[154 ]== 0x4F and frame[155] == 0x4B): 
         if self.errorIncorrectStartReported:
           self.errorIncorrectStartReported = False
           endtime = datetime.datetime.now()
-          self.Log("First correct message received, duration: "+ str(endtime-self.lastIncorrectStart), 3, 2)
+          self.Log("First correct message received, duration: %s", 3, 2, endtime-self.lastIncorrectStart)
           
-        vac = []
-        vdc = []
-        pac = []
-        vac.append(self.GetValue(self.readBytes,51,2,10)) # volt
-        vac.append(self.GetValue(self.readBytes,53,2,10))
-        vac.append(self.GetValue(self.readBytes,55,2,10))
-        vdc.append(self.GetValue(self.readBytes,33,2,10)) # Volt
-        vdc.append(self.GetValue(self.readBytes,35,2,10))
-        vdc.append(self.GetValue(self.readBytes,37,2,10))
-        pac.append(self.GetValue(self.readBytes,59,2,1)) # watt
-        pac.append(self.GetValue(self.readBytes,63,2,1))
-        pac.append(self.GetValue(self.readBytes,67,2,1))
+        # start, temperature, VDC 1-3, VAC 1-3, PAC 1-3, total energy, end
+        values = self.frame.Unpack(frame)
+        vdc = [self.GetValue(values[2],10), self.GetValue(values[3],10), self.GetValue(values[4],10)] # Volt
+        vac = [self.GetValue(values[5],10), self.GetValue(values[6],10), self.GetValue(values[7],10)] # volt
+        pac = [self.GetValue(values[8],1), self.GetValue(values[9],1), self.GetValue(values[10],1)] # watt
         
-        temperature = self.GetValue(self.readBytes,31,2,10) #Celcius
-        self.totalEnergy = self.GetValue(self.readBytes,71,4,0.01) # wh 0.01
+        temperature = self.GetValue(values[1],10) #Celcius
+        self.totalEnergy = self.GetValue(values[11],0.01) # wh 0.01
         
         #self.outstandingMessages = self.outstandingMessages - 1
         
-        self.Log("VAC: "+str(vac)+" VDC: "+str(vdc)+" PAC: "+str(pac)+" Total: "+str(self.totalEnergy)+ " Temperature: "+str(temperature), 5, 2)
+        self.Log("VAC: %s VDC: %s PAC: %s Total: %s Temperature: %s", 5, 2, vac, vdc, pac, self.totalEnergy, temperature)
         
         # add / update devices if needed
         for i in range(3):
@@ -234,34 +268,37 @@ class BasePlugin:
             self.UpdateDevice(unt, 0, pac[i], self.totalEnergy)
         
         self.UpdateDevice(1, 0, temperature)
-        self.DumpVariable(self.readBytes, "Correct messsage", Level = 8)
-        self.readBytes.clear()        
+        self.deviceCache.Flush()
+        if self.logLevel >= 8:
+          pluginlog.DumpFrame(self.readBytes.Bytes(), "Correct messsage", self.frameLayout)
+        self.readBytes.Clear()        
         
       else:
-        self.DumpVariable(self.readBytes, "Incorrect messsage", Level = 4)
-        self.readBytes.clear()
+        self.DumpVariable(self.readBytes.Bytes(), "Incorrect messsage", Level = 4)
+        self.readBytes.Clear()
     return
 
   def onCommand(self, Unit, Command, Level, Hue):
-    self.Log("onCommand called for Unit " + str(Unit) + ": Parameter '" + str(Command) + "', Level: " + str(Level)+", Hue: " + str(Hue), 8, 1)
+    self.Log("onCommand called for Unit %s: Parameter '%s', Level: %s, Hue: %s", 8, 1, Unit, Command, Level, Hue)
     
     return
 
   def onNotification(self, Name, Subject, Text, Status, Priority, Sound, ImageFile):
-    self.Log("onNotification: " + Name + "," + Subject + "," + Text + "," + Status + "," + str(Priority) + "," + Sound + "," + ImageFile, 8, 1)
+    self.Log("onNotification: %s,%s,%s,%s,%s,%s,%s", 8, 1, Name, Subject, Text, Status, Priority, Sound, ImageFile)
     
     return
 
   def onDisconnect(self, Connection):
-    self.Log("onDisconnect "+Connection.Address+":"+Connection.Port, 7, 1)
+    self.Log("onDisconnect %s:%s", 7, 1, Connection.Address, Connection.Port)
+    self.connection.OnDisconnect()
 
     return
 
   def onHeartbeat(self):
-    self.Log("onHeartbeat called, open messages: " + str(self.outstandingMessages), 7, 1)
+    self.Log("onHeartbeat called, open messages: %d", 7, 1, self.outstandingMessages)
     
     try:
-      if self.checkConnection(): # checks if connect if not retry
+      if self.connection.Check(): # checks if connect if not retry (after backoff)
         if self.outstandingMessages > self.maxOutstandingMessages:
           self.sendNullValues()
           self.connection.Disconnect()
@@ -271,8 +308,9 @@ class BasePlugin:
             if self.outstandingMessages == 1:
               self.connection.Send(self.inverterId)
     except Exception as e:
-      self.Log("OnHeartbeat Error: "+ str(e), 1, 3 )
+      self.Log("OnHeartbeat Error: %s", 1, 3, e)
     
+    self.deviceCache.Flush()
     return
 
 ####################### Specific helper functions for plugin #######################    
@@ -280,15 +318,9 @@ class BasePlugin:
     self.inverterId.clear()
     try:
       intserial = int(Parameters["Mode1"])
-      cs = 115;  # offset, not found any explanation sofar for this offset
-
       # convert to byte array,
       bytesserial = intserial.to_bytes(((intserial.bit_length() + 7) // 8), byteorder='little')
 
-      # create checksum
-      for idx in range(0,len(bytesserial), 1):
-        cs = cs + 2 * bytesserial[idx]
-
       # build indentifier
       self.inverterId.append(0x68)
       self.inverterId.append(0x02)
@@ -298,13 +330,13 @@ class BasePlugin:
       self.inverterId.extend(bytesserial)
       self.inverterId.append(0x01)
       self.inverterId.append(0x00)
-      self.inverterId.append(cs & 0xFF)
+      self.inverterId.append(codec.Sum8(self.inverterId, 1)) # checksum, sum of all but the first byte (the old offset 115 = 0x02+0x40+0x30+0x01)
       self.inverterId.append(0x16)  
 
       self.DumpVariable(self.inverterId, "Inverter ID")
       
     except:
-      self.Log(Parameters["Mode1"]+" is not a valid serial number!", 1,3)
+      self.Log("%s is not a valid serial number!", 1, 3, Parameters["Mode1"])
   
   def sendNullValues(self):
     # id 1= temp
@@ -334,26 +366,17 @@ class BasePlugin:
     try:
       returnValue = float(str(sValue).split(';')[1])
     except:
-      self.Log("could not convert "+str(sValue), 1,3)
+      self.Log("could not convert %s", 1, 3, sValue)
       pass
     return returnValue
   
-  def GetValue(self, bytes, start, length, divider):
-    returnValue = 0.0
-    try:
-      value = int.from_bytes(bytes[start:(start+length)], byteorder='big')
-      if value == 0:
-        returnValue = 0
-      elif divider != 1:
-        returnValue = value / divider
-      else:
-        returnValue = value
-        
-      self.DumpVariable(bytes[start:(start+length)], "Start: "+str(start)+" length: "+str(length)+" val: "+str(returnValue)+"("+str(value)+") bytes", Level = 9)
-    except Exception as e:
-      self.DumpVariable(bytes, "Could get value at idx: "+str(start)+" length: "+str(length)+" Error: "+ str(e)+" from", Level = -1)
-    
-    return returnValue
+  def GetValue(self, value, divider):
+    # raw frame value to device value, 0 stays an integer
+    if value == 0:
+      return 0
+    elif divider != 1:
+      return value / divider
+    return value
   
 ####################### Generic helper member functions for plugin ####################### 
   def StringToMinutes(self, value):
@@ -366,6 +389,15 @@ class BasePlugin:
     return minutes  
    
   def UpdateDevice(self, Unit, nValue, sValue1, sValue2 = None):
+    if Unit in self.unitMetrics:
+      name, phase = self.unitMetrics[Unit]
+      if phase is None:
+        self.metrics.Set(name, sValue1)
+      else:
+        self.metrics.Set(name, sValue1, phase=phase)
+      if sValue2 is not None:
+        self.metrics.Set("energy_watthours", sValue2)
+        
     # Make sure that the Domoticz device still exists (they can be deleted) before updating it 
     if (Unit in Devices):
       if sValue2 is None:
@@ -374,79 +406,28 @@ class BasePlugin:
         sValue = str(sValue1)+";"+str(sValue2)
         
       if (Devices[Unit].nValue != nValue) or (Devices[Unit].sValue != sValue):
-        self.Log("Update ["+Devices[Unit].Name+"] from: ('"+str(Devices[Unit].nValue)+":'"+str(Devices[Unit].sValue )+"') to: ("+str(nValue)+":'"+str(sValue)+"')", 5, 1)
-        Devices[Unit].Update(nValue, sValue)
+        self.Log("Update [%s] from: ('%s:'%s') to: (%s:'%s')", 5, 1, Devices[Unit].Name, Devices[Unit].nValue, Devices[Unit].sValue, nValue, sValue)
+      self.deviceCache.Update(Unit, nValue, sValue) # written by deviceCache.Flush()
     return
    
-  def DumpDeviceToLog(self,Unit):
-    self.Log(str(Devices[Unit].ID)+":"+Devices[Unit].Name+", (n:"+str(Devices[Unit].nValue)+", s:"+Devices[Unit].sValue+", Sgl:"+str(Devices[Unit].SignalLevel)+", bl:"+str(Devices[Unit].BatteryLevel)+", img:"+ str(Devices[Unit].Image)+", typ:"+ str(Devices[Unit].Type)+", styp:"+ str(Devices[Unit].SubType)+")", 6, 1)
-    return   
-    
   def DumpConfigToLog(self):
-    for x in Parameters:
-      if Parameters[x] != "":
-        self.Log( "'" + x + "':'" + str(Parameters[x]) + "'", 7, 1)
-    self.Log("Device count: " + str(len(Devices)), 6, 1)
-    for x in Devices:
-      self.DumpDeviceToLog(x)
+    pluginlog.DumpConfigToLog(Parameters, Devices, self.logLevel)
     return
     
   def DumpVariable(self, Item, Varname, Level = 5, BytesAsStr = False, Prefix=""):
+    self.recorder.RecordData(Varname, Item)
     if self.logLevel >= Level:
-      Prefix = str(Prefix)
-      if isinstance(Item, dict):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        for b in Item:
-          if isinstance(b, str):
-            self.DumpVariable( Item[b], "'"+str(b) + "'", Level, BytesAsStr, Prefix)
-          else:
-            self.DumpVariable( Item[b], str(b), Level, BytesAsStr, Prefix)
-         
-      elif isinstance(Item, (bytes, bytearray)):
-        if BytesAsStr:
-          txt = escape(Item.decode("utf-8", "ignore"))
-        else:
-          txt = "[ " 
-          for b in Item:
-            txt += '0x{:02X} '.format(b)
-          txt +=  "]"
-        
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): " + txt, Level, 1)
-      elif isinstance(Item, (tuple, list)):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        idx = 0
-        for b in Item:
-          self.DumpVariable( b, "["+str(idx) + "]", Level, BytesAsStr, Prefix)
-          idx=idx+1
-
-      elif isinstance(Item, str):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): '"+Item+"'", Level, 1)
-      else:
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"): "+str(Item), Level, 1)
-           
+      pluginlog.DumpVariable(Item, Varname, BytesAsStr, Prefix)
     return
 
-  def Log(self, Message, Level, Type):
-    # Message = string, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+  def Log(self, Message, Level, Type, *Args):
+    # Message = string, format string with Args or callable, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+    # Message is only formatted when Level is not filtered out, the flight recorder keeps it unformatted
+    self.recorder.Record(Message, Args)
     if self.logLevel >= Level:
-      if Type == 2:
-        Domoticz.Status(Message)
-      elif Type == 3:
-        Domoticz.Error(Message)
-      else:
-        Domoticz.Log(Message)
+      pluginlog.Write(Message, Type, Args)
+    if Type == 3:
+      self.recorder.Dump("error", Written=self.logLevel >= Level) # a short tail when the error is filtered out
     
     return
     
@@ -492,3 +473,17 @@ def onHeartbeat():
   global _plugin
   _plugin.onHeartbeat()
 
+# opt-in push button for a flight recorder dump, see plugincore/flightrecorder.py
+_recorderButton = flightrecorder.Instrument(globals())
+
+# opt-in profiling of the callbacks, see plugincore/profiler.py
+_profiler = profiler.Instrument(globals())
+
+# opt-in recording of the received data, see plugincore/capture.py
+_capture = capture.Instrument(globals())
+
+# latency histograms of the callbacks above, see plugincore/callbackstats.py
+_stats = callbackstats.Instrument(globals())
+
+# opt-in OpenMetrics endpoint of the readings and counters, see plugincore/metrics.py
+_metrics = metrics.Instrument(globals())
@@ -10,9 +10,22 @@
 # 1.0.3   20-06-2018  Solved issue with max open messages
 # 1.0.4   06-08-2018  Update logging
 # 1.1.0   18-11-2018  Changed to RGB colorpicker, updated icon
+# 1.1.1   18-10-2026  Lazy log formatting via plugincore
+# 1.1.2   18-10-2026  Callback latency histograms via plugincore.callbackstats
+# 1.1.3   18-10-2026  Opt-in capture of received data via plugincore.capture
+# 1.1.4   18-10-2026  Reconnect with exponential backoff via plugincore.supervisor
+# 1.1.5   18-10-2026  Warm start state via plugincore.snapshot
+# 1.1.6   18-10-2026  Per instance state (__slots__), preallocated receive buffer
+# 1.1.7   18-10-2026  Flight recorder of recent log events, dumped on errors
+# 1.1.8   18-10-2026  OpenMetrics endpoint via plugincore.metrics
+# 1.1.9   18-10-2026  Profiling mode via plugincore.profiler
+# 1.1.10  18-10-2026  Errors dump the flight recorder at every debug level, optional dump push button
+# 1.1.11  18-10-2026  Restored state stays stale until the device confirms it
+# 1.1.12  18-10-2026  Removed unused html import, remaining log messages formatted lazily
+# 1.1.13  18-10-2026  Errors filtered out by the debug level dump only the last 16 flight recorder events
 
 """
-<plugin key="Hyperion" name="Hyperion" author="elgringo" version="1.0.4" externallink="https://github.com/ericstaal/domoticz/blob/master/">
+<plugin key="Hyperion" name="Hyperion" author="elgringo" version="1.1.13" externallink="https://github.com/ericstaal/domoticz/blob/master/">
   <params>
     <param field="Address" label="IP Address" width="200px" required="true" default="192.168.13.9"/>
     <param field="Port" label="Port" width="40px" required="true" default="19444"/>
@@ -48,7 +61,20 @@ import Domoticz
 import collections 
 import base64
 import binascii
-from html import escape
+
+# shared helpers (plugin/plugincore)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from plugincore import pluginlog
+from plugincore import callbackstats
+from plugincore import capture
+from plugincore import supervisor
+from plugincore import snapshot
+from plugincore import framebuffer
+from plugincore import flightrecorder
+from plugincore import metrics
+from plugincore import profiler
 
 # additional imports
 import json
@@ -58,48 +84,48 @@ import time
 
 
 class BasePlugin:
+  # state per instance, no shared class level dictionaries / buffers
+  __slots__ = ("connection", "outstandingMessages", "maxOutstandingMessages", "logLevel", "snapshot", "readata", "SourceOptions", "selectorMap", "effectFileMap",
+               "priority", "currentColor", "dimmerValues", "masterLevel", "errorReported", "recorder", "metrics")
   
-  connection = None           # Network connection
-  outstandingMessages = 0     # Open messages without reply
-  maxOutstandingMessages = 0  # lose connection after
-  logLevel = 0                # logLevel
-  
-  readata = bytearray()       # history
-  SourceOptions = {}
-  selectorMap = {}
-  effectFileMap = {}
-  
-  priority = 1                # priority channel
-  currentColor = [0,0,0]      # RGB
+  maxMessageSize = 65536      # serverinfo with all effects
   
-  dimmerValues = [0,0,0]      # values of sliders
-  masterLevel = 0 
-  errorReported = False
-
-  def checkConnection(self, checkonly = False):
-    # Check connection and connect none
-    isConnected = False
+  def __init__(self):
+    self.connection = None           # Network connection (supervisor.ConnectionSupervisor)
+    self.outstandingMessages = 0     # Open messages without reply
+    self.maxOutstandingMessages = 0  # lose connection after
+    self.logLevel = 0                # logLevel
+    self.recorder = flightrecorder.FlightRecorder() # recent log events, also the filtered ones
+    self.metrics = metrics.Registry("domoticz_hyperion") # readings served by plugincore.metrics
+    self.metrics.Define("color", "gauge", "Active led color 0..255")
+    self.metrics.Define("level_percent", "gauge", "Master brightness")
+    self.snapshot = None             # warm start state
     
-    if not self.connection is None:
-      if self.connection.Connected():
-        isConnected = True
-      else:
-        if (not self.connection.Connecting()) and (not checkonly):
-          self.outstandingMessages = 0
-          self.connection.Connect()
+    self.readata = None              # incomplete json message, framebuffer.FrameBuffer allocated in onStart
+    self.SourceOptions = {}
+    self.selectorMap = {}
+    self.effectFileMap = {}
     
-    return isConnected
+    self.priority = 1                # priority channel
+    self.currentColor = [0,0,0]      # RGB
+    
+    self.dimmerValues = [0,0,0]      # values of sliders
+    self.masterLevel = 0 
+    self.errorReported = False
+
+  def createConnection(self):
+    return Domoticz.Connection(Name="Hyperion", Transport="TCP/IP", Protocol="None", Address=Parameters["Address"], Port=Parameters["Port"])
     
   def onStart(self):
     try:
       self.logLevel = int(Parameters["Mode6"])
     except:
-      self.Log("Debuglevel '"+Parameters["Mode6"]+"' is not an integer",1,3)
+      self.Log("Debuglevel '%s' is not an integer", 1, 3, Parameters["Mode6"])
       
     try:
       self.maxOutstandingMessages = int(Parameters["Mode5"])
     except:
-      self.Log("max open messages '"+Parameters["Mode5"]+"' is not an integer",1,3)
+      self.Log("max open messages '%s' is not an integer", 1, 3, Parameters["Mode5"])
       
     if self.logLevel == 10:
       Domoticz.Debugging(1)
@@ -109,30 +135,38 @@ class BasePlugin:
     try:
       self.priority = int(Parameters["Mode1"])
       if self.priority<0:
-        self.Log("Priority is smaller than 0 ("+Parameters["Mode1"]+") this is not allowed, using 1 as priority",1,3)
+        self.Log("Priority is smaller than 0 (%s) this is not allowed, using 1 as priority", 1, 3, Parameters["Mode1"])
         self.priority = 1
     except:
-      self.Log("Priority '"+Parameters["Mode1"]+"' is not an integer, using 1 as priority",1,3)
+      self.Log("Priority '%s' is not an integer, using 1 as priority", 1, 3, Parameters["Mode1"])
       
     self.Log("onStart called", 9, 1)
-    self.connection = Domoticz.Connection(Name="Hyperion", Transport="TCP/IP", Protocol="None", Address=Parameters["Address"], Port=Parameters["Port"])
+    # reconnects are backed off up to 5 minutes while hyperion is not running
+    self.connection = supervisor.ConnectionSupervisor(self.createConnection, MinBackoff=20, MaxBackoff=300, Log=self.Log)
       
     # ICONS
     if ("HyperionMode" not in Images): Domoticz.Image('HyperionMode.zip').Create()
 
+    self.readata = framebuffer.FrameBuffer(self.maxMessageSize)
+    
+    # warm start: effects of the last serverinfo and the colors, stale until hyperion reports them
+    self.snapshot = snapshot.Snapshot(snapshot.FileName(Parameters))
+    restored = self.snapshot.Load()
+    if restored:
+      self.SourceOptions = self.snapshot.Get("SourceOptions", self.SourceOptions)
+      self.selectorMap = dict((int(key), value) for key, value in self.snapshot.Get("selectorMap", {}).items())
+      self.effectFileMap = self.snapshot.Get("effectFileMap", self.effectFileMap)
+      self.currentColor = self.snapshot.Get("currentColor", self.currentColor)
+      self.dimmerValues = self.snapshot.Get("dimmerValues", self.dimmerValues)
+      self.masterLevel = self.snapshot.Get("masterLevel", self.masterLevel)
+      self.Log("Restored state: %d effects, color %s", 4, 1, len(self.effectFileMap), self.currentColor)
+
     if (1 not in Devices):
       Domoticz.Device(Name="RGB Light", Unit=1, Type=241, Subtype=2,  Switchtype=7).Create()
-    else:
-      try:
-        jsoncolor = json.loads(Devices[1].Color)
-        self.dimmerValues[0] = jsoncolor['r']
-        self.dimmerValues[1] = jsoncolor['g']
-        self.dimmerValues[2] = jsoncolor['b']
-        self.masterLevel = int(Devices[1].sValue)
-      except:
-        self.Log("failed to parse color:'"+Devices[1].Color+"' or sValue:'"+Devices[1].sValue+"' for level", 1, 3)
+    elif not restored:
+      self.readDeviceColor()
     
-    self.Log("Started current status: " + str(self.currentColor) + " dimmer values: " + str(self.dimmerValues), 2, 2)
+    self.Log("Started current status: %s dimmer values: %s", 2, 2, self.currentColor, self.dimmerValues)
     
     self.DumpConfigToLog()
     
@@ -140,18 +174,22 @@ class BasePlugin:
 
   def onStop(self):
     self.Log("onStop called", 9, 1)
+    self.Log("Connection %s", 6, 1, self.connection.Summary())
+    self.snapshot.Save(True)
     
     return
 
   def onConnect(self, Connection, Status, Description):
+    self.connection.OnConnect(Status)
     if (Status == 0):
-      self.Log("Connected successfully to: "+Connection.Address+":"+Connection.Port, 3, 2)
+      self.Log("Connected successfully to: %s:%s", 3, 2, Connection.Address, Connection.Port)
+      self.outstandingMessages = 0
       self.sendMessage({'command' : 'serverinfo'})
       self.errorReported = False
     else:
       if not self.errorReported:
         self.errorReported = True
-        self.Log("Failed to connect ("+str(Status)+") to: "+Connection.Address+":"+Connection.Port+" with error: "+Description, 3,2)
+        self.Log("Failed to connect (%s) to: %s:%s with error: %s", 3, 2, Status, Connection.Address, Connection.Port, Description)
 
     return
 
@@ -183,12 +221,15 @@ class BasePlugin:
   def onMessage(self, Connection, Data):
     self.DumpVariable(Data, "OnMessage Data", Level = 9, BytesAsStr = True)
 
-    self.readata.extend(Data)
+    if not self.readata.Extend(Data):
+      self.Log("Message larger than %d bytes discarded", 1, 3, self.maxMessageSize)
+      self.readata.Clear()
+      return
     dataparsed = None
     try:
-      decoded_response = self.readata.decode("utf-8")
+      decoded_response = str(self.readata.View(), "utf-8")
       dataparsed = json.loads(decoded_response)
-      self.readata.clear()
+      self.readata.Clear()
     except:
       pass # happens when json message is incomplete
    
@@ -221,6 +262,10 @@ class BasePlugin:
           self.selectorMap[dictValue] = item
           dictValue = dictValue + 10
         self.DumpVariable(self.selectorMap, "SelectorMap", Level = 7, BytesAsStr = True)
+        self.snapshot.Set("SourceOptions", self.SourceOptions)
+        self.snapshot.Set("selectorMap", dict((str(key), value) for key, value in self.selectorMap.items()))
+        self.snapshot.Set("effectFileMap", self.effectFileMap)
+        self.snapshot.Confirm("SourceOptions", "selectorMap", "effectFileMap")
                
         if (2 in Devices):
           if Devices[2].Options != self.SourceOptions:
@@ -243,6 +288,8 @@ class BasePlugin:
             self.currentColor[0] = tmpdata["RGB Value"][0]
             self.currentColor[1] = tmpdata["RGB Value"][1]
             self.currentColor[2] = tmpdata["RGB Value"][2]
+            self.snapshot.Set("currentColor", self.currentColor)
+            self.snapshot.Confirm("currentColor")
             update = True
      
       # actual effect:
@@ -257,7 +304,7 @@ class BasePlugin:
           effectactive = tmpdata["script"]
           
           for key, val in self.selectorMap.items():
-            self.Log(str(key)+": "+str(val)+" => looking for "+ str(effectactive), 8, 1)
+            self.Log("%s: %s => looking for %s", 8, 1, key, val, effectactive)
             if (val == effectactive):
               Value = key
               update = True
@@ -267,6 +314,16 @@ class BasePlugin:
       self.Log("Hyperion settings changed updating Domoticz", 4, 1)
       self.updateFromDeviceStatus()
       self.UpdateDevices(Value)
+      self.snapshot.Set("dimmerValues", self.dimmerValues)
+      self.snapshot.Set("masterLevel", self.masterLevel)
+      self.snapshot.Confirm("dimmerValues", "masterLevel")
+      self.updateMetrics()
+    return
+
+  def updateMetrics(self):
+    for i, color in enumerate(("red", "green", "blue")):
+      self.metrics.Set("color", self.currentColor[i], color=color)
+    self.metrics.Set("level_percent", self.masterLevel)
     return
 
   def sendMessage(self, jsonData):
@@ -274,17 +331,21 @@ class BasePlugin:
 
     data = json.dumps(jsonData, sort_keys=True)
     data = data+ '''\n'''
-    if self.checkConnection():
+    if self.connection.Kick(): # a command retries the connection without waiting for the backoff
       self.connection.Send(data)
     return
   
   def onCommand(self, Unit, Command, Level, Hue):
     CommandStr = str(Command)
-    self.Log("onCommand called for Unit " + str(Unit) + ": Parameter '" + CommandStr + "', Level: " + str(Level)+", Hue: " + str(Hue), 6, 1)
+    self.Log("onCommand called for Unit %s: Parameter '%s', Level: %s, Hue: %s", 6, 1, Unit, Command, Level, Hue)
     
     updateLevel = Level
     
     if Unit == 2: # mode
+      if Level > 10 and CommandStr != "Off" and self.snapshot.IsStale("selectorMap"):
+        # the effects of the last run, hyperion did not report its effects yet
+        self.Log("Effect %d ignored, effects not yet received from hyperion", 2, 2, Level)
+        return
       if ( CommandStr == "Off") or (Level == 0):
         updateLevel = 0
       elif (Level == 10):
@@ -303,6 +364,8 @@ class BasePlugin:
         self.dimmerValues[1] = jsoncolor['g']
         self.dimmerValues[2] = jsoncolor['b']
       elif ( CommandStr == "Set Level" ):
+        if self.snapshot.IsStale("dimmerValues"):
+          self.readDeviceColor()      # the color of the last run, hyperion did not report a color yet
         self.masterLevel = Level
         if (Level == 0):
           setcoloroff = True
@@ -321,6 +384,10 @@ class BasePlugin:
         self.sendMessage({"command" : "color", "color": self.currentColor, "priority": self.priority})
 
     self.UpdateDevices(updateLevel)
+    self.snapshot.Set("currentColor", self.currentColor)
+    self.snapshot.Set("dimmerValues", self.dimmerValues)
+    self.snapshot.Set("masterLevel", self.masterLevel)
+    self.updateMetrics()
     if updateLevel <= 0:
       #self.sendMessage({"command" : "clearall"})
       self.sendMessage({"command" : "clear", "priority" : self.priority})
@@ -328,18 +395,20 @@ class BasePlugin:
     return
   
   def onNotification(self, Name, Subject, Text, Status, Priority, Sound, ImageFile):
-    self.Log("onNotification: " + Name + "," + Subject + "," + Text + "," + Status + "," + str(Priority) + "," + Sound + "," + ImageFile, 8, 1)
+    self.Log("onNotification: %s,%s,%s,%s,%s,%s,%s", 8, 1, Name, Subject, Text, Status, Priority, Sound, ImageFile)
     
     return
 
   def onDisconnect(self, Connection):
-    self.Log("onDisconnect "+Connection.Address+":"+Connection.Port, 7, 2)
+    self.Log("onDisconnect %s:%s", 7, 2, Connection.Address, Connection.Port)
+    self.connection.OnDisconnect()
 
     return
 
   def onHeartbeat(self):
-    self.Log("onHeartbeat called, open messages: " + str(self.outstandingMessages), 9, 1)
-    self.checkConnection()
+    self.Log("onHeartbeat called, open messages: %d", 9, 1, self.outstandingMessages)
+    self.connection.Check()
+    self.snapshot.Save()
 
     return
 
@@ -354,6 +423,17 @@ class BasePlugin:
     else:
       return int(round(val/100))
       
+  def readDeviceColor(self):
+    try:
+      jsoncolor = json.loads(Devices[1].Color)
+      self.dimmerValues[0] = jsoncolor['r']
+      self.dimmerValues[1] = jsoncolor['g']
+      self.dimmerValues[2] = jsoncolor['b']
+      self.masterLevel = int(Devices[1].sValue)
+    except:
+      self.Log("failed to parse color:'%s' or sValue:'%s' for level", 1, 3, Devices[1].Color, Devices[1].sValue)
+    return
+    
   def updateFromDeviceStatus(self):
     self.dimmerValues[0] = self.currentColor[0]
     self.dimmerValues[1] = self.currentColor[1]
@@ -377,7 +457,7 @@ class BasePlugin:
   def UpdateRGBDevice(self, Unit, n_Value, s_Value, color):
     # Make sure that the Domoticz device still exists (they can be deleted) before updating it 
     if (Unit in Devices):
-      self.Log("Update ["+Devices[Unit].Name+"] from: ('"+str(Devices[Unit].nValue)+":'"+str(Devices[Unit].sValue )+"':"+str(Devices[Unit].Color )+"') to: ("+str(n_Value)+":'"+str(s_Value)+"':"+str(color )+"') ", 5, 1)
+      self.Log("Update [%s] from: ('%s:'%s':%s') to: (%s:'%s':%s') ", 5, 1, Devices[Unit].Name, Devices[Unit].nValue, Devices[Unit].sValue, Devices[Unit].Color, n_Value, s_Value, color)
       Devices[Unit].Update(nValue=n_Value, sValue=str(s_Value), Color=color)
     return
     
@@ -390,79 +470,28 @@ class BasePlugin:
         s_Value = str(sValue1)+";"+str(sValue2)
         
       if (Devices[Unit].nValue != n_Value) or (Devices[Unit].sValue != s_Value):
-        self.Log("Update ["+Devices[Unit].Name+"] from: ('"+str(Devices[Unit].nValue)+":'"+str(Devices[Unit].sValue )+"') to: ("+str(n_Value)+":'"+str(s_Value)+"')", 5, 1)
+        self.Log("Update [%s] from: ('%s:'%s') to: (%s:'%s')", 5, 1, Devices[Unit].Name, Devices[Unit].nValue, Devices[Unit].sValue, n_Value, s_Value)
         Devices[Unit].Update(nValue=n_Value, sValue=s_Value)
     return
    
-  def DumpDeviceToLog(self,Unit):
-    self.Log(str(Devices[Unit].ID)+":"+Devices[Unit].Name+", (n:"+str(Devices[Unit].nValue)+", s:"+Devices[Unit].sValue+", Sgl:"+str(Devices[Unit].SignalLevel)+", bl:"+str(Devices[Unit].BatteryLevel)+", img:"+ str(Devices[Unit].Image)+", typ:"+ str(Devices[Unit].Type)+", styp:"+ str(Devices[Unit].SubType)+")", 6, 1)
-    return   
-    
   def DumpConfigToLog(self):
-    for x in Parameters:
-      if Parameters[x] != "":
-        self.Log( "'" + x + "':'" + str(Parameters[x]) + "'", 7, 1)
-    self.Log("Device count: " + str(len(Devices)), 6, 1)
-    for x in Devices:
-      self.DumpDeviceToLog(x)
+    pluginlog.DumpConfigToLog(Parameters, Devices, self.logLevel)
     return
     
   def DumpVariable(self, Item, Varname, Level = 5, BytesAsStr = False, Prefix=""):
+    self.recorder.RecordData(Varname, Item)
     if self.logLevel >= Level:
-      Prefix = str(Prefix)
-      if isinstance(Item, dict):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        for b in Item:
-          if isinstance(b, str):
-            self.DumpVariable( Item[b], "'"+str(b) + "'", Level, BytesAsStr, Prefix)
-          else:
-            self.DumpVariable( Item[b], str(b), Level, BytesAsStr, Prefix)
-         
-      elif isinstance(Item, (bytes, bytearray)):
-        if BytesAsStr:
-          txt = escape(Item.decode("utf-8", "ignore"))
-        else:
-          txt = "[ " 
-          for b in Item:
-            txt += '0x{:02X} '.format(b)
-          txt +=  "]"
-        
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): " + txt, Level, 1)
-      elif isinstance(Item, (tuple, list)):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        idx = 0
-        for b in Item:
-          self.DumpVariable( b, "["+str(idx) + "]", Level, BytesAsStr, Prefix)
-          idx=idx+1
-
-      elif isinstance(Item, str):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): '"+Item+"'", Level, 1)
-      else:
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"): "+str(Item), Level, 1)
-           
+      pluginlog.DumpVariable(Item, Varname, BytesAsStr, Prefix)
     return
 
-  def Log(self, Message, Level, Type):
-    # Message = string, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+  def Log(self, Message, Level, Type, *Args):
+    # Message = string, format string with Args or callable, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+    # Message is only formatted when Level is not filtered out, the flight recorder keeps it unformatted
+    self.recorder.Record(Message, Args)
     if self.logLevel >= Level:
-      if Type == 2:
-        Domoticz.Status(Message)
-      elif Type == 3:
-        Domoticz.Error(Message)
-      else:
-        Domoticz.Log(Message)
+      pluginlog.Write(Message, Type, Args)
+    if Type == 3:
+      self.recorder.Dump("error", Written=self.logLevel >= Level) # a short tail when the error is filtered out
     
     return
     
@@ -508,3 +537,17 @@ def onHeartbeat():
   global _plugin
   _plugin.onHeartbeat()
 
+# opt-in push button for a flight recorder dump, see plugincore/flightrecorder.py
+_recorderButton = flightrecorder.Instrument(globals())
+
+# opt-in profiling of the callbacks, see plugincore/profiler.py
+_profiler = profiler.Instrument(globals())
+
+# opt-in recording of the received data, see plugincore/capture.py
+_capture = capture.Instrument(globals())
+
+# latency histograms of the callbacks above, see plugincore/callbackstats.py
+_stats = callbackstats.Instrument(globals())
+
+# opt-in OpenMetrics endpoint of the readings and counters, see plugincore/metrics.py
+_metrics = metrics.Instrument(globals())
@@ -17,10 +17,25 @@
 # 1.0.5   06-08-2018  Update logging
 # 2.0.0   13-11-2018  Changed to RGBW colorpicker, added modes, updated icons
 # 2.0.1   09-12-2018  Updated bug with speed change and custom mode
+# 2.0.2   18-10-2026  Lazy log formatting via plugincore
+# 2.0.3   18-10-2026  Offset annotated frame dump
+# 2.0.4   18-10-2026  Callback latency histograms via plugincore.callbackstats
+# 2.0.5   18-10-2026  Opt-in capture of received data via plugincore.capture
+# 2.0.6   18-10-2026  Reconnect with exponential backoff via plugincore.supervisor
+# 2.0.7   18-10-2026  Warm start state via plugincore.snapshot
+# 2.0.8   18-10-2026  Per instance state (__slots__), preallocated receive buffer
+# 2.0.9   18-10-2026  Flight recorder of recent log events, dumped on errors
+# 2.0.10  18-10-2026  Frame layouts via plugincore.codec
+# 2.0.11  18-10-2026  OpenMetrics endpoint via plugincore.metrics
+# 2.0.12  18-10-2026  Profiling mode via plugincore.profiler
+# 2.0.13  18-10-2026  Errors dump the flight recorder at every debug level, optional dump push button
+# 2.0.14  18-10-2026  Restored state stays stale until the device confirms it
+# 2.0.15  18-10-2026  Removed unused html import, remaining log messages formatted lazily
+# 2.0.16  18-10-2026  Errors filtered out by the debug level dump only the last 16 flight recorder events
 
 
 """
-<plugin key="Ledenet" name="LedeNet" author="elgringo" version="2.0.1" externallink="https://github.com/ericstaal/domoticz/blob/master/">
+<plugin key="Ledenet" name="LedeNet" author="elgringo" version="2.0.16" externallink="https://github.com/ericstaal/domoticz/blob/master/">
   <params>
     <param field="Address" label="IP Address" width="200px" required="true" default="192.168.13.80"/>
     <param field="Port" label="Port" width="30px" required="true" default="5577"/>
@@ -59,7 +74,21 @@ import Domoticz
 import collections 
 import base64
 import binascii
-from html import escape
+
+# shared helpers (plugin/plugincore)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from plugincore import pluginlog
+from plugincore import callbackstats
+from plugincore import capture
+from plugincore import supervisor
+from plugincore import snapshot
+from plugincore import framebuffer
+from plugincore import flightrecorder
+from plugincore import metrics
+from plugincore import profiler
+from plugincore import codec
 
 # additional imports
 from datetime import datetime, timedelta
@@ -69,59 +98,62 @@ import json
 import re
 
 class BasePlugin:
-  
-  connection = None           # Network connection
-  outstandingMessages = 0     # Open messages without reply
-  maxOutstandingMessages = 0  # lose connection after
-  logLevel = 0                # logLevel
+  # state per instance, no shared class level lists / buffers
+  __slots__ = ("connection", "outstandingMessages", "maxOutstandingMessages", "logLevel", "snapshot", "currentStatus", "requestedStatus", "currentmode", "currentspeed",
+               "mode", "masterLevel", "dimmerValues", "power", "autospeed", "automode", "custommodechanged", "selectorMap", "mustSendUpdate", "readata", "skipStatus", "recorder", "metrics")
   
   commandOn = b'\x71\x23\x0F\xA3'
   commandOff = b'\x71\x24\x0F\xA4'
   commandStatus = b'\x81\x8A\x8B\x96'
+  # frames, the last byte is the sum of the other bytes
+  statusFrame = codec.Frame(">", ((0,"B","head"), (1,"B","type"), (2,"B","power"), (3,"B","mode"), (4,"B","run"), (5,"B","speed"), (6,"B","red"), (7,"B","green"), (8,"B","blue"),
+                                  (9,"B","white"), (10,"B","version"), (11,"2s","reserved")), Checksum=codec.Sum8)
+  colorFrame = codec.Frame(">", ((0,"B","head"), (1,"B","red"), (2,"B","green"), (3,"B","blue"), (4,"B","white"), (5,"B","reserved"), (6,"B","terminator")), Checksum=codec.Sum8)
+  modeFrame = codec.Frame(">", ((0,"B","head"), (1,"B","mode"), (2,"B","speed"), (3,"B","terminator")), Checksum=codec.Sum8)
+  customFrame = codec.Frame(">", ((0,"B","head"), (1,"64s","colors"), (65,"B","speed"), (66,"B","transition"), (67,"B","reserved"), (68,"B","terminator")), Checksum=codec.Sum8)
+  statusSize = statusFrame.size          # 14
+  statusLayout = statusFrame.Layout
   
-  currentStatus = [False,0,0,0,0]        # 0 = True/False (on/off), 1=Red, 2=Green, 3=Blue, 4=white, Status from the lightOn
-  currentmode = 0x61                     # current mode static|or... are real modues
-  currentspeed = 0                       # 0x1-0x1f
-  
-  mode = 0                               # from rgb picker
-  masterLevel = 0                        # from rgb picker, master brightness (svalue)
-  dimmerValues = [0,0,0,0]               # RGBW values from control, used to determine requestedstatus
-  power = False                          # from rgb picker,
-  autospeed = 1                          # auto mode speed [1-100%] 
-  automode = 0                           # auto mode, real mode or 1 2,3,4 for custom mode
-  custommodechanged = False
-  selectorMap = {}
-  
-  mustSendUpdate = False    # if the domotica values has been changed but not yet updated to the ledenet (connection problems)
+  def __init__(self):
+    self.connection = None           # Network connection (supervisor.ConnectionSupervisor)
+    self.outstandingMessages = 0     # Open messages without reply
+    self.maxOutstandingMessages = 0  # lose connection after
+    self.logLevel = 0                # logLevel
+    self.recorder = flightrecorder.FlightRecorder() # recent log events, also the filtered ones
+    self.metrics = metrics.Registry("domoticz_ledenet") # readings served by plugincore.metrics
+    self.metrics.Define("power", "gauge", "1 when the controller is on")
+    self.metrics.Define("channel", "gauge", "Channel value 0..255")
+    self.metrics.Define("level_percent", "gauge", "Master brightness")
+    self.metrics.Define("mode", "gauge", "Controller mode")
+    self.snapshot = None             # warm start state
     
-  readata = bytearray()         # history
-  skipStatus = False            # when written skip next status since it can be previous value
-
-  def checkConnection(self, checkonly = False):
-    # Check connection and connect none
-    isConnected = False
+    self.currentStatus = [False,0,0,0,0]   # 0 = True/False (on/off), 1=Red, 2=Green, 3=Blue, 4=white, Status from the lightOn
+    self.requestedStatus = None
+    self.currentmode = 0x61                # current mode static|or... are real modues
+    self.currentspeed = 0                  # 0x1-0x1f
     
-    try:
-      if not self.connection is None:
-        if self.connection.Connected():
-          isConnected = True
-        else:
-          if (not self.connection.Connecting()) and (not checkonly):
-            self.outstandingMessages = 0
-            self.connection.Connect()
-          
-    except:
-      self.connection = None
-      self.Log("CheckConnection error, try to reset", 1, 3)
-
+    self.mode = 0                          # from rgb picker
+    self.masterLevel = 0                   # from rgb picker, master brightness (svalue)
+    self.dimmerValues = [0,0,0,0]          # RGBW values from control, used to determine requestedstatus
+    self.power = False                     # from rgb picker,
+    self.autospeed = 1                     # auto mode speed [1-100%] 
+    self.automode = 0                      # auto mode, real mode or 1 2,3,4 for custom mode
+    self.custommodechanged = False
+    self.selectorMap = {}
     
-    return isConnected
+    self.mustSendUpdate = False  # if the domotica values has been changed but not yet updated to the ledenet (connection problems)
+      
+    self.readata = None          # status frame, framebuffer.FrameBuffer allocated in onStart
+    self.skipStatus = False      # when written skip next status since it can be previous value
+
+  def createConnection(self):
+    return Domoticz.Connection(Name="LedenetBinair", Transport="TCP/IP", Protocol="None", Address=Parameters["Address"], Port=Parameters["Port"])
     
   def onStart(self):
     try:
       self.logLevel = int(Parameters["Mode6"])
     except:
-      self.Log("Debuglevel '"+Parameters["Mode6"]+"' is not an integer", 1, 3)
+      self.Log("Debuglevel '%s' is not an integer", 1, 3, Parameters["Mode6"])
       
     if self.logLevel == 10:
       Domoticz.Debugging(1)
@@ -129,38 +161,46 @@ class BasePlugin:
       Domoticz.Heartbeat(20)
       
     self.Log("onStart called", 9, 1)
-    self.connection = Domoticz.Connection(Name="LedenetBinair", Transport="TCP/IP", Protocol="None", Address=Parameters["Address"], Port=Parameters["Port"])
+    # reconnects are backed off up to 5 minutes while the controller is powered off
+    self.connection = supervisor.ConnectionSupervisor(self.createConnection, MinBackoff=20, MaxBackoff=300, Log=self.Log)
       
     try:
       self.maxOutstandingMessages = int(Parameters["Mode5"])
     except:
-      self.Log("max open messages '"+Parameters["Mode5"]+"' is not an integer", 1, 3)
+      self.Log("max open messages '%s' is not an integer", 1, 3, Parameters["Mode5"])
       
     # ICONS
     if ("LedenetRGBspeed" not in Images): Domoticz.Image('LedenetRGBspeed.zip').Create()
     if ("LedenetRGBmode" not in Images): Domoticz.Image('LedenetRGBmode.zip').Create()
     
+    self.readata = framebuffer.FrameBuffer(4*self.statusSize)
+    
+    # warm start: controller status and requested values of the last run, stale until the first status frame
+    self.snapshot = snapshot.Snapshot(snapshot.FileName(Parameters))
+    restored = self.snapshot.Load()
+    if restored:
+      self.currentStatus = self.snapshot.Get("currentStatus", self.currentStatus)
+      self.currentmode = self.snapshot.Get("currentmode", self.currentmode)
+      self.currentspeed = self.snapshot.Get("currentspeed", self.currentspeed)
+      self.mode = self.snapshot.Get("mode", self.mode)
+      self.masterLevel = self.snapshot.Get("masterLevel", self.masterLevel)
+      self.dimmerValues = self.snapshot.Get("dimmerValues", self.dimmerValues)
+      self.power = self.snapshot.Get("power", self.power)
+      self.autospeed = self.snapshot.Get("autospeed", self.autospeed)
+      self.automode = self.snapshot.Get("automode", self.automode)
+      self.Log("Restored state: status %s, mode 0x%X, speed 0x%X", 4, 1, self.currentStatus, self.currentmode, self.currentspeed)
+    
     if (1 not in Devices):
       Domoticz.Device(Name="RGB Light", Unit=1, Type=241, Subtype=6,  Switchtype=7).Create()
-    else:
-      try:
-        jsoncolor = json.loads(Devices[1].Color)
-        self.mode = int(jsoncolor['m'])
-        self.power = Devices[1].nValue > 0
-        self.dimmerValues[0] = jsoncolor['r']
-        self.dimmerValues[1] = jsoncolor['g']
-        self.dimmerValues[2] = jsoncolor['b']
-        self.dimmerValues[3] = jsoncolor['ww']
-        self.masterLevel = int(Devices[1].sValue)
-      except:
-        self.Log("failed to parse color:'"+Devices[1].Color+"' or sValue:'"+Devices[1].sValue+"' for level", 1, 3)
+    elif not restored:
+      self.readDeviceColor()
     if (2 not in Devices):
       Domoticz.Device(Name="Speed",Unit=2, Type=244, Subtype=73, Switchtype=7, Image=Images["LedenetRGBspeed"].ID).Create()
-    else:
+    elif not restored:
       try:
         self.autospeed = int(Devices[2].sValue)
       except:
-        self.Log("Failed to parse sValue:'"+Devices[1].sValue+"' for speed", 1, 3)
+        self.Log("Failed to parse sValue:'%s' for speed", 1, 3, Devices[1].sValue)
     
     self.selectorMap[0] = 0x61       
     self.selectorMap[10] = 1 
@@ -186,11 +226,11 @@ class BasePlugin:
     
     if (3 not in Devices):
       Domoticz.Device(Name="Mode", Unit=3, TypeName="Selector Switch", Switchtype=18, Options=SourceOptions, Image=Images["LedenetRGBmode"].ID).Create()
-    else:
+    elif not restored:
       try:
         self.automode = int(Devices[3].sValue)
       except:
-        self.Log("Failed to parse sValue:'"+Devices[3].sValue+"' for automode", 1, 3)
+        self.Log("Failed to parse sValue:'%s' for automode", 1, 3, Devices[3].sValue)
    
     self.DumpConfigToLog()
     
@@ -198,13 +238,19 @@ class BasePlugin:
 
   def onStop(self):
     self.Log("onStop called", 9, 1)
+    self.Log("Connection %s", 6, 1, self.connection.Summary())
+    self.snapshot.Save(True)
     return
 
   def onConnect(self, Connection, Status, Description):
+    self.connection.OnConnect(Status)
     if (Status == 0):
-      self.Log("Connected successfully to: "+Connection.Address+":"+Connection.Port, 3, 2)
+      self.Log("Connected successfully to: %s:%s", 3, 2, Connection.Address, Connection.Port)
+      self.outstandingMessages = 0
+      if self.mustSendUpdate:
+        self.updateController()
     else:
-      self.Log("Failed to connect ("+str(Status)+") to: "+Connection.Address+":"+Connection.Port+" with error: "+Description, 3, 2)
+      self.Log("Failed to connect (%s) to: %s:%s with error: %s", 3, 2, Status, Connection.Address, Connection.Port, Description)
       self.updateDevices()
 
     return
@@ -214,26 +260,22 @@ class BasePlugin:
 
     # only listen to the status, all other are not needed
     if (Data[0]==0x81 and len(self.readata) == 0):
-      self.readata.extend(Data)
+      self.readata.Extend(Data)
       self.outstandingMessages = self.outstandingMessages - 1
-    elif (len(self.readata) < 14):
-      self.readata.extend(Data)
+    elif (len(self.readata) < self.statusSize):
+      self.readata.Extend(Data)
       
-    if (len(self.readata) >= 14):
+    if (len(self.readata) >= self.statusSize):
+      if self.logLevel >= 8:
+        pluginlog.DumpFrame(self.readata.Bytes(), "Status frame", self.statusLayout)
       if not self.skipStatus:
-        tempstatus = [0,0,0,0,0]
-        tempstatus[0] = (self.readata[2] == 0x23) # 0x23 is ON, 0x24 is OFF
-        tempmode = self.readata[3]
-        tempspeed = self.readata[5]
-        tempstatus[1] = self.readata[6] # Red
-        tempstatus[2] = self.readata[7] # Green
-        tempstatus[3] = self.readata[8] # Blue
-        tempstatus[4] = self.readata[9] # White
+        head, kind, power, tempmode, run, tempspeed, red, green, blue, white, version, reserved = self.statusFrame.Unpack(self.readata.data)
+        tempstatus = [power == 0x23, red, green, blue, white] # 0x23 is ON, 0x24 is OFF
 
         if (tempmode == 0x61):
           if (tempstatus != self.currentStatus or tempmode != self.currentmode or tempspeed != self.currentspeed):
-            self.Log("LedeNet changed R:%d, G:%d, B:%d, W:%d, Speed:0x%X, Mode:0x%X, pwr:%d => R:%d, G:%d, B:%d, W:%d, Speed:0x%X, Mode:0x%X, pwr:%d" %
-            (self.currentStatus[1],self.currentStatus[2],self.currentStatus[3], self.currentStatus[4], self.currentspeed, self.currentmode, self.currentStatus[0], tempstatus[1], tempstatus[2], tempstatus[3], tempstatus[4],tempspeed, tempmode,tempstatus[0]), 6, 2)
+            self.Log("LedeNet changed R:%d, G:%d, B:%d, W:%d, Speed:0x%X, Mode:0x%X, pwr:%d => R:%d, G:%d, B:%d, W:%d, Speed:0x%X, Mode:0x%X, pwr:%d", 6, 2,
+            self.currentStatus[1],self.currentStatus[2],self.currentStatus[3], self.currentStatus[4], self.currentspeed, self.currentmode, self.currentStatus[0], tempstatus[1], tempstatus[2], tempstatus[3], tempstatus[4],tempspeed, tempmode,tempstatus[0])
                     
             self.currentStatus = tempstatus
             self.currentmode = tempmode
@@ -243,25 +285,30 @@ class BasePlugin:
 
             
         elif (tempstatus[0] != self.currentStatus[0] or tempmode != self.currentmode or tempspeed != self.currentspeed):
-          self.Log("LedeNet changed Speed:0x%X, Mode:0x%X, pwr:%d => Speed:0x%X, Mode:0x%X, pwr:%d" %
-          (self.currentspeed, self.currentmode, self.currentStatus[0], tempspeed, tempmode, tempstatus[0]), 6, 2)
+          self.Log("LedeNet changed Speed:0x%X, Mode:0x%X, pwr:%d => Speed:0x%X, Mode:0x%X, pwr:%d", 6, 2,
+          self.currentspeed, self.currentmode, self.currentStatus[0], tempspeed, tempmode, tempstatus[0])
           
           self.currentStatus[0] = tempstatus[0]
           self.currentmode = tempmode
           self.currentspeed = tempspeed
           
           self.updateFromDeviceStatus()
+        
+        self.storeState()
+        self.snapshot.Confirm(*self.snapshot.Stale()) # the controller reported its status
       
       else:
         self.skipStatus = False      
         
-      self.readata.clear()
+      self.readata.Clear()
     return
 
   def onCommand(self, Unit, Command, Level, Hue):
-    self.Log("onCommand called for Unit " + str(Unit) + ": Parameter '" + str(Command) + "', Level: " + str(Level)+", Hue: " + str(Hue), 7, 1)
+    self.Log("onCommand called for Unit %s: Parameter '%s', Level: %s, Hue: %s", 7, 1, Unit, Command, Level, Hue)
     
     CommandStr = str(Command)
+    if Unit == 1 and CommandStr != "Set Color" and self.snapshot.IsStale("dimmerValues"):
+      self.readDeviceColor()          # the color of the last run, the controller did not report a status yet
     self.requestedStatus = self.currentStatus[:]
     
     # Calculate color and send update to devices
@@ -302,40 +349,77 @@ class BasePlugin:
         self.automode = 0x61
         self.power = self.dimmerValues[0] > 0 or self.dimmerValues[1] > 0 or self.dimmerValues[2] > 0 or self.dimmerValues[3] > 0
 
-    # update controler
+    # update controler, a command retries the connection without waiting for the backoff
+    self.connection.Kick()
     self.updateController()
     
     # update UI
     self.updateDevices()
+    self.storeState()
     
     return
 
   def onNotification(self, Name, Subject, Text, Status, Priority, Sound, ImageFile):
-    self.Log("onNotification: " + Name + "," + Subject + "," + Text + "," + Status + "," + str(Priority) + "," + Sound + "," + ImageFile, 8, 1)
+    self.Log("onNotification: %s,%s,%s,%s,%s,%s,%s", 8, 1, Name, Subject, Text, Status, Priority, Sound, ImageFile)
     
     return
 
   def onDisconnect(self, Connection):
-    self.Log("onDisconnect "+Connection.Address+":"+Connection.Port, 7, 1)
+    self.Log("onDisconnect %s:%s", 7, 1, Connection.Address, Connection.Port)
+    self.connection.OnDisconnect()
     return
 
   def onHeartbeat(self):
-    self.Log("onHeartbeat called, open messages: " + str(self.outstandingMessages), 8, 1)
+    self.Log("onHeartbeat called, open messages: %d", 8, 1, self.outstandingMessages)
     
-    if self.checkConnection():
+    if self.connection.Check():
       if (self.outstandingMessages > self.maxOutstandingMessages):
         self.connection.Disconnect()
       else:
         if self.mustSendUpdate:
           self.updateController()
         else:
-          self.readata.clear()
+          self.readata.Clear()
           self.connection.Send(self.commandStatus)
           self.outstandingMessages = self.outstandingMessages + 1
-           
+    
+    self.snapshot.Save()
     return
 
 ####################### Specific helper functions for plugin #######################    
+  def storeState(self):
+    # warm start state, written by snapshot.Save()
+    self.snapshot.Set("currentStatus", self.currentStatus)
+    self.snapshot.Set("currentmode", self.currentmode)
+    self.snapshot.Set("currentspeed", self.currentspeed)
+    self.snapshot.Set("mode", self.mode)
+    self.snapshot.Set("masterLevel", self.masterLevel)
+    self.snapshot.Set("dimmerValues", self.dimmerValues)
+    self.snapshot.Set("power", self.power)
+    self.snapshot.Set("autospeed", self.autospeed)
+    self.snapshot.Set("automode", self.automode)
+    
+    self.metrics.Set("power", self.power)
+    for i, color in enumerate(("red", "green", "blue", "white")):
+      self.metrics.Set("channel", self.dimmerValues[i], color=color)
+    self.metrics.Set("level_percent", self.masterLevel)
+    self.metrics.Set("mode", self.currentmode)
+    return
+    
+  def readDeviceColor(self):
+    try:
+      jsoncolor = json.loads(Devices[1].Color)
+      self.mode = int(jsoncolor['m'])
+      self.power = Devices[1].nValue > 0
+      self.dimmerValues[0] = jsoncolor['r']
+      self.dimmerValues[1] = jsoncolor['g']
+      self.dimmerValues[2] = jsoncolor['b']
+      self.dimmerValues[3] = jsoncolor['ww']
+      self.masterLevel = int(Devices[1].sValue)
+    except:
+      self.Log("failed to parse color:'%s' or sValue:'%s' for level", 1, 3, Devices[1].Color, Devices[1].sValue)
+    return
+    
   def updateFromDeviceStatus(self):
     # convert function
     self.dimmerValues[0] = self.currentStatus[1]
@@ -394,7 +478,7 @@ class BasePlugin:
   def programCustom(self, custommode):
     if self.custommodechanged:
       customdata = ""
-      msg = [0x51]
+      colors = bytearray()
       if custommode == 4:
         customdata = Parameters["Mode4"]
       elif  custommode == 3:
@@ -419,24 +503,16 @@ class BasePlugin:
                 val = int(colorsplit[j])
               except:
                 error = True
-            msg.append(val)
+            colors.append(val)
         else:
-          msg.extend([1,2,3,0])
-      
-      msg.extend([self.currentspeed, 0x3A, 0xFF, 0x0F])
+          colors.extend([1,2,3,0])
       
       if error:
-        self.Log("Failed to parse custom mode "+str(custommode)+", '"+customdata+"'", 1, 3)
+        self.Log("Failed to parse custom mode %s, '%s'", 1, 3, custommode, customdata)
       else:
-        self.Log("Set custom mode "+str(custommode)+", '"+customdata+"'", 4, 1)
-      checksum = 0
-      for itm in msg:
-        checksum = checksum + itm
-      checksum = checksum % 0x100
-      msg.append(checksum)
-      
+        self.Log("Set custom mode %d, '%s'", 4, 1, custommode, customdata)
     
-      msgbytes = bytes(msg)
+      msgbytes = self.customFrame.Pack(0x51, bytes(colors), self.currentspeed, 0x3A, 0xFF, 0x0F)
       self.connection.Send(msgbytes)
       self.DumpVariable(msgbytes, "Send custom mode message", Level=8)
       self.custommodechanged = False
@@ -444,7 +520,7 @@ class BasePlugin:
     return False
     
   def updateController(self): # send update from domtoicz to ledenet
-    if self.checkConnection(True):
+    if self.connection.Check(True):
       updateColor = False
       requestedStatus = self.currentStatus[:]
       requestedStatus[0] = self.power
@@ -470,9 +546,8 @@ class BasePlugin:
       
       # update color
       if updateColor:
-        self.Log("Current: " + str(self.currentStatus) + " requested: " + str(requestedStatus), 4, 1)
-        checksum = (requestedStatus[1] + requestedStatus[2] + requestedStatus[3] + 0x3F +(requestedStatus[4] - 0xFF)) % 0x100
-        msg = bytes([0x31, requestedStatus[1], requestedStatus[2], requestedStatus[3], requestedStatus[4], 0x00, 0x0F, checksum])
+        self.Log("Current: %s requested: %s", 4, 1, self.currentStatus, requestedStatus)
+        msg = self.colorFrame.Pack(0x31, requestedStatus[1], requestedStatus[2], requestedStatus[3], requestedStatus[4], 0x00, 0x0F)
         self.connection.Send(msg)
         self.DumpVariable(msg, "Send color message", Level=8)
         self.skipStatus = True
@@ -498,14 +573,12 @@ class BasePlugin:
         adjmode = 0x60
               
       if (self.currentmode != adjmode or self.currentspeed != newspeed or self.custommodechanged):
-        self.Log("Speed level:%d speed changed from:0x%X to 0x%X Mode changed from:0x%X to 0x%X (0x%X)"% (self.autospeed, self.currentspeed, newspeed, self.currentmode, adjmode, self.automode), 6, 1)
+        self.Log("Speed level:%d speed changed from:0x%X to 0x%X Mode changed from:0x%X to 0x%X (0x%X)", 6, 1, self.autospeed, self.currentspeed, newspeed, self.currentmode, adjmode, self.automode)
         self.currentmode = adjmode
         self.currentspeed = newspeed
         
         if (self.currentmode != 0x60) or (not self.programCustom(self.automode)):
-          checksum = (0x61 + self.currentmode + self.currentspeed + 0x0F ) % 0x100
-        
-          msg = bytes([0x61, self.currentmode, self.currentspeed, 0x0F, checksum])
+          msg = self.modeFrame.Pack(0x61, self.currentmode, self.currentspeed, 0x0F)
           self.connection.Send(msg)
           self.DumpVariable(msg, "Send mode message", Level=8)
           self.skipStatus = True
@@ -549,7 +622,7 @@ class BasePlugin:
   def UpdateRGBDevice(self, Unit, n_Value, s_Value, color):
     # Make sure that the Domoticz device still exists (they can be deleted) before updating it 
     if (Unit in Devices):
-      self.Log("Update ["+Devices[Unit].Name+"] from: ('"+str(Devices[Unit].nValue)+":'"+str(Devices[Unit].sValue )+"':"+str(Devices[Unit].Color )+"') to: ("+str(n_Value)+":'"+str(s_Value)+"':"+str(color )+"') ", 5, 1)
+      self.Log("Update [%s] from: ('%s:'%s':%s') to: (%s:'%s':%s') ", 5, 1, Devices[Unit].Name, Devices[Unit].nValue, Devices[Unit].sValue, Devices[Unit].Color, n_Value, s_Value, color)
       Devices[Unit].Update(nValue=n_Value, sValue=str(s_Value), Color=color)
     return
     
@@ -562,79 +635,28 @@ class BasePlugin:
         s_Value = str(sValue1)+";"+str(sValue2)
         
       if (Devices[Unit].nValue != n_Value) or (Devices[Unit].sValue != s_Value):
-        self.Log("Update ["+Devices[Unit].Name+"] from: ('"+str(Devices[Unit].nValue)+":'"+str(Devices[Unit].sValue )+"') to: ("+str(n_Value)+":'"+str(s_Value)+"')", 5, 1)
+        self.Log("Update [%s] from: ('%s:'%s') to: (%s:'%s')", 5, 1, Devices[Unit].Name, Devices[Unit].nValue, Devices[Unit].sValue, n_Value, s_Value)
         Devices[Unit].Update(nValue=n_Value, sValue=s_Value)
     return
    
-  def DumpDeviceToLog(self,Unit):
-    self.Log(str(Devices[Unit].ID)+":"+Devices[Unit].Name+", (n:"+str(Devices[Unit].nValue)+", s:"+Devices[Unit].sValue+", Sgl:"+str(Devices[Unit].SignalLevel)+", bl:"+str(Devices[Unit].BatteryLevel)+", img:"+ str(Devices[Unit].Image)+", typ:"+ str(Devices[Unit].Type)+", styp:"+ str(Devices[Unit].SubType)+")", 6, 1)
-    return   
-    
   def DumpConfigToLog(self):
-    for x in Parameters:
-      if Parameters[x] != "":
-        self.Log( "'" + x + "':'" + str(Parameters[x]) + "'", 7, 1)
-    self.Log("Device count: " + str(len(Devices)), 6, 1)
-    for x in Devices:
-      self.DumpDeviceToLog(x)
+    pluginlog.DumpConfigToLog(Parameters, Devices, self.logLevel)
     return
     
   def DumpVariable(self, Item, Varname, Level = 5, BytesAsStr = False, Prefix=""):
+    self.recorder.RecordData(Varname, Item)
     if self.logLevel >= Level:
-      Prefix = str(Prefix)
-      if isinstance(Item, dict):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        for b in Item:
-          if isinstance(b, str):
-            self.DumpVariable( Item[b], "'"+str(b) + "'", Level, BytesAsStr, Prefix)
-          else:
-            self.DumpVariable( Item[b], str(b), Level, BytesAsStr, Prefix)
-         
-      elif isinstance(Item, (bytes, bytearray)):
-        if BytesAsStr:
-          txt = escape(Item.decode("utf-8", "ignore"))
-        else:
-          txt = "[ " 
-          for b in Item:
-            txt += '0x{:02X} '.format(b)
-          txt +=  "]"
-        
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): " + txt, Level, 1)
-      elif isinstance(Item, (tuple, list)):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        idx = 0
-        for b in Item:
-          self.DumpVariable( b, "["+str(idx) + "]", Level, BytesAsStr, Prefix)
-          idx=idx+1
-
-      elif isinstance(Item, str):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): '"+Item+"'", Level, 1)
-      else:
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"): "+str(Item), Level, 1)
-           
+      pluginlog.DumpVariable(Item, Varname, BytesAsStr, Prefix)
     return
 
-  def Log(self, Message, Level, Type):
-    # Message = string, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+  def Log(self, Message, Level, Type, *Args):
+    # Message = string, format string with Args or callable, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+    # Message is only formatted when Level is not filtered out, the flight recorder keeps it unformatted
+    self.recorder.Record(Message, Args)
     if self.logLevel >= Level:
-      if Type == 2:
-        Domoticz.Status(Message)
-      elif Type == 3:
-        Domoticz.Error(Message)
-      else:
-        Domoticz.Log(Message)
+      pluginlog.Write(Message, Type, Args)
+    if Type == 3:
+      self.recorder.Dump("error", Written=self.logLevel >= Level) # a short tail when the error is filtered out
     
     return
     
@@ -680,3 +702,17 @@ def onHeartbeat():
   global _plugin
   _plugin.onHeartbeat()
 
+# opt-in push button for a flight recorder dump, see plugincore/flightrecorder.py
+_recorderButton = flightrecorder.Instrument(globals())
+
+# opt-in profiling of the callbacks, see plugincore/profiler.py
+_profiler = profiler.Instrument(globals())
+
+# opt-in recording of the received data, see plugincore/capture.py
+_capture = capture.Instrument(globals())
+
+# latency histograms of the callbacks above, see plugincore/callbackstats.py
+_stats = callbackstats.Instrument(globals())
+
+# opt-in OpenMetrics endpoint of the readings and counters, see plugincore/metrics.py
+_metrics = metrics.Instrument(globals())
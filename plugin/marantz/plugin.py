@@ -19,13 +19,28 @@
 # 2.6.6   26-06-2018  Added logging checkconnection, destroy connection when was connected
 # 2.6.7   16-07-2018  Heartbeat configurable
 # 2.6.8   06-08-2018  Update logging
+# 2.6.9   18-10-2026  Lazy log formatting via plugincore
+# 2.6.10  18-10-2026  Write-behind device updates via plugincore.devicecache
+# 2.6.11  18-10-2026  Callback latency histograms via plugincore.callbackstats
+# 2.6.12  18-10-2026  Opt-in capture of received data via plugincore.capture
+# 2.6.13  18-10-2026  Reconnect with exponential backoff via plugincore.supervisor
+# 2.6.14  18-10-2026  Warm start state via plugincore.snapshot
+# 2.6.15  18-10-2026  Per instance state (__slots__)
+# 2.6.16  18-10-2026  Flight recorder of recent log events, dumped on errors
+# 2.6.17  18-10-2026  OpenMetrics endpoint via plugincore.metrics
+# 2.6.18  18-10-2026  Profiling mode via plugincore.profiler
+# 2.6.19  18-10-2026  Errors dump the flight recorder at every debug level, optional dump push button
+# 2.6.20  18-10-2026  Restored state stays stale until the device confirms it
+# 2.6.21  18-10-2026  Status poll as scheduler task, heartbeat is the wheel resolution
+# 2.6.22  18-10-2026  Removed unused html import, remaining log messages formatted lazily
+# 2.6.23  18-10-2026  Errors filtered out by the debug level dump only the last 16 flight recorder events
 
 """
-<plugin key="DenonMarantz" name="Denon / Marantz AVR Amplifier" author="dnpwwo/artemgy/elgringo" version="2.6.8" externallink="https://github.com/ericstaal/domoticz/blob/master/">
+<plugin key="DenonMarantz" name="Denon / Marantz AVR Amplifier" author="dnpwwo/artemgy/elgringo" version="2.6.23" externallink="https://github.com/ericstaal/domoticz/blob/master/">
   <params>
     <param field="Address" label="IP Address" width="200px" required="true" default="127.0.0.1"/>
     <param field="Port" label="Port" width="30px" required="true" default="23"/>
-      <param field="Mode1" label="Heartbeat interval" width="50px" required="true">
+      <param field="Mode1" label="Poll interval" width="50px" required="true">
       <options>
         <option label="1" value="1"/>
         <option label="2" value="2"/>
@@ -81,79 +96,100 @@ import Domoticz
 import collections 
 import base64
 import binascii
-from html import escape
+
+# shared helpers (plugin/plugincore)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from plugincore import pluginlog
+from plugincore import callbackstats
+from plugincore import capture
+from plugincore import devicecache
+from plugincore import supervisor
+from plugincore import snapshot
+from plugincore import flightrecorder
+from plugincore import metrics
+from plugincore import profiler
+from plugincore import scheduler
 
 # additional imports
 import datetime
 
 class BasePlugin:
-  
-  connection = None           # Network connection
-  outstandingMessages = 0     # Open messages without reply
-  maxOutstandingMessages = 0  # lose connection after
-  logLevel = 0                # logLevel
-  
-  mainOn = False
-  mainSource = 0
-  mainVolume1 = 0
-  stationName = ""
+  # state per instance, no shared class level lists / dictionaries
+  __slots__ = ("connection", "outstandingMessages", "maxOutstandingMessages", "logLevel", "deviceCache", "snapshot", "mainOn", "mainSource", "mainVolume1", "stationName", "selectorMap", "lastMessage", "lastHeartbeat", "errorReported", "recorder", "metrics", "scheduler")
   
   ignoreMessages = "|SS|SV|SD|MS|PS|CV|SY|TP|"
-  selectorMap = {}
   pollingDict =  {"ZM":"SI?\r", "SI":"MV?\r", "MV":"MU?\r", "MU":"ZM?\r" }
-  lastMessage = "ZM"
-  lastHeartbeat = datetime.datetime.now()
-  
-  errorReported = False
-  wasConnected = False # check if was connected if so cdestroy the connection
   
-  def checkConnection(self, checkonly = False):
-    # Check connection and connect none
-    isConnected = False
+  def __init__(self):
+    self.connection = None           # Network connection (supervisor.ConnectionSupervisor)
+    self.outstandingMessages = 0     # Open messages without reply
+    self.maxOutstandingMessages = 0  # lose connection after
+    self.logLevel = 0                # logLevel
+    self.recorder = flightrecorder.FlightRecorder() # recent log events, also the filtered ones
+    self.metrics = metrics.Registry("domoticz_marantz") # readings served by plugincore.metrics
+    self.metrics.Define("power", "gauge", "1 when the main zone is on")
+    self.metrics.Define("volume", "gauge", "Master volume")
+    self.metrics.Define("muted", "gauge", "1 when muted")
+    self.metrics.Define("source_level", "gauge", "Selected input, level of the selector switch")
+    self.deviceCache = None          # write-behind cache for device updates
+    self.scheduler = None            # poll interval independent of the heartbeat
+    self.snapshot = None             # warm start state
     
-    try:
-      if self.connection is None:
-        self.connection = Domoticz.Connection(Name="Telnet", Transport="TCP/IP", Protocol="Line", Address=Parameters["Address"], Port=Parameters["Port"])
-        self.connection.Connect()
-        self.Log("checkConnection: Connection created, trying to connect", 6, 2)
-      else:
-        if self.connection.Connected():
-          isConnected = True
-        else:
-          if self.wasConnected:
-            self.wasConnected = False
-            self.connection = None
-            self.Log("checkConnection: Connection destroyed", 6, 2)
-          else:
-            if (not self.connection.Connecting()) and (not checkonly):
-              self.outstandingMessages = 0
-              self.connection.Connect()
-              self.Log("checkConnection: Trying to connect", 6, 2)
-      
-    except:
-      isConnected = False
-      self.connection = None
-      self.wasConnected = False
-      self.Log("checkConnection: Error, try to reset",1,3)
+    self.mainOn = False
+    self.mainSource = 0
+    self.mainVolume1 = 0
+    self.stationName = ""
+    
+    self.selectorMap = {}
+    self.lastMessage = "ZM"
+    self.lastHeartbeat = datetime.datetime.now()
+    
+    self.errorReported = False
 
-    return isConnected
+  def createConnection(self):
+    self.Log("Connection created", 6, 2)
+    return Domoticz.Connection(Name="Telnet", Transport="TCP/IP", Protocol="Line", Address=Parameters["Address"], Port=Parameters["Port"])
     
   def onStart(self):
     try:
       self.logLevel = int(Parameters["Mode6"])
     except:
-      self.Log("Debuglevel '"+Parameters["Mode6"]+"' is not an integer", 1, 3)
+      self.Log("Debuglevel '%s' is not an integer", 1, 3, Parameters["Mode6"])
       
     if self.logLevel == 10:
       Domoticz.Debugging(1)
-    self.Log("onStart called, heartbeat interval " +str(Parameters["Mode1"])+" seconds", 4, 1)
+    self.Log("onStart called, poll interval %s seconds", 4, 1, Parameters["Mode1"])
+    
+    # heartbeat is the wheel resolution, the status is polled every Mode1 seconds
+    self.scheduler = scheduler.Scheduler(1)
+    Domoticz.Heartbeat(int(self.scheduler.resolution))
+    self.scheduler.Add("poll", int(Parameters["Mode1"]), self.poll, Delay=0)
+    
+    # status is polled round robin, values changing in between (turning the volume knob) are merged per heartbeat
+    # switching the source, mute or zone on/off is written immediately
+    self.deviceCache = devicecache.DeviceCache(Devices, int(Parameters["Mode1"]))
+    self.deviceCache.SetPolicy(2, Interval=0, StateImmediate=True)
+    self.deviceCache.SetPolicy(3, Interval=1, StateImmediate=True)
+    # a lost telnet connection is destroyed, reconnects are backed off up to 5 minutes while the receiver is unplugged
+    self.connection = supervisor.ConnectionSupervisor(self.createConnection, MinBackoff=int(Parameters["Mode1"]), MaxBackoff=max(300, int(Parameters["Mode1"])), RecreateOnDisconnect=True, Log=self.Log)
     
-    Domoticz.Heartbeat(int(Parameters["Mode1"])) 
+    # warm start with the state of the last run (stale until the receiver reports it), so the first
+    # messages after a restart do not reset the source / volume until the round robin poll has passed
+    self.snapshot = snapshot.Snapshot(snapshot.FileName(Parameters))
+    restored = self.snapshot.Load()
+    if restored:
+      self.mainOn = self.snapshot.Get("mainOn", self.mainOn)
+      self.mainSource = self.snapshot.Get("mainSource", self.mainSource)
+      self.mainVolume1 = self.snapshot.Get("mainVolume1", self.mainVolume1)
+      self.stationName = self.snapshot.Get("stationName", self.stationName)
+      self.Log("Restored state: on %s, source %s, volume %s, station '%s'", 4, 1, self.mainOn, self.mainSource, self.mainVolume1, self.stationName)
     
     try:
       self.maxOutstandingMessages = int(Parameters["Mode5"])
     except:
-      self.Log("max open messages '"+Parameters["Mode5"]+"' is not an integer", 1, 3)
+      self.Log("max open messages '%s' is not an integer", 1, 3, Parameters["Mode5"])
       
     dictValue=0
     for item in Parameters["Mode3"].split('|'):
@@ -161,7 +197,7 @@ class BasePlugin:
       dictValue = dictValue + 10
         
     if (Parameters["Mode3"].count('|') != Parameters["Mode4"].count('|')):
-      self.Log("Sources ("+Parameters["Mode3"]+") and names ("+Parameters["Mode4"]+") do not match! Using only sources", 1, 3)
+      self.Log("Sources (%s) and names (%s) do not match! Using only sources", 1, 3, Parameters["Mode3"], Parameters["Mode4"])
       
       sourceOptions = {'LevelActions': '|'*Parameters["Mode3"].count('|'),
                'LevelNames': Parameters["Mode3"],
@@ -204,28 +240,36 @@ class BasePlugin:
     if (6 not in Devices): 
       Domoticz.Device(Name="Station",    Unit=6, Type=243, Subtype=19, Switchtype=0, Image=Images["DenonMarantzboombox"].ID).Create()
     
+    if restored: # show the state of the last run until the receiver reports it
+      self.SyncDevices()
+      self.deviceCache.Flush(True)
+    
     self.DumpConfigToLog()
     
     return
 
   def onStop(self):
     self.Log("onStop called", 9, 1)
+    self.Log("Connection %s", 6, 1, self.connection.Summary())
+    self.deviceCache.Flush(True)
+    self.snapshot.Save(True)
     
     return
 
   def onConnect(self, Connection, Status, Description):
+    self.connection.OnConnect(Status)
     if (Status == 0):
-      self.Log("Connected successfully to: "+Connection.Address+":"+Connection.Port, 2, 2)
-      if not self.wasConnected:
-        self.wasConnected = True
+      self.Log("Connected successfully to: %s:%s", 2, 2, Connection.Address, Connection.Port)
+      self.outstandingMessages = 0
       self.connection.Send('ZM?\r')
       if self.errorReported:
         self.errorReported = False
       
     else:
       if not self.errorReported:
-        self.Log("Failed to connect ("+str(Status)+") to: "+Connection.Address+":"+Connection.Port+" with error: "+Description, 2, 2)
+        self.Log("Failed to connect (%s) to: %s:%s with error: %s", 2, 2, Status, Connection.Address, Connection.Port, Description)
         self.SyncDevices()
+        self.deviceCache.Flush()
         self.errorReported = True
 	  
     return
@@ -238,7 +282,7 @@ class BasePlugin:
     strData = Data.decode("utf-8", "ignore")
         
     strData = strData.strip()
-    self.Log("onMessage received: "+strData , 9, 1)
+    self.Log("onMessage received: %s", 9, 1, strData)
     action = strData[0:2]
     detail = strData[2:]
     if (action in self.pollingDict): self.lastMessage = action
@@ -248,33 +292,47 @@ class BasePlugin:
         self.mainOn = True
       elif (detail == "OFF"):
         self.mainOn = False
-      else: LogMessage("Unknown: Action "+action+", Detail '"+detail+"' ignored.", 7)
+      else: self.Log("Unknown: Action %s, Detail '%s' ignored.", 7, 1, action, detail)
+      self.snapshot.Set("mainOn", self.mainOn)
+      if (detail == "ON" or detail == "OFF"): self.snapshot.Confirm("mainOn")
     elif (action == "SI"):    # Main Zone Source Input
       for key, value in self.selectorMap.items():
         if (detail == value):    
           self.mainSource = key
+          self.snapshot.Confirm("mainSource")
           #self.lastMessage = "MU" # force reloading channel name
+      self.snapshot.Set("mainSource", self.mainSource)
     elif (action == "MV"):    # Master Volume
       if (detail.isdigit()):
         if (abs(self.mainVolume1) != int(detail[0:2])): self.mainVolume1 = int(detail[0:2])
-      elif (detail[0:3] == "MAX"): Domoticz.Debug("Unknown: Action "+action+", Detail '"+detail+"' ignored.")
-      else: LogMessage("Unknown: Action "+action+", Detail '"+detail+"' ignored.", 7)
+        self.snapshot.Confirm("mainVolume1")
+      elif (detail[0:3] == "MAX"): self.Log("Unknown: Action %s, Detail '%s' ignored.", 10, 1, action, detail)
+      else: self.Log("Unknown: Action %s, Detail '%s' ignored.", 7, 1, action, detail)
+      self.snapshot.Set("mainVolume1", self.mainVolume1)
     elif (action == "MU"):    # Overall Mute
       if (detail == "ON"):     self.mainVolume1 = abs(self.mainVolume1)*-1
       elif (detail == "OFF"):    self.mainVolume1 = abs(self.mainVolume1)
-      else: LogMessage("Unknown: Action "+action+", Detail '"+detail+"' ignored.", 7)
+      else: self.Log("Unknown: Action %s, Detail '%s' ignored.", 7, 1, action, detail)
+      self.snapshot.Set("mainVolume1", self.mainVolume1)
     elif (action == "TF"):
       self.stationName = detail[6:].strip()
+      self.snapshot.Set("stationName", self.stationName)
+      self.snapshot.Confirm("stationName")
       
     else:
       if (self.ignoreMessages.find(action) < 0):
-        self.Log("Unknown message '"+action+"' ignored.", 8, 1)
+        self.Log("Unknown message '%s' ignored.", 8, 1, action)
+    self.metrics.Set("power", self.mainOn)
+    self.metrics.Set("volume", abs(self.mainVolume1))
+    self.metrics.Set("muted", self.mainVolume1 < 0)
+    self.metrics.Set("source_level", self.mainSource)
     self.SyncDevices()
+    self.deviceCache.Flush()
 
     return
 
   def onCommand(self, Unit, Command, Level, Hue):
-    self.Log("onCommand called for Unit " + str(Unit) + ": Parameter '" + str(Command) + "', Level: " + str(Level)+", Hue: " + str(Hue), 8, 1)
+    self.Log("onCommand called for Unit %s: Parameter '%s', Level: %s, Hue: %s", 8, 1, Unit, Command, Level, Hue)
     
     Command = Command.strip()
     action, sep, params = Command.partition(' ')
@@ -285,10 +343,10 @@ class BasePlugin:
     lastHeartbeatDelta = (datetime.datetime.now()-self.lastHeartbeat).total_seconds()
     if (lastHeartbeatDelta < 0.5):
       delay = 1
-      self.Log("Last heartbeat was "+str(lastHeartbeatDelta)+" seconds ago, delaying command send.", 4, 1)
+      self.Log("Last poll was %s seconds ago, delaying command send.", 4, 1, lastHeartbeatDelta)
 
-    # Main Zone devices
-    if self.checkConnection(True):
+    # Main Zone devices, a command retries the connection without waiting for the backoff
+    if self.connection.Kick():
       if (Unit == 2):   # Main selector
         if (action == "On"):
           self.connection.Send(Message='ZMON\r', Delay=delay)
@@ -310,31 +368,35 @@ class BasePlugin:
     return
 
   def onNotification(self, Name, Subject, Text, Status, Priority, Sound, ImageFile):
-    self.Log("onNotification: " + Name + "," + Subject + "," + Text + "," + Status + "," + str(Priority) + "," + Sound + "," + ImageFile, 8, 1)
+    self.Log("onNotification: %s,%s,%s,%s,%s,%s,%s", 8, 1, Name, Subject, Text, Status, Priority, Sound, ImageFile)
     
     return
 
   def onDisconnect(self, Connection):
-    self.Log("onDisconnect "+Connection.Address+":"+Connection.Port, 7, 2)
+    self.Log("onDisconnect %s:%s", 7, 2, Connection.Address, Connection.Port)
+    self.connection.OnDisconnect()
 
     return
 
   def onHeartbeat(self):
-    self.Log("onHeartbeat called, open messages: " + str(self.outstandingMessages), 8, 1)
-    if self.checkConnection(): # if false will initialize a new connection
+    self.scheduler.Run()
+    self.deviceCache.Flush()
+    self.snapshot.Save()
+    return
+
+####################### Specific helper functions for plugin #######################    
+  def poll(self):
+    self.Log("poll called, open messages: %d", 8, 1, self.outstandingMessages)
+    if self.connection.Check(): # if false will initialize a new connection (after backoff)
       if (self.outstandingMessages > self.maxOutstandingMessages):
         self.connection.Disconnect()
       else:
         # send message
         self.lastHeartbeat = datetime.datetime.now()
         self.outstandingMessages = self.outstandingMessages + 1
-        self.Log("onHeartbeat: lastMessage "+self.lastMessage+", Sending '"+self.pollingDict[self.lastMessage][0:2]+"'. ", 8, 1)
+        self.Log("poll: lastMessage %s, Sending '%s'. ", 8, 1, self.lastMessage, self.pollingDict[self.lastMessage][0:2])
         self.connection.Send(self.pollingDict[self.lastMessage])   
-        
-      
-    return
-
-####################### Specific helper functions for plugin #######################    
+    
   def SyncDevices(self):
     self.UpdateDevice(2, self.mainSource if self.mainOn else 0, str(self.mainSource if self.mainOn else 0))
     if (self.mainVolume1 <= 0 or self.mainOn == False): self.UpdateDevice(3, 0, str(abs(self.mainVolume1)))
@@ -366,79 +428,28 @@ class BasePlugin:
         sValue = str(sValue1)+";"+str(sValue2)
         
       if (Devices[Unit].nValue != nValue) or (Devices[Unit].sValue != sValue):
-        self.Log("Update ["+Devices[Unit].Name+"] from: ('"+str(Devices[Unit].nValue)+":'"+str(Devices[Unit].sValue )+"') to: ("+str(nValue)+":'"+str(sValue)+"')", 5, 1)
-        Devices[Unit].Update(nValue, sValue)
+        self.Log("Update [%s] from: ('%s:'%s') to: (%s:'%s')", 5, 1, Devices[Unit].Name, Devices[Unit].nValue, Devices[Unit].sValue, nValue, sValue)
+      self.deviceCache.Update(Unit, nValue, sValue) # written by deviceCache.Flush()
     return
    
-  def DumpDeviceToLog(self,Unit):
-    self.Log(str(Devices[Unit].ID)+":"+Devices[Unit].Name+", (n:"+str(Devices[Unit].nValue)+", s:"+Devices[Unit].sValue+", Sgl:"+str(Devices[Unit].SignalLevel)+", bl:"+str(Devices[Unit].BatteryLevel)+", img:"+ str(Devices[Unit].Image)+", typ:"+ str(Devices[Unit].Type)+", styp:"+ str(Devices[Unit].SubType)+")", 6, 1)
-    return   
-    
   def DumpConfigToLog(self):
-    for x in Parameters:
-      if Parameters[x] != "":
-        self.Log( "'" + x + "':'" + str(Parameters[x]) + "'", 7, 1)
-    self.Log("Device count: " + str(len(Devices)), 6, 1)
-    for x in Devices:
-      self.DumpDeviceToLog(x)
+    pluginlog.DumpConfigToLog(Parameters, Devices, self.logLevel)
     return
     
   def DumpVariable(self, Item, Varname, Level = 5, BytesAsStr = False, Prefix=""):
+    self.recorder.RecordData(Varname, Item)
     if self.logLevel >= Level:
-      Prefix = str(Prefix)
-      if isinstance(Item, dict):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        for b in Item:
-          if isinstance(b, str):
-            self.DumpVariable( Item[b], "'"+str(b) + "'", Level, BytesAsStr, Prefix)
-          else:
-            self.DumpVariable( Item[b], str(b), Level, BytesAsStr, Prefix)
-         
-      elif isinstance(Item, (bytes, bytearray)):
-        if BytesAsStr:
-          txt = escape(Item.decode("utf-8", "ignore"))
-        else:
-          txt = "[ " 
-          for b in Item:
-            txt += '0x{:02X} '.format(b)
-          txt +=  "]"
-        
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): " + txt, Level, 1)
-      elif isinstance(Item, (tuple, list)):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        idx = 0
-        for b in Item:
-          self.DumpVariable( b, "["+str(idx) + "]", Level, BytesAsStr, Prefix)
-          idx=idx+1
-
-      elif isinstance(Item, str):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): '"+Item+"'", Level, 1)
-      else:
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"): "+str(Item), Level, 1)
-           
+      pluginlog.DumpVariable(Item, Varname, BytesAsStr, Prefix)
     return
 
-  def Log(self, Message, Level, Type):
-    # Message = string, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+  def Log(self, Message, Level, Type, *Args):
+    # Message = string, format string with Args or callable, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+    # Message is only formatted when Level is not filtered out, the flight recorder keeps it unformatted
+    self.recorder.Record(Message, Args)
     if self.logLevel >= Level:
-      if Type == 2:
-        Domoticz.Status(Message)
-      elif Type == 3:
-        Domoticz.Error(Message)
-      else:
-        Domoticz.Log(Message)
+      pluginlog.Write(Message, Type, Args)
+    if Type == 3:
+      self.recorder.Dump("error", Written=self.logLevel >= Level) # a short tail when the error is filtered out
     
     return
     
@@ -484,3 +495,17 @@ def onHeartbeat():
   global _plugin
   _plugin.onHeartbeat()
 
+# opt-in push button for a flight recorder dump, see plugincore/flightrecorder.py
+_recorderButton = flightrecorder.Instrument(globals())
+
+# opt-in profiling of the callbacks, see plugincore/profiler.py
+_profiler = profiler.Instrument(globals())
+
+# opt-in recording of the received data, see plugincore/capture.py
+_capture = capture.Instrument(globals())
+
+# latency histograms of the callbacks above, see plugincore/callbackstats.py
+_stats = callbackstats.Instrument(globals())
+
+# opt-in OpenMetrics endpoint of the readings and counters, see plugincore/metrics.py
+_metrics = metrics.Instrument(globals())
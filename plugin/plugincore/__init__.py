@@ -0,0 +1,9 @@
+# PLUGINCORE
+#
+# Description: Helpers shared by all plugins in this repository. Copy this folder next to the
+#   plugin folders (domoticz/plugins/plugincore), each plugin adds the parent folder to sys.path.
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version, lazy logging
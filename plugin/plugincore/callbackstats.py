@@ -0,0 +1,169 @@
+# Callback statistics
+#
+# Description: Latency histograms of the plugin callbacks. Instrument() replaces the module level
+#   onStart / onMessage / onCommand / onHeartbeat / ... functions by timed wrappers, each call is added
+#   to a fixed bucket histogram (no per call allocation) and a call / error counter. p50, p95 and max
+#   are published to an optional text or custom device and / or written to the log periodically,
+#   see settings.py ([diagnostics] section of plugincore.ini).
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+
+import time
+from bisect import bisect_left
+
+import Domoticz
+from plugincore import settings
+
+Callbacks = ("onStart", "onStop", "onConnect", "onMessage", "onCommand", "onNotification", "onDisconnect", "onHeartbeat")
+
+# upper bounds of the buckets in seconds, the last bucket holds everything above 5 seconds
+Bounds = (0.00005, 0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+class Histogram:
+  __slots__ = ("counts", "count", "total", "max")
+
+  def __init__(self):
+    self.counts = [0] * (len(Bounds) + 1)
+    self.Reset()
+
+  def Reset(self):
+    for i in range(len(self.counts)):
+      self.counts[i] = 0
+    self.count = 0
+    self.total = 0.0
+    self.max = 0.0
+
+  def Add(self, seconds):
+    self.counts[bisect_left(Bounds, seconds)] += 1
+    self.count += 1
+    self.total += seconds
+    if seconds > self.max:
+      self.max = seconds
+
+  def Percentile(self, p):
+    # upper bound of the bucket holding percentile p (0-100), never above the measured max
+    if self.count == 0:
+      return 0.0
+    rank = self.count * p / 100.0
+    seen = 0
+    for idx, n in enumerate(self.counts):
+      seen += n
+      if seen >= rank and n > 0:
+        if idx < len(Bounds):
+          return min(Bounds[idx], self.max)
+        return self.max
+    return self.max
+
+class CallbackStats:
+
+  def __init__(self, Globals):
+    self.globals = Globals            # module globals of the plugin (Parameters, Devices)
+    self.window = {}                  # name: Histogram since the last publish
+    self.calls = {}                   # name: calls since start
+    self.errors = {}                  # name: exceptions since start
+    self.device = "off"
+    self.unit = 250
+    self.interval = 300
+    self.summary = 0
+    self.nextPublish = None
+    self.nextSummary = None
+
+  def Wrap(self, name, function):
+    histogram = Histogram()
+    self.window[name] = histogram
+    self.calls[name] = 0
+    self.errors[name] = 0
+    clock = time.perf_counter
+
+    def timed(*args):
+      start = clock()
+      try:
+        return function(*args)
+      except Exception:
+        self.errors[name] += 1
+        raise
+      finally:
+        histogram.Add(clock() - start)
+        self.calls[name] += 1
+        if name == "onStart":
+          self.start()
+        elif name == "onHeartbeat":
+          self.tick()
+
+    timed.__name__ = name
+    timed.__wrapped__ = function
+    return timed
+
+  def start(self):
+    Parameters = self.globals.get("Parameters")
+    config = settings.Load(Parameters["HomeFolder"] if Parameters is not None and "HomeFolder" in Parameters else None)
+    section = config["diagnostics"]
+    self.device = section.get("device", "off").lower()
+    self.unit = section.getint("unit", 250)
+    self.interval = section.getint("interval", 300)
+    self.summary = section.getint("summary", 0)
+
+    Devices = self.globals.get("Devices")
+    if self.device in ("text", "custom") and Devices is not None and self.unit not in Devices:
+      if self.device == "text":
+        Domoticz.Device(Name="Callback latency", Unit=self.unit, Type=243, Subtype=19, Switchtype=0).Create()
+      else:
+        Domoticz.Device(Name="Callback latency p95", Unit=self.unit, TypeName="Custom", Options={"Custom": "1;ms"}).Create()
+
+    now = time.monotonic()
+    self.nextPublish = now + self.interval if self.device in ("text", "custom") else None
+    self.nextSummary = now + self.summary if self.summary > 0 else None
+
+  def tick(self):
+    now = time.monotonic()
+    if self.nextSummary is not None and now >= self.nextSummary:
+      self.nextSummary = now + self.summary
+      Domoticz.Log("Callback latency: " + self.Summary())
+      if self.nextPublish is None:
+        self.reset()
+    if self.nextPublish is not None and now >= self.nextPublish:
+      self.nextPublish = now + self.interval
+      self.Publish()
+      self.reset()
+
+  def reset(self):
+    for histogram in self.window.values():
+      histogram.Reset()
+
+  def Publish(self):
+    Devices = self.globals.get("Devices")
+    if Devices is None or self.unit not in Devices:
+      return
+    if self.device == "custom":
+      # worst p95 of all callbacks
+      worst = max([h.Percentile(95) for h in self.window.values()] + [0.0])
+      Devices[self.unit].Update(nValue=0, sValue="%.2f" % (worst * 1000))
+    else:
+      Devices[self.unit].Update(nValue=0, sValue=self.Summary(Compact=True))
+
+  def Summary(self, Compact=False):
+    # p50/p95/max in ms of the callbacks called in the current window
+    parts = []
+    for name, histogram in self.window.items():
+      if histogram.count == 0:
+        continue
+      if Compact:
+        parts.append("%s %.2f/%.2f/%.2f" % (name[2:], histogram.Percentile(50) * 1000, histogram.Percentile(95) * 1000, histogram.max * 1000))
+      else:
+        parts.append("%s n=%d (total %d, errors %d) p50=%.2fms p95=%.2fms max=%.2fms" % (name, histogram.count, self.calls[name], self.errors[name],
+                     histogram.Percentile(50) * 1000, histogram.Percentile(95) * 1000, histogram.max * 1000))
+    if Compact:
+      return "p50/p95/max ms: " + ", ".join(parts)
+    return "; ".join(parts) if len(parts) > 0 else "no calls"
+
+def Instrument(Globals, Names=Callbacks):
+  # replace the callbacks in the plugin module globals by timed wrappers, returns the CallbackStats
+  stats = CallbackStats(Globals)
+  for name in Names:
+    function = Globals.get(name)
+    if callable(function):
+      Globals[name] = stats.Wrap(name, function)
+  return stats
@@ -0,0 +1,184 @@
+# Capture
+#
+# Description: Opt-in recorder of the raw onMessage payloads of a plugin, to reproduce field issues and
+#   to benchmark the protocol parsers against real traffic (tools/replay.py). Enabled in the [capture]
+#   section of plugincore.ini (see settings.py).
+#
+#   File format: 8 byte magic, followed by records of a 14 byte header (monotonic time in ns as int64,
+#   kind as uint8, connection name length as uint8, payload length as uint32, little endian), the utf-8
+#   name of the connection the data was received on and the payload. Kind 0 is a bytes payload, kind 1
+#   a json encoded dict (HTTP protocol) with bytes values as {"$bytes": base64}. Files of version 1 have
+#   a 13 byte header without the connection name, they are still read (connection None).
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+# 1.0.1   18-10-2026  Records the connection name (version 2)
+
+import os
+import time
+import json
+import base64
+import struct
+
+import Domoticz
+from plugincore import settings
+
+Magic = b"DZCAP\x00\x02\n"
+Header = struct.Struct("<qBBI")
+MagicV1 = b"DZCAP\x00\x01\n"
+HeaderV1 = struct.Struct("<qBI")
+KindBytes = 0
+KindJson = 1
+FlushInterval = 1.0               # seconds between flushes of the capture file
+
+if hasattr(time, "monotonic_ns"):
+  _Clock = time.monotonic_ns      # python >= 3.7
+else:
+  _Clock = lambda: int(time.monotonic() * 1000000000)
+
+def _JsonDefault(value):
+  if isinstance(value, (bytes, bytearray, memoryview)):
+    return {"$bytes": base64.b64encode(bytes(value)).decode("ascii")}
+  raise TypeError("%s is not json serializable" % type(value).__name__)
+
+def _JsonObject(value):
+  if len(value) == 1 and "$bytes" in value:
+    return base64.b64decode(value["$bytes"])
+  return value
+
+def Encode(Data):
+  # (kind, payload bytes) of an onMessage Data argument
+  if isinstance(Data, (bytes, bytearray, memoryview)):
+    return KindBytes, bytes(Data)
+  return KindJson, json.dumps(Data, default=_JsonDefault, separators=(",", ":")).encode("utf-8")
+
+def Decode(Kind, Payload):
+  if Kind == KindBytes:
+    return Payload
+  return json.loads(Payload.decode("utf-8"), object_hook=_JsonObject)
+
+class Recorder:
+
+  def __init__(self, Filename, MaxSize=0):
+    self.filename = Filename
+    self.maxSize = MaxSize            # bytes, 0 = no limit
+    self.file = open(Filename, "ab")
+    if self.file.tell() == 0:
+      self.file.write(Magic)
+    else:
+      with open(Filename, "rb") as f:
+        magic = f.read(len(Magic))
+      if magic != Magic:
+        self.file.close()
+        self.file = None
+        raise ValueError("'%s' is not a capture file of this version, remove or rename it" % Filename)
+    self.size = self.file.tell()
+    self.records = 0
+    self.lastFlush = time.monotonic()
+
+  def Record(self, Data, Name=""):
+    # Name = name of the connection the data was received on
+    if self.file is None:
+      return
+    kind, payload = Encode(Data)
+    name = Name.encode("utf-8")[:255]
+    if self.maxSize > 0 and self.size + Header.size + len(name) + len(payload) > self.maxSize:
+      Domoticz.Error("Capture '%s' reached %d bytes, recording stopped" % (self.filename, self.size))
+      self.Close()
+      return
+    self.file.write(Header.pack(_Clock(), kind, len(name), len(payload)))
+    self.file.write(name)
+    self.file.write(payload)
+    self.size += Header.size + len(name) + len(payload)
+    self.records += 1
+    now = time.monotonic()
+    if now - self.lastFlush >= FlushInterval:
+      self.file.flush()
+      self.lastFlush = now
+
+  def Close(self):
+    if self.file is not None:
+      self.file.close()
+      self.file = None
+
+def Read(Filename):
+  # yields (monotonic ns, connection name, Data) for every record of a capture file, name None for version 1
+  with open(Filename, "rb") as f:
+    content = f.read()
+  if content.startswith(Magic):
+    header = Header
+  elif content.startswith(MagicV1):
+    header = HeaderV1
+  else:
+    raise ValueError("'%s' is not a capture file" % Filename)
+  view = memoryview(content)
+  offset = len(Magic)
+  while offset + header.size <= len(view):
+    if header is Header:
+      timestamp, kind, namelength, length = header.unpack_from(view, offset)
+    else:
+      timestamp, kind, length = header.unpack_from(view, offset)
+      namelength = 0
+    offset += header.size
+    if offset + namelength + length > len(view):
+      break                         # truncated last record
+    name = bytes(view[offset:offset+namelength]).decode("utf-8") if header is Header else None
+    offset += namelength
+    yield timestamp, name, Decode(kind, bytes(view[offset:offset+length]))
+    offset += length
+
+class CaptureHook:
+
+  def __init__(self, Globals):
+    self.globals = Globals            # module globals of the plugin (Parameters)
+    self.recorder = None
+
+  def Wrap(self, name, function):
+    if name == "onMessage":
+      def onMessage(Connection, Data):
+        if self.recorder is not None:
+          self.recorder.Record(Data, Connection.Name)
+        return function(Connection, Data)
+      return onMessage
+    if name == "onStart":
+      def onStart():
+        self.start()
+        return function()
+      return onStart
+    def onStop():
+      try:
+        return function()
+      finally:
+        self.Stop()
+    return onStop
+
+  def start(self):
+    Parameters = self.globals.get("Parameters")
+    homeFolder = Parameters["HomeFolder"] if Parameters is not None and "HomeFolder" in Parameters else None
+    section = settings.Load(homeFolder)["capture"]
+    if not section.getboolean("enabled", False):
+      return
+    filename = section.get("file", "capture.bin")
+    if homeFolder and not os.path.isabs(filename):
+      filename = os.path.join(homeFolder, filename)
+    try:
+      self.recorder = Recorder(filename, section.getint("maxsize", 10240) * 1024)
+      Domoticz.Status("Capturing received data to '%s'" % filename)
+    except (OSError, ValueError) as err:
+      Domoticz.Error("Unable to open capture '%s': %s" % (filename, err))
+
+  def Stop(self):
+    if self.recorder is not None:
+      self.recorder.Close()
+      self.recorder = None
+
+def Instrument(Globals):
+  # wraps onStart / onMessage / onStop in the plugin module globals, returns the CaptureHook
+  hook = CaptureHook(Globals)
+  for name in ("onStart", "onMessage", "onStop"):
+    function = Globals.get(name)
+    if callable(function):
+      Globals[name] = hook.Wrap(name, function)
+  return hook
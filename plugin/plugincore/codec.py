@@ -0,0 +1,74 @@
+# Binary codec
+#
+# Description: Declarative layouts of binary protocol frames. A field table of (offset, struct format,
+#   name) is compiled once to a struct.Struct (gaps become pad bytes), frames are decoded with
+#   unpack_from on the receive buffer (no slicing per field) and encoded with pack_into in a
+#   preallocated buffer, optionally followed by a checksum byte. Layout gives (offset, length, name)
+#   for pluginlog.DumpFrame.
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+
+import struct
+
+def Sum8(Data, Start=0, End=None):
+  # sum of the bytes modulo 256 (a slice of a short frame is cheaper to sum than a memoryview)
+  return sum(Data[Start:End]) & 0xFF
+
+class Frame:
+
+  def __init__(self, Order, Fields, Size=None, Checksum=None):
+    # Order = struct byte order ('>' big endian, '<' little endian), Fields = ((offset, format, name), ...)
+    # Checksum = function(Data, Start, End) for a checksum byte after the last field
+    parts = [Order]
+    layout = []
+    position = 0
+    for offset, code, name in Fields:
+      if offset < position:
+        raise ValueError("Field '%s' at %d overlaps the previous field" % (name, offset))
+      if offset > position:
+        parts.append("%dx" % (offset - position))
+      length = struct.calcsize(Order + code)
+      parts.append(code)
+      layout.append((offset, length, name))
+      position = offset + length
+    self.checksum = Checksum
+    self.checksumOffset = None
+    if Checksum is not None:
+      self.checksumOffset = position # pad byte in the struct, written by PackInto
+      parts.append("x")
+      layout.append((position, 1, "checksum"))
+      position += 1
+    if Size is not None and Size > position:
+      parts.append("%dx" % (Size - position))
+    self.struct = struct.Struct("".join(parts))
+    self.size = self.struct.size
+    self.names = tuple([name for offset, length, name in layout])
+    self.Layout = tuple(layout)
+    self.buffer = bytearray(self.size) # for Pack, plugin thread only
+
+  def Unpack(self, Data, Offset=0):
+    # tuple of the field values (without the checksum), Data is bytes / bytearray / memoryview
+    return self.struct.unpack_from(Data, Offset)
+
+  def Valid(self, Data, Offset=0):
+    # checksum byte matches (always True without checksum)
+    if self.checksum is None:
+      return True
+    return self.checksum(Data, Offset, Offset + self.checksumOffset) == Data[Offset + self.checksumOffset]
+
+  def PackInto(self, Buffer, Offset, *Values):
+    # encodes the fields in Buffer and adds the checksum
+    self.struct.pack_into(Buffer, Offset, *Values)
+    if self.checksum is not None:
+      Buffer[Offset + self.checksumOffset] = self.checksum(Buffer, Offset, Offset + self.checksumOffset)
+
+  def Pack(self, *Values):
+    # encoded frame as bytes, ready for Connection.Send
+    if self.checksum is None:
+      return self.struct.pack(*Values)
+    self.struct.pack_into(self.buffer, 0, *Values)
+    self.buffer[self.checksumOffset] = self.checksum(self.buffer, 0, self.checksumOffset)
+    return bytes(self.buffer)
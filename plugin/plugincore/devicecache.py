@@ -0,0 +1,96 @@
+# Device cache
+#
+# Description: Write-behind cache for Devices[Unit].Update. Updates are recorded in memory, repeated
+#   updates of a unit are merged to the latest value and written by Flush() at most once per minimal
+#   interval of the unit. Every Update is a Domoticz database write, so this saves I/O on the SD card.
+#   Switch units can be marked so a changed nValue (on/off, selector level) is written immediately.
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+
+import time
+
+class UnitState:
+  __slots__ = ("interval", "stateImmediate", "lastWrite", "pending", "nValue", "sValue", "kwargs")
+
+  def __init__(self, interval, stateImmediate):
+    self.interval = interval          # minimal seconds between two writes
+    self.stateImmediate = stateImmediate # write at once when nValue changes
+    self.lastWrite = None
+    self.pending = False
+    self.nValue = 0
+    self.sValue = ""
+    self.kwargs = None
+
+class DeviceCache:
+
+  def __init__(self, Devices, Interval=0.0):
+    self.devices = Devices            # the plugin Devices dictionary
+    self.interval = Interval          # default minimal interval for units without a policy
+    self.units = {}
+    self.writes = 0                   # Devices[..].Update calls
+    self.merged = 0                   # updates replaced by a newer one before they were written
+
+  def SetPolicy(self, Unit, Interval=None, StateImmediate=False):
+    state = self.unitState(Unit)
+    if Interval is not None:
+      state.interval = Interval
+    state.stateImmediate = StateImmediate
+
+  def unitState(self, Unit):
+    state = self.units.get(Unit)
+    if state is None:
+      state = UnitState(self.interval, False)
+      self.units[Unit] = state
+    return state
+
+  def Update(self, Unit, nValue, sValue, **kwargs):
+    # record an update, returns True when it was written at once
+    if Unit not in self.devices:
+      return False
+    state = self.unitState(Unit)
+    if state.pending:
+      self.merged += 1
+    state.pending = True
+    state.nValue = nValue
+    state.sValue = sValue
+    state.kwargs = kwargs if len(kwargs) > 0 else None
+
+    if state.stateImmediate and self.devices[Unit].nValue != nValue:
+      return self.write(Unit, state, time.monotonic())
+    return False
+
+  def Pending(self, Unit):
+    # latest (nValue, sValue) that is not yet written or None
+    state = self.units.get(Unit)
+    if state is None or not state.pending:
+      return None
+    return state.nValue, state.sValue
+
+  def Flush(self, Force=False):
+    # writes every dirty unit whose minimal interval has passed, returns the number of writes
+    now = time.monotonic()
+    written = 0
+    for Unit, state in self.units.items():
+      if state.pending:
+        if Force or state.lastWrite is None or (now - state.lastWrite) >= state.interval:
+          if self.write(Unit, state, now):
+            written += 1
+    return written
+
+  def write(self, Unit, state, now):
+    state.pending = False
+    if Unit not in self.devices:
+      return False
+    device = self.devices[Unit]
+    if device.nValue == state.nValue and device.sValue == state.sValue and state.kwargs is None:
+      return False
+    if state.kwargs is None:
+      device.Update(nValue=state.nValue, sValue=state.sValue)
+    else:
+      device.Update(nValue=state.nValue, sValue=state.sValue, **state.kwargs)
+    state.lastWrite = now
+    self.writes += 1
+    return True
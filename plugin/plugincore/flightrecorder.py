@@ -0,0 +1,146 @@
+# Flight recorder
+#
+# Description: Always on ring buffer of the recent log events of a plugin, also the ones filtered out by
+#   the debug level. An event is a timestamp, the unformatted message (format string or callable) and
+#   its arguments, recording is a few stores in preallocated slots. The events are only formatted when
+#   dumped to the Domoticz log: by BasePlugin.Log on an error (Type 3) or on demand (Dump), so the
+#   context of a failure is in the log without running at debug level 9 / 10.
+#   A dump shows the events since the previous dump, at most one dump per MinInterval unless forced.
+#   An error that the debug level filters out (logging off) only dumps the last Tail events, so an error
+#   streak does not flood the log table.
+#   On demand by the operator: the optional "Flight recorder" push button (unit 252) forces a dump.
+#
+#   plugincore.ini:
+#     [recorder]
+#     device = true      ; create the Flight recorder push button
+#     unit = 252
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+# 1.0.1   18-10-2026  Flight recorder push button for a dump on demand
+# 1.0.2   18-10-2026  Short dump for errors filtered out by the debug level
+
+import time
+import array
+
+import Domoticz
+from plugincore import settings
+from plugincore import pluginlog
+from plugincore import hexdump
+
+Size = 128                    # events kept
+MinInterval = 300.0           # seconds between two dumps
+Tail = 16                     # events dumped when the reason itself was not written
+MaxBytes = 32                 # bytes kept of recorded data
+
+class FlightRecorder:
+  __slots__ = ("times", "codes", "args", "size", "index", "count", "dumped", "minInterval", "lastDump", "dumps", "suppressed")
+
+  def __init__(self, Size=Size, MinInterval=MinInterval):
+    self.times = array.array("d", bytes(8 * Size)) # time.time() per event
+    self.codes = [None] * Size        # message, format string or callable
+    self.args = [None] * Size         # arguments of the message
+    self.size = Size
+    self.index = 0                    # next slot
+    self.count = 0                    # events recorded since start
+    self.dumped = 0                   # count at the previous dump
+    self.minInterval = MinInterval
+    self.lastDump = None
+    self.dumps = 0
+    self.suppressed = 0               # dumps skipped by MinInterval
+
+  def Record(self, Code, Args=()):
+    i = self.index
+    self.times[i] = time.time()
+    self.codes[i] = Code
+    self.args[i] = Args
+    self.index = i + 1 if i + 1 < self.size else 0
+    self.count += 1
+
+  def RecordData(self, Name, Data):
+    # received / sent payload, only the first MaxBytes are kept (a copy, the caller may reuse its buffer)
+    if isinstance(Data, (bytes, bytearray, memoryview)):
+      self.Record("%s (%d bytes): %s", (Name, len(Data), bytes(Data[:MaxBytes])))
+    elif isinstance(Data, str):
+      self.Record("%s (%d chars): %s", (Name, len(Data), Data[:MaxBytes]))
+    else:
+      self.Record("%s: %s", (Name, type(Data).__name__))
+
+  def Events(self, All=False):
+    # (time, code, args) oldest first, since the previous dump unless All
+    number = min(self.count if All else self.count - self.dumped, self.size)
+    first = (self.index - number) % self.size
+    for i in range(number):
+      j = (first + i) % self.size
+      yield self.times[j], self.codes[j], self.args[j]
+
+  def Dump(self, Reason, Force=False, Written=True):
+    # writes the recorded events to the Domoticz log, returns False when skipped
+    # Written = False: the reason is filtered out by the debug level, only the last Tail events
+    now = time.monotonic()
+    if not Force and self.lastDump is not None and (now - self.lastDump) < self.minInterval:
+      self.suppressed += 1
+      return False
+    new = self.count - self.dumped
+    shown = min(new, self.size if Written else Tail)
+    Domoticz.Log("Flight recorder, %s: last %d of %d events (%d dumps suppressed)" % (Reason, shown, new, self.suppressed))
+    for stamp, code, args in list(self.Events())[-shown:] if shown > 0 else ():
+      Domoticz.Log("  %s.%03d %s" % (time.strftime("%H:%M:%S", time.localtime(stamp)), int(stamp * 1000) % 1000, self.format(code, args)))
+    self.dumped = self.count
+    self.lastDump = now
+    self.dumps += 1
+    self.suppressed = 0
+    return True
+
+  def format(self, code, args):
+    try:
+      args = tuple([hexdump.HexDump(arg) if isinstance(arg, bytes) else arg for arg in args])
+      return pluginlog.Format(code, args)
+    except Exception as e:
+      return "%r %r (%s)" % (code, args, e)
+
+class DumpButton:
+  # the optional push button of plugincore.ini [recorder], a command dumps the recorder of _plugin
+
+  def __init__(self, Globals):
+    self.globals = Globals            # module globals of the plugin (Parameters, Devices, _plugin)
+    self.device = False
+    self.unit = 252
+
+  def Wrap(self, name, function):
+    if name == "onStart":
+      def onStart(*args):
+        self.start()
+        return function(*args)
+      return onStart
+    def onCommand(*args):
+      if self.device and args[0] == self.unit:
+        self.dump()                   # the push button is not a device of the plugin
+        return None
+      return function(*args)
+    return onCommand
+
+  def start(self):
+    Parameters = self.globals.get("Parameters")
+    section = settings.Load(Parameters["HomeFolder"] if Parameters is not None and "HomeFolder" in Parameters else None)["recorder"]
+    self.device = section.getboolean("device", False)
+    self.unit = section.getint("unit", 252)
+    Devices = self.globals.get("Devices")
+    if self.device and Devices is not None and self.unit not in Devices:
+      Domoticz.Device(Name="Flight recorder", Unit=self.unit, TypeName="Switch", Switchtype=9, Image=9).Create()
+
+  def dump(self):
+    recorder = getattr(self.globals.get("_plugin"), "recorder", None)
+    if recorder is not None:
+      recorder.Dump("on demand", Force=True)
+
+def Instrument(Globals):
+  # wraps onStart / onCommand in the plugin module globals, install before the profiler, returns the DumpButton
+  button = DumpButton(Globals)
+  for name in ("onStart", "onCommand"):
+    function = Globals.get(name)
+    if callable(function):
+      Globals[name] = button.Wrap(name, function)
+  return button
@@ -0,0 +1,44 @@
+# Frame buffer
+#
+# Description: Receive buffer of a plugin with a fixed size, allocated once in onStart and reused for
+#   every frame (no growing and shrinking bytearray per message). Data that does not fit is dropped
+#   and counted, a device sending garbage can not grow the buffer.
+#   The received bytes are data[0:length], index data directly in the parsers.
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+
+class FrameBuffer:
+  __slots__ = ("data", "length", "overflows")
+
+  def __init__(self, Size):
+    self.data = bytearray(Size)       # preallocated, never resized
+    self.length = 0                   # number of valid bytes
+    self.overflows = 0                # Extend calls that did not fit
+
+  def __len__(self):
+    return self.length
+
+  def Extend(self, Data):
+    # appends Data, returns False when it did not fit completely (the part that fits is kept)
+    size = len(Data)
+    free = len(self.data) - self.length
+    fits = size <= free
+    if not fits:
+      self.overflows += 1
+      size = free
+    self.data[self.length:self.length + size] = memoryview(Data)[:size]
+    self.length += size
+    return fits
+
+  def Clear(self):
+    self.length = 0
+
+  def View(self):
+    # memoryview of the valid bytes, only valid until the next Extend / Clear
+    return memoryview(self.data)[:self.length]
+
+  def Bytes(self):
+    return bytes(self.data[:self.length])
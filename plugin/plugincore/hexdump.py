@@ -0,0 +1,80 @@
+# Hex dump
+#
+# Description: Linear time hex / ASCII dumps of bytes, bytearray and memoryview payloads for the
+#   debug log. Long payloads are elided in the middle (head .. tail) using memoryview slices so the
+#   payload is never copied, and the conversion is done by memoryview.hex() instead of per byte format.
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+
+from html import escape
+
+MaxLength = 256               # default number of bytes shown, 0 = no limit
+
+try:
+  memoryview(b"").hex(" ")
+  _HasSeparator = True        # python >= 3.8
+except TypeError:
+  _HasSeparator = False
+
+_Printable = bytes(b if 0x20 <= b < 0x7F else 0x2E for b in range(256)) # translate table, '.' for non printable
+
+def _Hex(view):
+  # 'AB CD EF' for a memoryview
+  if _HasSeparator:
+    return view.hex(" ").upper()
+  txt = view.hex().upper()
+  return " ".join([txt[i:i+2] for i in range(0, len(txt), 2)])
+
+def _Split(data, maxLength):
+  # returns head view, tail view (can be None) and the number of elided bytes
+  view = memoryview(data)
+  if maxLength is None:
+    maxLength = MaxLength
+  if maxLength <= 0 or len(view) <= maxLength:
+    return view, None, 0
+  headLength = (maxLength + 1) // 2
+  tailLength = maxLength - headLength
+  return view[:headLength], view[len(view)-tailLength:], len(view) - maxLength
+
+def HexDump(data, maxLength=None):
+  # '[ 68 73 41 .. 100 bytes .. 4F 4B ]'
+  head, tail, skipped = _Split(data, maxLength)
+  if tail is None:
+    return "[ " + _Hex(head) + " ]"
+  return "[ %s .. %d bytes .. %s ]" % (_Hex(head), skipped, _Hex(tail))
+
+def TextDump(data, maxLength=None):
+  # html escaped utf-8 text, elided like HexDump
+  head, tail, skipped = _Split(data, maxLength)
+  if tail is None:
+    return escape(bytes(head).decode("utf-8", "ignore"))
+  return "%s .. %d bytes .. %s" % (escape(bytes(head).decode("utf-8", "ignore")), skipped, escape(bytes(tail).decode("utf-8", "ignore")))
+
+def HexLines(data, width=16, maxLength=None):
+  # offset annotated lines: '0010: 00 01 02 ..  |...|'
+  head, tail, skipped = _Split(data, maxLength)
+  lines = []
+  for view, offset in ((head, 0), (tail, len(head) + skipped)):
+    if view is None:
+      continue
+    if offset > 0:
+      lines.append("      .. %d bytes .." % skipped)
+    for idx in range(0, len(view), width):
+      row = view[idx:idx+width]
+      lines.append("%04X: %-*s  |%s|" % (offset + idx, width*3-1, _Hex(row), bytes(row).translate(_Printable).decode("ascii")))
+  return lines
+
+def Fields(data, layout):
+  # annotate a binary frame with a layout of (offset, length, name), e.g. a protocol status frame
+  # returns '[0] 81 head, [2] 23 power, ...'
+  view = memoryview(data)
+  parts = []
+  for offset, length, name in layout:
+    if offset + length <= len(view):
+      parts.append("[%d] %s %s" % (offset, _Hex(view[offset:offset+length]), name))
+    else:
+      parts.append("[%d] -- %s" % (offset, name))
+  return ", ".join(parts)
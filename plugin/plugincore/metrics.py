@@ -0,0 +1,201 @@
+# Metrics
+#
+# Description: Optional OpenMetrics (Prometheus) endpoint with the readings a plugin already holds in
+#   memory, so dashboards do not have to scrape the Domoticz database. The plugin sets its readings
+#   in a Registry (BasePlugin.metrics), the exporter adds the connection counters (supervisor) and the
+#   callback counters / latency (callbackstats) every heartbeat.
+#   The text is rendered on the plugin thread after a callback that changed a value and kept as one
+#   bytes object, the http thread only serves that object: a scrape never touches Devices, the
+#   database or the plugin state. Listens on the loopback address by default.
+#
+#   plugincore.ini:
+#     [metrics]
+#     enabled = true
+#     address = 127.0.0.1
+#     port = 0           ; 0 = 9100 + hardware id, each instance of a plugin has its own endpoint
+#
+#   Scrape: curl http://127.0.0.1:9103/metrics
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import Domoticz
+from plugincore import settings
+from plugincore import callbackstats
+
+ContentType = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+Callbacks = callbackstats.Callbacks
+
+class Family:
+  __slots__ = ("name", "type", "help", "samples")
+
+  def __init__(self, name, type, help):
+    self.name = name
+    self.type = type                  # gauge / counter
+    self.help = help
+    self.samples = {}                 # label text: value
+
+class Registry:
+
+  def __init__(self, Prefix="domoticz"):
+    self.prefix = Prefix
+    self.families = {}                # name: Family, in definition order
+    self.labels = ""                  # labels of every sample, e.g. hardware="3"
+    self.enabled = False              # set by the exporter, Set is a no-op while disabled
+    self.changed = False
+
+  def Define(self, Name, Type, Help):
+    # Type = "gauge" or "counter", the name without prefix (and without _total for a counter)
+    if Name not in self.families:
+      self.families[Name] = Family(Name, Type, Help)
+
+  def Set(self, Name, Value, **Labels):
+    # value of a defined metric, None removes the sample (e.g. a phase that is not connected)
+    if not self.enabled:
+      return
+    family = self.families[Name]
+    key = ",".join(['%s="%s"' % (label, str(Labels[label]).replace("\\", "\\\\").replace('"', '\\"')) for label in sorted(Labels)])
+    if Value is None:
+      if family.samples.pop(key, None) is not None:
+        self.changed = True
+    elif family.samples.get(key) != Value:
+      family.samples[key] = Value
+      self.changed = True
+
+  def Render(self):
+    # OpenMetrics text
+    lines = []
+    for family in self.families.values():
+      if len(family.samples) == 0:
+        continue
+      name = "%s_%s" % (self.prefix, family.name)
+      lines.append("# TYPE %s %s" % (name, family.type))
+      lines.append("# HELP %s %s" % (name, family.help))
+      sample = name + "_total" if family.type == "counter" else name
+      for key, value in family.samples.items():
+        labels = self.labels if key == "" else (key if self.labels == "" else self.labels + "," + key)
+        if isinstance(value, bool):
+          value = int(value)
+        value = repr(value) if isinstance(value, float) else value
+        lines.append("%s{%s} %s" % (sample, labels, value) if labels else "%s %s" % (sample, value))
+    lines.append("# EOF")
+    self.changed = False
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+class Handler(BaseHTTPRequestHandler):
+  exporter = None
+
+  def do_GET(self):
+    if self.path.split("?")[0] not in ("/", "/metrics"):
+      self.send_error(404)
+      return
+    body = self.exporter.text           # rendered on the plugin thread
+    self.send_response(200)
+    self.send_header("Content-Type", ContentType)
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+    self.exporter.scrapes += 1
+
+  def log_message(self, format, *args):
+    pass                              # no stderr output from the http thread
+
+class Exporter:
+
+  def __init__(self, Globals):
+    self.globals = Globals            # module globals of the plugin (Parameters, _plugin, _stats)
+    self.registry = None
+    self.server = None
+    self.thread = None
+    self.text = b"# EOF\n"            # last rendering, replaced as a whole
+    self.scrapes = 0
+
+  def Wrap(self, name, function):
+    def exported(*args):
+      try:
+        return function(*args)
+      finally:
+        if name == "onStart":
+          self.start()
+        elif name == "onStop":
+          self.Stop()
+        elif self.registry is not None:
+          if name == "onHeartbeat":
+            self.counters()
+          if self.registry.changed:
+            self.text = self.registry.Render()
+    exported.__name__ = name
+    return exported
+
+  def start(self):
+    Parameters = self.globals.get("Parameters") or {}
+    section = settings.Load(Parameters.get("HomeFolder"))["metrics"]
+    if not section.getboolean("enabled", False):
+      return
+    plugin = self.globals.get("_plugin")
+    self.registry = getattr(plugin, "metrics", None) or Registry()
+    self.registry.labels = 'hardware="%s"' % Parameters.get("HardwareID", 0)
+    self.registry.enabled = True
+    self.registry.Define("connection_state", "gauge", "1 when connected to the device")
+    self.registry.Define("connection_attempts", "counter", "Connect attempts since start")
+    self.registry.Define("connection_failures", "counter", "Failed connects since start")
+    self.registry.Define("connection_uptime_seconds", "counter", "Seconds connected since start")
+    self.registry.Define("callback_calls", "counter", "Plugin callbacks since start")
+    self.registry.Define("callback_errors", "counter", "Plugin callbacks that raised an exception")
+    self.registry.Define("callback_p95_seconds", "gauge", "95th percentile callback latency in the current window")
+
+    address = section.get("address", "127.0.0.1")
+    port = section.getint("port", 0) or 9100 + int(Parameters.get("HardwareID", 0))
+    try:
+      handler = type("MetricsHandler", (Handler,), {"exporter": self})
+      self.server = HTTPServer((address, port), handler)
+    except OSError as err:
+      Domoticz.Error("Unable to serve metrics on %s:%d: %s" % (address, port, err))
+      self.registry.enabled = False
+      self.registry = None
+      return
+    self.thread = threading.Thread(name="PluginMetrics", target=self.server.serve_forever)
+    self.thread.daemon = True
+    self.thread.start()
+    self.counters()
+    self.text = self.registry.Render()
+    Domoticz.Status("Metrics on http://%s:%d/metrics" % (address, port))
+
+  def counters(self):
+    # connection and callback counters, refreshed every heartbeat
+    registry = self.registry
+    connection = getattr(self.globals.get("_plugin"), "connection", None)
+    if connection is not None and hasattr(connection, "Counters"):
+      counters = connection.Counters()
+      registry.Set("connection_state", 1 if counters["state"] == "connected" else 0)
+      registry.Set("connection_attempts", counters["attempts"])
+      registry.Set("connection_failures", counters["failures"])
+      registry.Set("connection_uptime_seconds", round(counters["uptime"]))
+    stats = self.globals.get("_stats")
+    if stats is not None:
+      for name in stats.calls:
+        registry.Set("callback_calls", stats.calls[name], callback=name)
+        registry.Set("callback_errors", stats.errors[name], callback=name)
+        if stats.window[name].count > 0:
+          registry.Set("callback_p95_seconds", stats.window[name].Percentile(95), callback=name)
+
+  def Stop(self):
+    if self.server is not None:
+      self.server.shutdown()
+      self.server.server_close()
+      self.server = None
+      self.thread = None
+
+def Instrument(Globals, Names=Callbacks):
+  # wraps the callbacks in the plugin module globals, install after callbackstats, returns the Exporter
+  exporter = Exporter(Globals)
+  for name in Names:
+    function = Globals.get(name)
+    if callable(function):
+      Globals[name] = exporter.Wrap(name, function)
+  return exporter
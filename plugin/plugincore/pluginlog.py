@@ -0,0 +1,95 @@
+# Plugin logging
+#
+# Description: Lazy log formatting shared by all plugins. A message is a plain string, a '%' format
+#   string with its arguments or a callable returning the string. The caller checks the level
+#   (BasePlugin.Log / DumpVariable) so nothing is formatted when the level is filtered out.
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+# 1.0.1   18-10-2026  Bytes dumped with plugincore.hexdump (linear, truncated to hexdump.MaxLength)
+
+import Domoticz
+from plugincore import hexdump
+
+def Format(Message, Args=()):
+  # Message = string, format string (with Args) or callable
+  if callable(Message):
+    return str(Message(*Args))
+  if len(Args) > 0:
+    return Message % Args
+  return Message
+
+def Write(Message, Type, Args=()):
+  # Type [1=Normal, 2=Status, 3=Error]
+  text = Format(Message, Args)
+  if Type == 2:
+    Domoticz.Status(text)
+  elif Type == 3:
+    Domoticz.Error(text)
+  else:
+    Domoticz.Log(text)
+
+def DumpDeviceToLog(Device):
+  Domoticz.Log("%s:%s, (n:%s, s:%s, Sgl:%s, bl:%s, img:%s, typ:%s, styp:%s)" % (Device.ID, Device.Name, Device.nValue, Device.sValue, Device.SignalLevel, Device.BatteryLevel, Device.Image, Device.Type, Device.SubType))
+
+def DumpConfigToLog(Parameters, Devices, LogLevel):
+  if LogLevel >= 7:
+    for x in Parameters:
+      if Parameters[x] != "":
+        Domoticz.Log("'%s':'%s'" % (x, Parameters[x]))
+  if LogLevel >= 6:
+    Domoticz.Log("Device count: %d" % len(Devices))
+    for x in Devices:
+      DumpDeviceToLog(Devices[x])
+
+def DumpVariable(Item, Varname, BytesAsStr = False, Prefix=""):
+  # Level is checked by the caller
+  Prefix = str(Prefix)
+  if isinstance(Item, dict):
+    Domoticz.Log("%s%s (%s[%d]): " % (Prefix, Varname, type(Item).__name__, len(Item)))
+
+    if len(Prefix) < 3:
+      Prefix = "--> "
+    else:
+      Prefix = "--" + Prefix
+
+    for b in Item:
+      if isinstance(b, str):
+        DumpVariable(Item[b], "'" + b + "'", BytesAsStr, Prefix)
+      else:
+        DumpVariable(Item[b], str(b), BytesAsStr, Prefix)
+
+  elif isinstance(Item, (bytes, bytearray, memoryview)):
+    if BytesAsStr:
+      txt = hexdump.TextDump(Item)
+    else:
+      txt = hexdump.HexDump(Item)
+
+    Domoticz.Log("%s%s (%s[%d]): %s" % (Prefix, Varname, type(Item).__name__, len(Item), txt))
+  elif isinstance(Item, (tuple, list)):
+    Domoticz.Log("%s%s (%s[%d]): " % (Prefix, Varname, type(Item).__name__, len(Item)))
+
+    if len(Prefix) < 3:
+      Prefix = "--> "
+    else:
+      Prefix = "--" + Prefix
+
+    idx = 0
+    for b in Item:
+      DumpVariable(b, "[%d]" % idx, BytesAsStr, Prefix)
+      idx = idx + 1
+
+  elif isinstance(Item, str):
+    Domoticz.Log("%s%s (%s[%d]): '%s'" % (Prefix, Varname, type(Item).__name__, len(Item), Item))
+  else:
+    Domoticz.Log("%s%s (%s): %s" % (Prefix, Varname, type(Item).__name__, Item))
+
+def DumpFrame(Item, Varname, Layout=None):
+  # offset annotated dump for binary protocols, Layout = ((offset, length, name), ...)
+  Domoticz.Log("%s (%s[%d]):" % (Varname, type(Item).__name__, len(Item)))
+  for line in hexdump.HexLines(Item):
+    Domoticz.Log("--> " + line)
+  if Layout is not None:
+    Domoticz.Log("--> " + hexdump.Fields(Item, Layout))
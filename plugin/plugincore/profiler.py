@@ -0,0 +1,219 @@
+# Profiler
+#
+# Description: Opt-in profiling of a plugin on the real hardware. cProfile runs over the next N
+#   callbacks, tracemalloc takes a snapshot at the start and one after M heartbeats. The sorted reports
+#   (cumulative / own time per function, allocation growth and largest allocations per line) are written
+#   to profile_<hardware id>_<time>.txt in the plugin folder (a second run in the same second gets a _2,
+#   _3, ... suffix), after that profiling switches itself off.
+#   Started at onStart by the [profile] section of plugincore.ini (see settings.py) or at any time with
+#   the optional "Profile" switch (unit 251), Off stops early and writes what was collected.
+#   tracemalloc traces the whole Domoticz process, the reports only show the lines of the plugin folder
+#   and plugincore, without the allocations of the profiler itself.
+#
+#   plugincore.ini:
+#     [profile]
+#     enabled = true     ; profile from onStart
+#     device = true      ; create the Profile switch
+#     unit = 251
+#     callbacks = 500    ; callbacks profiled by cProfile
+#     heartbeats = 30    ; heartbeats between the two tracemalloc snapshots
+#     top = 25           ; lines per report
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+# 1.0.1   18-10-2026  Unique report names, own allocations left out of the memory report
+
+import io
+import os
+import time
+import pstats
+import cProfile
+import tracemalloc
+
+import Domoticz
+from plugincore import settings
+from plugincore import callbackstats
+
+Callbacks = callbackstats.Callbacks
+CoreFolder = os.path.dirname(os.path.abspath(__file__))
+ProfilerFile = os.path.abspath(__file__)
+
+class Profiler:
+
+  def __init__(self, Globals):
+    self.globals = Globals            # module globals of the plugin (Parameters, Devices)
+    self.homeFolder = None
+    self.device = False
+    self.unit = 251
+    self.callbacks = 500
+    self.heartbeats = 30
+    self.top = 25
+    self.active = False               # profiling mode
+    self.profile = None               # cProfile.Profile until the cpu report
+    self.calls = {}                   # name: profiled calls
+    self.started = None               # time.time() of the start
+    self.tracing = False              # tracemalloc started by this profiler
+    self.snapshot = None              # tracemalloc snapshot at the start
+    self.cpuReport = None
+    self.memoryReport = None
+    self.beats = 0
+
+  def Wrap(self, name, function):
+    def profiled(*args):
+      if name == "onCommand" and self.device and args[0] == self.unit:
+        self.command(args[1])         # the Profile switch is not a device of the plugin
+        return None
+      if name == "onStart":
+        self.start()
+      profile = self.profile
+      if profile is not None:
+        profile.enable()
+      try:
+        return function(*args)
+      finally:
+        if profile is not None:
+          profile.disable()
+          self.calls[name] = self.calls.get(name, 0) + 1
+        if self.active:
+          if self.snapshot is None:
+            self.snapshot = self.filter(tracemalloc.take_snapshot()) # after onStart
+          if name == "onHeartbeat":
+            self.beats += 1
+          self.tick(name == "onStop")
+    profiled.__name__ = name
+    return profiled
+
+  def start(self):
+    Parameters = self.globals.get("Parameters")
+    self.homeFolder = Parameters["HomeFolder"] if Parameters is not None and "HomeFolder" in Parameters else None
+    section = settings.Load(self.homeFolder)["profile"]
+    self.device = section.getboolean("device", False)
+    self.unit = section.getint("unit", 251)
+    self.callbacks = section.getint("callbacks", 500)
+    self.heartbeats = section.getint("heartbeats", 30)
+    self.top = section.getint("top", 25)
+
+    Devices = self.globals.get("Devices")
+    if self.device and Devices is not None and self.unit not in Devices:
+      Domoticz.Device(Name="Profile", Unit=self.unit, TypeName="Switch", Image=9).Create()
+    if section.getboolean("enabled", False):
+      self.Start(Snapshot=False)
+
+  def command(self, Command):
+    if Command.strip().capitalize() == "On":
+      self.Start()
+    else:
+      self.finish("stopped")
+
+  def Start(self, Snapshot=True):
+    # Snapshot = False: the first snapshot is taken after the running callback (onStart)
+    if self.active:
+      return
+    self.active = True
+    self.calls = {}
+    self.beats = 0
+    self.cpuReport = None
+    self.memoryReport = None
+    self.started = time.time()
+    if not tracemalloc.is_tracing():
+      tracemalloc.start()
+      self.tracing = True
+    self.snapshot = self.filter(tracemalloc.take_snapshot()) if Snapshot else None
+    self.profile = cProfile.Profile()
+    self.update(1)
+    Domoticz.Status("Profiling %d callbacks, memory over %d heartbeats" % (self.callbacks, self.heartbeats))
+
+  def tick(self, stopping):
+    if self.profile is not None and (sum(self.calls.values()) >= self.callbacks or stopping):
+      self.cpuReport = self.cpu()
+      self.profile = None
+    if self.memoryReport is None and (self.beats >= self.heartbeats or stopping):
+      self.memoryReport = self.memory()
+    if self.cpuReport is not None and self.memoryReport is not None:
+      self.finish("completed")
+
+  def finish(self, reason):
+    if not self.active:
+      return
+    if self.profile is not None:
+      self.cpuReport = self.cpu()
+      self.profile = None
+    if self.memoryReport is None:
+      self.memoryReport = self.memory()
+    self.active = False
+    self.snapshot = None
+    if self.tracing:
+      tracemalloc.stop()
+      self.tracing = False
+    self.write(reason)
+    self.update(0)
+
+  def filter(self, snapshot):
+    # only the allocations of the plugin folder and plugincore, the process is shared with other plugins
+    # the snapshots and reports of this module are left out, they would be the top entries
+    folders = [CoreFolder] + ([os.path.abspath(self.homeFolder)] if self.homeFolder else [])
+    filters = [tracemalloc.Filter(True, os.path.join(folder, "*")) for folder in folders]
+    return snapshot.filter_traces(filters + [tracemalloc.Filter(False, ProfilerFile)])
+
+  def cpu(self):
+    stream = io.StringIO()
+    stream.write("Calls: %s\n" % ", ".join(["%s %d" % (name, count) for name, count in sorted(self.calls.items())]))
+    if len(self.calls) == 0:
+      return stream.getvalue()
+    stats = pstats.Stats(self.profile, stream=stream)
+    stats.sort_stats("cumulative").print_stats(self.top)
+    stats.sort_stats("tottime").print_stats(self.top)
+    return stream.getvalue()
+
+  def memory(self):
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = self.filter(tracemalloc.take_snapshot())
+    lines = ["Traced memory of the process: %d KB, peak %d KB, after %d heartbeats" % (current // 1024, peak // 1024, self.beats), "", "Growth since the start:"]
+    if self.snapshot is not None:
+      lines.extend([str(stat) for stat in snapshot.compare_to(self.snapshot, "lineno")[:self.top]])
+    lines.extend(["", "Largest allocations:"])
+    lines.extend([str(stat) for stat in snapshot.statistics("lineno")[:self.top]])
+    return "\n".join(lines) + "\n"
+
+  def write(self, reason):
+    Parameters = self.globals.get("Parameters") or {}
+    basename = "profile_%s_%s" % (Parameters.get("HardwareID", 0), time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started)))
+    if self.homeFolder:
+      basename = os.path.join(self.homeFolder, basename)
+    filename = basename + ".txt"
+    sequence = 1
+    try:
+      while True:
+        try:
+          f = open(filename, "x")       # never overwrite the report of a run started in the same second
+          break
+        except FileExistsError:
+          sequence += 1
+          filename = "%s_%d.txt" % (basename, sequence)
+      with f:
+        f.write("Profile %s, %s after %.0f seconds\n\n" % (time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)), reason, time.time() - self.started))
+        f.write(self.cpuReport)
+        f.write("\n")
+        f.write(self.memoryReport)
+      Domoticz.Status("Profile %s, report written to '%s'" % (reason, filename))
+    except OSError as err:
+      Domoticz.Error("Unable to write profile '%s': %s" % (filename, err))
+
+  def update(self, nValue):
+    Devices = self.globals.get("Devices")
+    if self.device and Devices is not None and self.unit in Devices:
+      Devices[self.unit].Update(nValue=nValue, sValue="On" if nValue else "Off")
+
+  def Stop(self):
+    self.finish("stopped")
+
+def Instrument(Globals, Names=Callbacks):
+  # wraps the callbacks in the plugin module globals, install before capture and callbackstats, returns the Profiler
+  profiler = Profiler(Globals)
+  for name in Names:
+    function = Globals.get(name)
+    if callable(function):
+      Globals[name] = profiler.Wrap(name, function)
+  return profiler
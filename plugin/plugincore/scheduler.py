@@ -0,0 +1,104 @@
+# Scheduler
+#
+# Description: Hashed timer wheel for periodic tasks with their own interval, so one plugin can poll
+#   fast changing values often and slow ones rarely while Domoticz only has one heartbeat per plugin.
+#   The heartbeat is set to the resolution of the wheel and onHeartbeat calls Run(), which only visits
+#   the slots passed since the previous run. Tasks run on the plugin thread (Devices and connections
+#   may only be used there), blocking work belongs in a worker.
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+
+import math
+import time
+
+import Domoticz
+
+class Task:
+  __slots__ = ("name", "interval", "function", "target", "runs", "late")
+
+  def __init__(self, name, interval, function):
+    self.name = name
+    self.interval = interval          # seconds
+    self.function = function          # called without arguments
+    self.target = None                # tick at which the task is due, None while running
+    self.runs = 0
+    self.late = 0.0                   # worst lateness in seconds
+
+class Scheduler:
+
+  def __init__(self, Resolution=1.0, Slots=64):
+    self.resolution = float(Resolution) # seconds per tick, use as Domoticz heartbeat
+    self.slots = [[] for i in range(Slots)]
+    self.tasks = {}
+    self.origin = time.monotonic()
+    self.tick = 0
+
+  def ticks(self, now):
+    # ticks since the start, rounded so a heartbeat arriving a bit early still counts
+    return int(math.floor((now - self.origin) / self.resolution + 0.5))
+
+  def unlink(self, task):
+    if task.target is not None:
+      self.slots[task.target % len(self.slots)].remove(task)
+      task.target = None
+
+  def insert(self, task, delay):
+    # due after delay seconds, at least the next tick
+    task.target = self.tick + max(1, int(math.ceil(delay / self.resolution)))
+    self.slots[task.target % len(self.slots)].append(task)
+
+  def Add(self, Name, Interval, Function, Delay=None):
+    # register a periodic task, first run after Delay seconds (default Interval, 0 = next tick)
+    self.Remove(Name)
+    task = Task(Name, float(Interval), Function)
+    self.tasks[Name] = task
+    self.insert(task, task.interval if Delay is None else Delay)
+    return task
+
+  def Remove(self, Name):
+    task = self.tasks.pop(Name, None)
+    if task is not None:
+      self.unlink(task)
+
+  def Reschedule(self, Name, Delay=0):
+    # run a task earlier (or later), e.g. after a command
+    task = self.tasks.get(Name)
+    if task is not None:
+      self.unlink(task)
+      self.insert(task, Delay)
+
+  def Run(self, now=None):
+    # one tick per heartbeat, more when heartbeats were missed (a blocking callback), returns the number of tasks run
+    if now is None:
+      now = time.monotonic()
+    last = max(self.tick + 1, self.ticks(now))
+    count = 0
+    steps = min(last - self.tick, len(self.slots)) # after a long pause every slot is visited once
+    for step in range(steps):
+      slot = self.slots[(last - step) % len(self.slots)]
+      if len(slot) == 0:
+        continue
+      due = [task for task in slot if task.target <= last]
+      for task in due:
+        late = (last - task.target) * self.resolution
+        self.unlink(task)
+        if late > task.late:
+          task.late = late
+        task.runs += 1
+        count += 1
+        self.tick = last
+        try:
+          task.function()
+        except Exception as e:
+          Domoticz.Error("Task '%s' error: %s" % (task.name, e))
+        # never catch up on missed runs, not when removed or rescheduled by the task itself
+        if task.target is None and self.tasks.get(task.name) is task:
+          self.insert(task, task.interval)
+    self.tick = last
+    return count
+
+  def Summary(self):
+    return ", ".join(["%s every %.0fs runs %d late %.1fs" % (task.name, task.interval, task.runs, task.late) for task in self.tasks.values()])
@@ -0,0 +1,70 @@
+# Settings
+#
+# Description: Optional developer settings of the shared helpers, read from plugincore.ini in the
+#   plugin folder (Parameters["HomeFolder"]). The plugin parameters in the Domoticz UI are all in use,
+#   so diagnostics are switched on here. A missing file means all diagnostics are off.
+#
+#   Example plugincore.ini:
+#     [diagnostics]
+#     device = text      ; off | text | custom
+#     unit = 250
+#     interval = 300     ; seconds between device updates
+#     summary = 3600     ; seconds between log summaries, 0 = off
+#
+#     [capture]
+#     enabled = true     ; record onMessage payloads, see capture.py
+#     file = capture.bin ; relative to the plugin folder
+#     maxsize = 10240    ; KB, recording stops above this size
+#
+#     [metrics]
+#     enabled = true     ; OpenMetrics endpoint, see metrics.py
+#     address = 127.0.0.1
+#     port = 0           ; 0 = 9100 + hardware id
+#
+#     [recorder]
+#     device = true      ; Flight recorder push button, see flightrecorder.py
+#     unit = 252
+#
+#     [profile]
+#     enabled = true     ; cProfile / tracemalloc from onStart, see profiler.py
+#     device = true      ; Profile switch to start it later
+#     unit = 251
+#     callbacks = 500
+#     heartbeats = 30
+#     top = 25
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+# 1.0.1   18-10-2026  Capture section
+# 1.0.2   18-10-2026  Metrics section
+# 1.0.3   18-10-2026  Profile section
+# 1.0.4   18-10-2026  Recorder section
+
+import os
+import configparser
+
+import Domoticz
+
+FileName = "plugincore.ini"
+
+Defaults = {
+  "diagnostics": {"device": "off", "unit": "250", "interval": "300", "summary": "0"},
+  "capture": {"enabled": "false", "file": "capture.bin", "maxsize": "10240"},
+  "metrics": {"enabled": "false", "address": "127.0.0.1", "port": "0"},
+  "recorder": {"device": "false", "unit": "252"},
+  "profile": {"enabled": "false", "device": "false", "unit": "251", "callbacks": "500", "heartbeats": "30", "top": "25"},
+}
+
+def Load(HomeFolder):
+  config = configparser.ConfigParser(inline_comment_prefixes=(";", "#"))
+  config.read_dict(Defaults)
+  if HomeFolder:
+    try:
+      config.read(os.path.join(HomeFolder, FileName))
+    except configparser.Error as err:
+      Domoticz.Error("Invalid %s, using defaults: %s" % (FileName, err))
+      config = configparser.ConfigParser(inline_comment_prefixes=(";", "#"))
+      config.read_dict(Defaults)
+  return config
@@ -0,0 +1,96 @@
+# Snapshot
+#
+# Description: Warm start state of a plugin. Values set by the plugin are kept in a small json file in
+#   the plugin folder (one per hardware id), written atomically (temporary file, fsync, rename) when
+#   changed and on onStop, and restored in onStart. Restored values are stale until the plugin confirms
+#   them (Confirm) from a message of the device, a Set by the plugin itself (a command, onStop) keeps a
+#   restored value stale. Commands that depend on a restored value check IsStale.
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+# 1.0.1   18-10-2026  Only Confirm clears the stale mark
+
+import os
+import json
+import time
+
+import Domoticz
+
+def FileName(Parameters, Name="state"):
+  # state_<hardware id>.json in the plugin folder, several instances of a plugin share the folder
+  return os.path.join(Parameters.get("HomeFolder", ""), "%s_%s.json" % (Name, Parameters.get("HardwareID", 0)))
+
+class Snapshot:
+
+  def __init__(self, Filename, MinInterval=10.0):
+    self.filename = Filename
+    self.minInterval = MinInterval    # minimal seconds between two writes, except forced
+    self.values = {}
+    self.stale = set()                # restored and not yet confirmed
+    self.dirty = False
+    self.lastWrite = None
+    self.writes = 0
+
+  def Load(self):
+    # restores the values of the last run, all marked stale, returns False when there is nothing to restore
+    try:
+      with open(self.filename, "r") as f:
+        values = json.load(f)
+    except FileNotFoundError:
+      return False
+    except (OSError, ValueError) as e:
+      Domoticz.Error("Unable to restore state from '%s': %s" % (self.filename, e))
+      return False
+    if not isinstance(values, dict):
+      return False
+    self.values = values
+    self.stale = set(values.keys())
+    return True
+
+  def Get(self, Key, Default=None):
+    return self.values.get(Key, Default)
+
+  def Set(self, Key, Value):
+    # store a value, a restored one stays stale until Confirm. Lists / tuples / bytearrays are stored as lists
+    if isinstance(Value, (tuple, bytearray, bytes)):
+      Value = list(Value)
+    elif isinstance(Value, list):
+      Value = Value[:]
+    if self.values.get(Key) != Value or Key not in self.values:
+      self.values[Key] = Value
+      self.dirty = True
+
+  def Confirm(self, *Keys):
+    # the device reported the values
+    for key in Keys:
+      self.stale.discard(key)
+
+  def IsStale(self, Key):
+    return Key in self.stale
+
+  def Stale(self):
+    return sorted(self.stale)
+
+  def Save(self, Force=False):
+    # writes the values when changed, at most once per MinInterval unless forced
+    if not self.dirty:
+      return False
+    now = time.monotonic()
+    if not Force and self.lastWrite is not None and (now - self.lastWrite) < self.minInterval:
+      return False
+    tmpname = self.filename + ".tmp"
+    try:
+      with open(tmpname, "w") as f:
+        json.dump(self.values, f, separators=(",", ":"), sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+      os.replace(tmpname, self.filename)
+    except OSError as e:
+      Domoticz.Error("Unable to save state to '%s': %s" % (self.filename, e))
+      return False
+    self.dirty = False
+    self.lastWrite = now
+    self.writes += 1
+    return True
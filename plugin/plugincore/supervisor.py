@@ -0,0 +1,167 @@
+# Connection supervisor
+#
+# Description: Connection handling shared by the networked plugins. Keeps one Domoticz.Connection in
+#   the states idle / connecting / connected / backoff. Failed connects are retried after an exponential
+#   backoff with jitter up to a maximum (a device that is switched off is not polled every heartbeat),
+#   a user command retries at once. Counts connect attempts, connects, failures and connected time.
+#   Send / Disconnect / Connected / Address / Port are passed to the current connection.
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+
+import time
+import random
+
+Idle = "idle"
+Connecting = "connecting"
+Connected = "connected"
+Backoff = "backoff"
+
+class ConnectionSupervisor:
+
+  def __init__(self, Factory, MinBackoff=10.0, MaxBackoff=300.0, Jitter=0.25, ConnectTimeout=0, RecreateOnDisconnect=False, Log=None):
+    self.factory = Factory            # returns a new Domoticz.Connection
+    self.minBackoff = MinBackoff      # seconds after the first failure
+    self.maxBackoff = MaxBackoff      # upper limit while the device stays off
+    self.jitter = Jitter              # +/- fraction of the backoff
+    self.connectTimeout = ConnectTimeout # seconds before a pending connect is abandoned, 0 = never
+    self.recreate = RecreateOnDisconnect # new Domoticz.Connection after a lost connection
+    self.log = Log                    # BasePlugin.Log(Message, Level, Type, *Args)
+
+    self.connection = None
+    self.state = Idle
+    self.failures = 0                 # consecutive failures
+    self.nextAttempt = 0.0
+    self.connectStarted = 0.0
+    self.connectedSince = None
+
+    self.attempts = 0                 # counters since start
+    self.connects = 0
+    self.failed = 0
+    self.uptime = 0.0
+
+  def Log(self, Message, Level, Type, *Args):
+    if self.log is not None:
+      self.log(Message, Level, Type, *Args)
+
+  ####################### state handling #######################
+  def Check(self, CheckOnly=False):
+    # returns True when connected, otherwise starts a connect unless CheckOnly or backing off
+    now = time.monotonic()
+    try:
+      if self.connection is None:
+        self.connection = self.factory()
+      if self.connection.Connected():
+        if self.state != Connected:
+          self.connected(now)
+        return True
+      if self.connection.Connecting():
+        if self.connectTimeout > 0 and (now - self.connectStarted) > self.connectTimeout:
+          self.Log("Connect attempt took more than %.1f seconds, connection destroyed", 5, 3, now - self.connectStarted)
+          self.connection = None
+          self.failure(now)
+        return False
+      if self.state == Connected:
+        self.disconnected(now)      # lost without onDisconnect
+      if CheckOnly or (self.state == Backoff and now < self.nextAttempt):
+        return False
+
+      self.attempts += 1
+      self.state = Connecting
+      self.connectStarted = now
+      self.Log("Connecting to %s:%s, attempt %d", 9, 1, self.connection.Address, self.connection.Port, self.failures + 1)
+      self.connection.Connect()
+    except Exception as e:
+      self.connection = None
+      self.failure(now)
+      self.Log("CheckConnection error, try to reset: %s", 1, 3, e)
+    return False
+
+  def Kick(self):
+    # user command: skip a pending backoff and connect now
+    if self.state == Backoff:
+      self.nextAttempt = 0.0
+    return self.Check()
+
+  def Reset(self):
+    # drop the connection, the next Check creates a new one
+    if self.state == Connected:
+      self.disconnected(time.monotonic())
+    self.connection = None
+    if self.state != Backoff:
+      self.state = Idle
+
+  def OnConnect(self, Status):
+    # call from onConnect
+    now = time.monotonic()
+    if Status == 0:
+      if self.state != Connected:
+        self.connected(now)
+    else:
+      self.failure(now)
+
+  def OnDisconnect(self):
+    # call from onDisconnect
+    if self.state == Connected:
+      self.disconnected(time.monotonic())
+    elif self.state == Connecting:
+      self.state = Idle
+
+  def connected(self, now):
+    self.state = Connected
+    self.failures = 0
+    self.connects += 1
+    self.connectedSince = now
+
+  def disconnected(self, now):
+    self.uptime += now - self.connectedSince
+    self.connectedSince = None
+    self.state = Idle
+    if self.recreate:
+      self.connection = None
+
+  def failure(self, now):
+    self.failures += 1
+    self.failed += 1
+    delay = self.minBackoff * (2 ** min(self.failures - 1, 16))
+    delay = min(self.maxBackoff, delay * (1.0 + random.uniform(-self.jitter, self.jitter)))
+    self.nextAttempt = now + delay
+    self.state = Backoff
+    self.Log("Connect failed %d times, retry in %.0f seconds", 6, 1, self.failures, delay)
+
+  ####################### statistics #######################
+  def Uptime(self):
+    if self.connectedSince is None:
+      return self.uptime
+    return self.uptime + time.monotonic() - self.connectedSince
+
+  def Counters(self):
+    return {"state": self.state, "attempts": self.attempts, "connects": self.connects, "failures": self.failed, "uptime": self.Uptime()}
+
+  def Summary(self):
+    return "state %s, attempts %d, connects %d, failures %d, uptime %.0f seconds" % (self.state, self.attempts, self.connects, self.failed, self.Uptime())
+
+  ####################### Domoticz.Connection #######################
+  def Connected(self):
+    return self.connection is not None and self.connection.Connected()
+
+  def Connecting(self):
+    return self.connection is not None and self.connection.Connecting()
+
+  def Send(self, Message, Delay=0):
+    if self.connection is not None:
+      self.connection.Send(Message, Delay=Delay)
+
+  def Disconnect(self):
+    if self.connection is not None:
+      self.connection.Disconnect()
+
+  @property
+  def Address(self):
+    return self.connection.Address if self.connection is not None else ""
+
+  @property
+  def Port(self):
+    return self.connection.Port if self.connection is not None else ""
@@ -0,0 +1,149 @@
+# Worker pool
+#
+# Description: Bounded pool of worker threads for blocking I/O (modbus reads, subprocesses) so the
+#   plugin thread is not blocked by a slow device. Jobs are queued by Submit(), the result of a job is
+#   put in a result queue by the worker and handed to the callback of the job by Drain(), which the
+#   plugin calls from its callbacks (onHeartbeat), so Devices and Domoticz are only used from the
+#   plugin thread. Jobs must not call Domoticz themselves.
+#   A job that is not done before its timeout is reported to the callback as TimeoutError, its late
+#   result is dropped. Python can not stop a thread, so the job itself must use a timeout on its I/O,
+#   a job with a name is not queued again while the previous one is still running.
+#   Stop() must be called in onStop, Domoticz does not stop a plugin with running threads.
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+
+import time
+import queue
+import threading
+import collections
+
+import Domoticz
+
+class Job:
+  __slots__ = ("name", "function", "args", "callback", "deadline", "result", "error", "duration", "timedOut")
+
+  def __init__(self, name, function, args, callback, deadline):
+    self.name = name
+    self.function = function          # runs on a worker thread
+    self.args = args
+    self.callback = callback          # Callback(Result, Error) on the plugin thread, Error None when ok
+    self.deadline = deadline          # time.monotonic() after which the job is timed out
+    self.result = None
+    self.error = None
+    self.duration = 0.0
+    self.timedOut = False
+
+class WorkerPool:
+
+  def __init__(self, Threads=1, MaxQueue=8, Timeout=30.0):
+    self.timeout = Timeout            # default seconds between Submit and result
+    self.jobs = queue.Queue(MaxQueue)
+    self.results = collections.deque() # done jobs, appended by the workers
+    self.pending = []                 # submitted and not yet done, plugin thread only
+    self.names = set()                # names of the pending jobs
+    self.threads = []
+    self.running = True
+
+    self.submitted = 0                # counters since start
+    self.rejected = 0
+    self.done = 0
+    self.errors = 0
+    self.timeouts = 0
+    self.busy = 0.0                   # seconds spent in jobs
+
+    for i in range(Threads):
+      thread = threading.Thread(name="PluginWorker%d" % i, target=self.work)
+      thread.daemon = True
+      thread.start()
+      self.threads.append(thread)
+
+  def work(self):
+    # worker thread, no Domoticz calls here
+    while True:
+      job = self.jobs.get()
+      if job is None:
+        break
+      start = time.monotonic()
+      try:
+        job.result = job.function(*job.args)
+      except Exception as e:
+        job.error = e
+      job.duration = time.monotonic() - start
+      self.results.append(job)
+
+  def Submit(self, Function, Args=(), Callback=None, Name=None, Timeout=None):
+    # queue a job, returns False when the queue is full or the job with this name is still pending
+    if not self.running or (Name is not None and Name in self.names):
+      self.rejected += 1
+      return False
+    job = Job(Name, Function, Args, Callback, time.monotonic() + (self.timeout if Timeout is None else Timeout))
+    try:
+      self.jobs.put_nowait(job)
+    except queue.Full:
+      self.rejected += 1
+      return False
+    self.pending.append(job)
+    if Name is not None:
+      self.names.add(Name)
+    self.submitted += 1
+    return True
+
+  def Drain(self):
+    # call from the plugin thread, runs the callbacks of done and timed out jobs, returns the number of callbacks
+    count = 0
+    while len(self.results) > 0:
+      job = self.results.popleft()
+      self.pending.remove(job)
+      self.names.discard(job.name)
+      self.busy += job.duration
+      if job.timedOut:
+        continue                      # already reported
+      self.done += 1
+      if job.error is not None:
+        self.errors += 1
+      count += self.report(job, job.result, job.error)
+
+    if len(self.pending) > 0:
+      now = time.monotonic()
+      for job in self.pending:
+        if not job.timedOut and now > job.deadline:
+          job.timedOut = True
+          self.timeouts += 1
+          count += self.report(job, None, TimeoutError("%s not done within timeout" % (job.name or job.function.__name__)))
+    return count
+
+  def report(self, job, result, error):
+    if job.callback is not None:
+      try:
+        job.callback(result, error)
+      except Exception as e:
+        Domoticz.Error("Job '%s' callback error: %s" % (job.name or job.function.__name__, e))
+    elif error is not None:
+      Domoticz.Error("Job '%s' error: %s" % (job.name or job.function.__name__, error))
+    return 1
+
+  def Pending(self, Name=None):
+    if Name is None:
+      return len(self.pending)
+    return Name in self.names
+
+  def Stop(self, Timeout=5.0):
+    # call from onStop: finishes the queued jobs (at most Timeout seconds) and runs their callbacks
+    self.running = False
+    deadline = time.monotonic() + Timeout
+    for thread in self.threads:
+      try:
+        self.jobs.put(None, timeout=max(0.0, deadline - time.monotonic()))
+      except queue.Full:
+        break
+    for thread in self.threads:
+      thread.join(max(0.0, deadline - time.monotonic()))
+    self.threads = [thread for thread in self.threads if thread.is_alive()]
+    self.Drain()
+    return len(self.threads) == 0
+
+  def Summary(self):
+    return "jobs %d, rejected %d, errors %d, timeouts %d, busy %.1f seconds" % (self.submitted, self.rejected, self.errors, self.timeouts, self.busy)
@@ -15,9 +15,21 @@
 # 1.1.3   09-09-2018  Variable PWM step
 # 1.1.4   14-09-2018  PWM initialized as ms
 # 1.2.0   15-09-2018  Added device to control speed, improved integrator
+# 1.2.1   18-10-2026  Lazy log formatting via plugincore
+# 1.2.2   18-10-2026  Callback latency histograms via plugincore.callbackstats
+# 1.2.3   18-10-2026  Per task intervals via plugincore.scheduler
+# 1.2.4   18-10-2026  Blocking I/O on a worker thread via plugincore.workerpool
+# 1.2.5   18-10-2026  Per instance state (__slots__)
+# 1.2.6   18-10-2026  Flight recorder of recent log events, dumped on errors
+# 1.2.7   18-10-2026  OpenMetrics endpoint via plugincore.metrics
+# 1.2.8   18-10-2026  Profiling mode via plugincore.profiler
+# 1.2.9   18-10-2026  Errors dump the flight recorder at every debug level, optional dump push button
+# 1.2.10  18-10-2026  Free disk space via os.statvfs, df could block the worker
+# 1.2.11  18-10-2026  Removed unused html import, remaining log messages formatted lazily
+# 1.2.12  18-10-2026  Errors filtered out by the debug level dump only the last 16 flight recorder events
 
 """
-<plugin key="RaspberryInfo" name="System Status" author="elgringo" version="1.2.0" externallink="https://github.com/ericstaal/domoticz/blob/master/">
+<plugin key="RaspberryInfo" name="System Status" author="elgringo" version="1.2.12" externallink="https://github.com/ericstaal/domoticz/blob/master/">
   <params>
     <param field="Mode1" label="Size" width="50px" required="true">
       <options>
@@ -94,54 +106,77 @@ import Domoticz
 import collections 
 import base64
 import binascii
-from html import escape
 
-# additional imports
+# shared helpers (plugin/plugincore)
 import os
-from subprocess import Popen, PIPE
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from plugincore import pluginlog
+from plugincore import callbackstats
+from plugincore import scheduler
+from plugincore import workerpool
+from plugincore import flightrecorder
+from plugincore import metrics
+from plugincore import profiler
+
+# additional imports
+from subprocess import Popen, PIPE, TimeoutExpired
 import shlex
 
 class BasePlugin:
-  logLevel = 0                # logLevel
-  
-  temperature = -1
-  lastcontroltemperature = -1
-  actualpwm = -1
-  
-  maxtemperature = 45
-  mintemperature = 30
-  port = -1
-  pwmstep = 1
-  minpwm = 250
-  maxpwm = 2048
+  # state per instance, no shared class level lists / dictionaries
+  __slots__ = ("logLevel", "scheduler", "workers", "temperature", "lastcontroltemperature", "actualpwm", "maxtemperature", "mintemperature", "port", "pwmstep", "minpwm", "maxpwm", "initialized", "recorder", "metrics")
   
+  commandTimeout = 10         # seconds
   pwmclock = 1 
   
-  initialized = False
- 
+  def __init__(self):
+    self.logLevel = 0                # logLevel
+    self.recorder = flightrecorder.FlightRecorder() # recent log events, also the filtered ones
+    self.metrics = metrics.Registry("domoticz_raspberry") # readings served by plugincore.metrics
+    self.metrics.Define("temperature_celsius", "gauge", "CPU temperature")
+    self.metrics.Define("disk_free_bytes", "gauge", "Free space of the root file system")
+    self.metrics.Define("fan_pwm", "gauge", "Fan PWM value")
+    self.metrics.Define("fan_pwm_max", "gauge", "Fan PWM range")
+    self.scheduler = None            # periodic tasks
+    self.workers = None              # worker thread for df / gpio, the plugin thread is not blocked by a subprocess
+    
+    self.temperature = -1
+    self.lastcontroltemperature = -1
+    self.actualpwm = -1
+    
+    self.maxtemperature = 45
+    self.mintemperature = 30
+    self.port = -1
+    self.pwmstep = 1
+    self.minpwm = 250
+    self.maxpwm = 2048
+    
+    self.initialized = False
+
   def onStart(self):
     try:
       self.logLevel = int(Parameters["Mode6"])
     except:
-      self.Log("Debuglevel '"+Parameters["Mode6"]+"' is not an integer", 1, 3)
+      self.Log("Debuglevel '%s' is not an integer", 1, 3, Parameters["Mode6"])
     
     try:
       self.maxtemperature = int(Parameters["Address"])
     except:
-      self.Log("Temperature fan maximal speed '"+Parameters["Address"]+"' is not an integer", 1, 3)
+      self.Log("Temperature fan maximal speed '%s' is not an integer", 1, 3, Parameters["Address"])
     
     try:
       self.mintemperature = int(Parameters["Mode4"])      
     except:
-      self.Log("Temperature fan minimal speed '"+Parameters["Mode4"]+"' is not an integer", 1, 3)  
+      self.Log("Temperature fan minimal speed '%s' is not an integer", 1, 3, Parameters["Mode4"])  
    
     try:
       self.maxpwm = int(Parameters["Mode5"])
       if self.maxpwm < 0:
-        self.Log("Minimal fan speed must be greate than 0 and is "+str(self.maxpwm)+", set to 256", 1, 3)   
+        self.Log("Minimal fan speed must be greate than 0 and is %s, set to 256", 1, 3, self.maxpwm)   
         self.maxpwm = 256;
     except:
-      self.Log("Maximal fan speed '"+Parameters["Mode5"]+"' is not an integer", 1, 3)
+      self.Log("Maximal fan speed '%s' is not an integer", 1, 3, Parameters["Mode5"])
 
     try:
       self.minpwm = int(Parameters["Mode3"])
@@ -150,18 +185,18 @@ class BasePlugin:
           newpwm = 100;
         else:
           newpwm = self.maxpwm;
-        self.Log("Minimal fan speed must be between 0 and "+str(self.maxpwm)+" and is "+str(self.minpwm)+", set to "+str(newpwm), 1, 3)   
+        self.Log("Minimal fan speed must be between 0 and %s and is %s, set to %s", 1, 3, self.maxpwm, self.minpwm, newpwm)   
         self.minpwm = newpwm
     except:
-      self.Log("Minimal fan speed '"+Parameters["Mode3"]+"' is not an integer", 1, 3)    
+      self.Log("Minimal fan speed '%s' is not an integer", 1, 3, Parameters["Mode3"])    
 
     try:
       self.port = int(Parameters["Port"])
     except:
-      self.Log("Port '"+Parameters["Port"]+"' is not an integer", 1, 3)      
+      self.Log("Port '%s' is not an integer", 1, 3, Parameters["Port"])      
       
     if self.mintemperature > self.maxtemperature:
-      self.Log("Minimal temp is larger ("+str(self.mintemperature)+") than maximal temperature ("+str(self.maxtemperature)+"), temperatures swapped",1, 2)  
+      self.Log("Minimal temp is larger (%s) than maximal temperature (%s), temperatures swapped", 1, 2, self.mintemperature, self.maxtemperature)  
       tmp = self.mintemperature
       self.mintemperature = self.maxtemperature
       self.maxtemperature = tmp
@@ -169,7 +204,13 @@ class BasePlugin:
     if self.logLevel == 10:
       Domoticz.Debugging(1)
        
-    Domoticz.Heartbeat(int(Parameters["Mode2"]))
+    # temperature and fan control every heartbeat, free disk space changes slowly
+    interval = int(Parameters["Mode2"])
+    Domoticz.Heartbeat(interval)
+    self.scheduler = scheduler.Scheduler(interval)
+    self.scheduler.Add("temperature", interval, self.updateTemperature, Delay=0)
+    self.scheduler.Add("disk space", max(300, interval), self.updateDiskSpace, Delay=0)
+    self.workers = workerpool.WorkerPool(Threads=1, MaxQueue=16, Timeout=self.commandTimeout + interval)
     
     if (1 not in Devices):
       Domoticz.Device(Name="Free space", Unit=1, TypeName="Custom", Image=3, Options={"Custom": ("1;" + Parameters["Mode1"])}).Create()
@@ -186,13 +227,13 @@ class BasePlugin:
       cmd4 = 'gpio pwmr '+str(self.maxpwm) # default 1024
       
       # PWM freq = 19200000 / pwmc / pwmr -> higher is better
-      exitcode, out, err = self.ExecuteCommand(cmd1)
-      exitcode, out, err = self.ExecuteCommand(cmd2)
-      exitcode, out, err = self.ExecuteCommand(cmd3)
-      exitcode, out, err = self.ExecuteCommand(cmd4)
+      self.RunCommand(cmd1)
+      self.RunCommand(cmd2)
+      self.RunCommand(cmd3)
+      self.RunCommand(cmd4)
       
-      self.Log("Initialized fan with '"+cmd1+"', '"+cmd2+"', '"+cmd3+"', '"+cmd4+"'", 4, 2)
-      self.Log("Fan speed ["+str(self.minpwm)+","+str(self.maxpwm)+"] in "+str(self.pwmstep)+" step(s) between ["+str(self.mintemperature)+","+str(self.maxtemperature)+"]. Starting fan at max speed to make it rotate",1, 2)  
+      self.Log("Initialized fan with '%s', '%s', '%s', '%s'", 4, 2, cmd1, cmd2, cmd3, cmd4)
+      self.Log("Fan speed [%s,%s] in %s step(s) between [%s,%s]. Starting fan at max speed to make it rotate", 1, 2, self.minpwm, self.maxpwm, self.pwmstep, self.mintemperature, self.maxtemperature)  
       self.setPWM(self.maxpwm, True)
   
     self.DumpConfigToLog()
@@ -203,14 +244,19 @@ class BasePlugin:
     if self.port >= 0:
     
       cmd = 'gpio -g mode '+str(self.port)+' in'
-      exitcode, out, err = self.ExecuteCommand(cmd)
-      self.Log("Stopped: Executed command '"+cmd+"', result:"+str(exitcode), 6, 1)
+      self.RunCommand(cmd)
+      self.Log("Stopped: Executed command '%s'", 6, 1, cmd)
     else:
       self.Log("Stopped", 9, 1)
+      
+    # waits for the gpio commands
+    if not self.workers.Stop(self.commandTimeout):
+      self.Log("Command still running at stop", 1, 2)
+    self.Log("Worker %s", 6, 1, self.workers.Summary())
     return
 
   def onConnect(self, Connection, Status, Description):
-    self.Log("onConnect "+Connection.Address+":"+Connection.Port+" Status: "+ str(Status)+", Description:"+str(Description), 7, 1)
+    self.Log("onConnect %s:%s Status: %s, Description:%s", 7, 1, Connection.Address, Connection.Port, Status, Description)
 
     return
 
@@ -221,7 +267,7 @@ class BasePlugin:
 
   def onCommand(self, Unit, Command, Level, Hue):
     CommandStr = str(Command)
-    self.Log("onCommand called for Unit " + str(Unit) + ": Parameter '" + CommandStr + "', Level: " + str(Level)+", Hue: " + str(Hue), 8, 1)
+    self.Log("onCommand called for Unit %s: Parameter '%s', Level: %s, Hue: %s", 8, 1, Unit, Command, Level, Hue)
 
     if (Unit == 3):
       if ( CommandStr == "Set Level" ):
@@ -232,62 +278,85 @@ class BasePlugin:
       elif ( CommandStr == "On"):
         self.setPWM(self.maxpwm, True, True)
       else:
-        self.Log("Unknown command "+CommndStr, 2,3)
+        self.Log("Unknown command %s", 2, 3, CommandStr)
     return
 
   def onNotification(self, Name, Subject, Text, Status, Priority, Sound, ImageFile):
-    self.Log("onNotification: " + Name + "," + Subject + "," + Text + "," + Status + "," + str(Priority) + "," + Sound + "," + ImageFile, 8, 1)
+    self.Log("onNotification: %s,%s,%s,%s,%s,%s,%s", 8, 1, Name, Subject, Text, Status, Priority, Sound, ImageFile)
     
     return
 
   def onDisconnect(self, Connection):
-    self.Log("onDisconnect "+Connection.Address+":"+Connection.Port, 7, 1)
+    self.Log("onDisconnect %s:%s", 7, 1, Connection.Address, Connection.Port)
 
     return
 
   def onHeartbeat(self):
     self.Log("onHeartbeat called", 9, 1)
-    try:
-      # size
-      proces = os.popen("df -k | grep -vE '^Filesystem|tmpfs|cdrom' | awk '{ print $6 \" \" $4 }'")
-      data = proces.read()
-      proces.close()
-      
-      # / 1.5g
-      # /boot ...
-      for line in data.split("\n"):
-        koloms = line.split(' ')
-        if koloms[0] == '/':
-          size = float(koloms[1])
-          
-          if (size > 0):
-            
-            if Parameters["Mode1"] == "Gb":
-              size = size / 1048576
-            elif Parameters["Mode1"] == "Mb":
-              size = size / 1024
-            
-            self.UpdateDevice(1, 0, round(size,1))
-          break 
+    self.workers.Drain()              # results of the previous heartbeat
+    self.scheduler.Run()
       
+    return
+    
+   
+####################### Specific helper functions for plugin #######################  
+  def updateDiskSpace(self):
+    if not self.workers.Submit(self.readDiskSpace, Callback=self.diskSpaceRead, Name="disk space"):
+      self.Log("Previous disk space read still running", 5, 2)
+    return
+    
+  def readDiskSpace(self):
+    # worker thread, free space of / in Kb (available to non-root, the Available column of df). statvfs
+    # only asks the root file system, df stats every mount and hangs on a stale NFS mount
+    stat = os.statvfs("/")
+    return float(stat.f_bavail * stat.f_frsize) / 1024
+    
+  def diskSpaceRead(self, size, Error):
+    try:
+      if Error is not None:
+        raise Error
+      if (size > 0):
+        self.metrics.Set("disk_free_bytes", int(size) * 1024)
+        
+        if Parameters["Mode1"] == "Gb":
+          size = size / 1048576
+        elif Parameters["Mode1"] == "Mb":
+          size = size / 1024
+        
+        self.UpdateDevice(1, 0, round(size,1))
+        
+    except Exception as e:
+      self.Log("Disk space error: %s", 1, 3, e)
       
+    return
+    
+  def updateTemperature(self):
+    if not self.workers.Submit(self.readTemperature, Callback=self.temperatureRead, Name="temperature"):
+      self.Log("Previous temperature read still running", 5, 2)
+    return
+    
+  def readTemperature(self):
+    # worker thread, millidegrees
+    with open("/sys/class/thermal/thermal_zone0/temp", "r") as f:
+      return int(f.read())
+    
+  def temperatureRead(self, data, Error):
+    try:
+      if Error is not None:
+        raise Error
       # temperature
-      proces = os.popen("cat /sys/class/thermal/thermal_zone0/temp")
-      data = proces.read()   
-      proces.close()
-      self.temperature = round(int(data) / 1000,1)
+      self.temperature = round(data / 1000,1)
+      self.metrics.Set("temperature_celsius", self.temperature)
       
       self.UpdateDevice(2, 0, self.temperature )
       
       self.updatePWM()
         
     except Exception as e:
-      self.Log("OnHeartbeat Error: "+ str(e),1,3)
+      self.Log("Temperature error: %s", 1, 3, e)
       
     return
     
-   
-####################### Specific helper functions for plugin #######################  
   def setPWM(self, pwmvalue, force, manual=False):
     if pwmvalue > self.maxpwm :
       pwmvalue = self.maxpwm 
@@ -301,21 +370,22 @@ class BasePlugin:
       if (self.actualpwm + self.pwmstep) <= pwmvalue or (self.actualpwm - self.pwmstep) >= pwmvalue or force:
         # must update 
         if manual:
-          self.Log("Update PWM (manually)from "+str(self.actualpwm)+"/"+str(self.maxpwm )+" to "+str(pwmvalue)+"/"+str(self.maxpwm ), 4, 2)
+          self.Log("Update PWM (manually)from %d/%d to %d/%d", 4, 2, self.actualpwm, self.maxpwm, pwmvalue, self.maxpwm)
         else:
-          self.Log("Update PWM from "+str(self.actualpwm)+"/"+str(self.maxpwm )+" to "+str(pwmvalue)+"/"+str(self.maxpwm )+". Current temperature "+str(self.temperature)+", control temperature:"+str(round(self.lastcontroltemperature *10)/10), 6, 1)
+          self.Log("Update PWM from %d/%d to %d/%d. Current temperature %s, control temperature:%.1f", 6, 1, self.actualpwm, self.maxpwm, pwmvalue, self.maxpwm, self.temperature, self.lastcontroltemperature)
         self.actualpwm = pwmvalue
+        self.metrics.Set("fan_pwm", pwmvalue)
+        self.metrics.Set("fan_pwm_max", self.maxpwm)
         
         cmd = 'gpio -g pwm '+str(self.port)+' '+str(self.actualpwm)
-        exitcode, out, err = self.ExecuteCommand(cmd)
-        self.Log("Executed command '"+cmd+"'", 7, 1)
+        self.RunCommand(cmd)
    
         # update ui
         if (3 in Devices):
           uivalue = int(round((pwmvalue*100)/self.maxpwm))
           self.UpdateDevice(3,2,str(uivalue))
       else:
-         self.Log("PWM already set to "+str(self.actualpwm)+"/"+str(self.maxpwm ), 9, 1)
+         self.Log("PWM already set to %d/%d", 9, 1, self.actualpwm, self.maxpwm)
     return
   
   def updatePWM(self):
@@ -341,21 +411,38 @@ class BasePlugin:
 
     return
  
-  def ExecuteCommand(self, cmd):
+  def RunCommand(self, cmd):
+    # executed in order by the worker thread, the result is logged in a next heartbeat
+    if not self.workers.Submit(self.ExecuteCommand, (cmd,), lambda result, error: self.commandDone(cmd, result, error)):
+      self.Log("Failed to execute '%s': too many commands queued", 1, 3, cmd)
+    return
     
+  def commandDone(self, cmd, result, error):
+    if error is not None:
+      self.Log("Failed to execute '%s': %s", 1, 3, cmd, error)
+      return
+    exitcode, out, err = result
+    if (exitcode != 0):
+      self.Log("Failed to execute '%s': result:%s, out:'%s', err:'%s'", 3, 2, cmd, exitcode, out, err)
+    else:
+      self.Log("Executed command '%s'", 7, 1, cmd)
+    return
+ 
+  def ExecuteCommand(self, cmd):
+    # worker thread
     args = shlex.split(cmd)
 
     proc = Popen(args, stdout=PIPE, stderr=PIPE)
-    out, err = proc.communicate()
+    try:
+      out, err = proc.communicate(timeout=self.commandTimeout)
+    except TimeoutExpired:
+      proc.kill()
+      out, err = proc.communicate()
     out = out.decode("utf-8") 
     err = err.decode("utf-8") 
     
     exitcode = proc.returncode
     
-    if (exitcode != 0):
-      self.Log("Failed to execute '"+cmd+"': result:"+str(exitcode)+", out:'"+out+"', err:'"+err+"'", 3, 2)
-   
-    
     return exitcode, out, err
 
 ####################### Generic helper member functions for plugin ####################### 
@@ -377,79 +464,28 @@ class BasePlugin:
         sValue = str(sValue1)+";"+str(sValue2)
         
       if (Devices[Unit].nValue != nValue) or (Devices[Unit].sValue != sValue):
-        self.Log("Update ["+Devices[Unit].Name+"] from: ('"+str(Devices[Unit].nValue)+":'"+str(Devices[Unit].sValue )+"') to: ("+str(nValue)+":'"+str(sValue)+"')", 5, 1)
+        self.Log("Update [%s] from: ('%s:'%s') to: (%s:'%s')", 5, 1, Devices[Unit].Name, Devices[Unit].nValue, Devices[Unit].sValue, nValue, sValue)
         Devices[Unit].Update(nValue, sValue)
     return
    
-  def DumpDeviceToLog(self,Unit):
-    self.Log(str(Devices[Unit].ID)+":"+Devices[Unit].Name+", (n:"+str(Devices[Unit].nValue)+", s:"+Devices[Unit].sValue+", Sgl:"+str(Devices[Unit].SignalLevel)+", bl:"+str(Devices[Unit].BatteryLevel)+", img:"+ str(Devices[Unit].Image)+", typ:"+ str(Devices[Unit].Type)+", styp:"+ str(Devices[Unit].SubType)+")", 6, 1)
-    return   
-    
   def DumpConfigToLog(self):
-    for x in Parameters:
-      if Parameters[x] != "":
-        self.Log( "'" + x + "':'" + str(Parameters[x]) + "'", 7, 1)
-    self.Log("Device count: " + str(len(Devices)), 6, 1)
-    for x in Devices:
-      self.DumpDeviceToLog(x)
+    pluginlog.DumpConfigToLog(Parameters, Devices, self.logLevel)
     return
     
   def DumpVariable(self, Item, Varname, Level = 5, BytesAsStr = False, Prefix=""):
+    self.recorder.RecordData(Varname, Item)
     if self.logLevel >= Level:
-      Prefix = str(Prefix)
-      if isinstance(Item, dict):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        for b in Item:
-          if isinstance(b, str):
-            self.DumpVariable( Item[b], "'"+str(b) + "'", Level, BytesAsStr, Prefix)
-          else:
-            self.DumpVariable( Item[b], str(b), Level, BytesAsStr, Prefix)
-         
-      elif isinstance(Item, (bytes, bytearray)):
-        if BytesAsStr:
-          txt = escape(Item.decode("utf-8", "ignore"))
-        else:
-          txt = "[ " 
-          for b in Item:
-            txt += '0x{:02X} '.format(b)
-          txt +=  "]"
-        
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): " + txt, Level, 1)
-      elif isinstance(Item, (tuple, list)):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): ", Level, 1)
-        
-        if len(Prefix) < 3:
-          Prefix = "--> "
-        else:
-          Prefix = "--" + Prefix
-          
-        idx = 0
-        for b in Item:
-          self.DumpVariable( b, "["+str(idx) + "]", Level, BytesAsStr, Prefix)
-          idx=idx+1
-
-      elif isinstance(Item, str):
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"["+str(len(Item))+"]): '"+Item+"'", Level, 1)
-      else:
-        self.Log(Prefix + str(Varname) + " ("+type(Item).__name__+"): "+str(Item), Level, 1)
-           
+      pluginlog.DumpVariable(Item, Varname, BytesAsStr, Prefix)
     return
 
-  def Log(self, Message, Level, Type):
-    # Message = string, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+  def Log(self, Message, Level, Type, *Args):
+    # Message = string, format string with Args or callable, Level [0-10], Type [1=Normal, 2=Status, 3=Error]
+    # Message is only formatted when Level is not filtered out, the flight recorder keeps it unformatted
+    self.recorder.Record(Message, Args)
     if self.logLevel >= Level:
-      if Type == 2:
-        Domoticz.Status(Message)
-      elif Type == 3:
-        Domoticz.Error(Message)
-      else:
-        Domoticz.Log(Message)
+      pluginlog.Write(Message, Type, Args)
+    if Type == 3:
+      self.recorder.Dump("error", Written=self.logLevel >= Level) # a short tail when the error is filtered out
     
     return
     
@@ -495,3 +531,14 @@ def onHeartbeat():
   global _plugin
   _plugin.onHeartbeat()
 
+# opt-in push button for a flight recorder dump, see plugincore/flightrecorder.py
+_recorderButton = flightrecorder.Instrument(globals())
+
+# opt-in profiling of the callbacks, see plugincore/profiler.py
+_profiler = profiler.Instrument(globals())
+
+# latency histograms of the callbacks above, see plugincore/callbackstats.py
+_stats = callbackstats.Instrument(globals())
+
+# opt-in OpenMetrics endpoint of the readings and counters, see plugincore/metrics.py
+_metrics = metrics.Instrument(globals())
@@ -1,84 +1,1232 @@
 #!/usr/bin/python3
 
-# doorbell based on interrupt with filtering and logging
+# doorbell based on interrupt with filtering and logging, watches all contacts in the inputs table
 
 # settings
-GPIO_doorbell = 26                  # BCM Pin number
-domoticzidx = 48                    # ID of doorbell
 domoticzserver="192.168.13.88:8080" # IP / port domoticz
 domoticzusername = "pi"             # username
 domoticzpassword = "pi"             # password
+requesttimeout = 2                  # seconds, connect and response of a Domoticz request
+domoticzmqtt = ""                   # host:port of the MQTT broker of Domoticz, "" = JSON API over HTTP
+mqtttopic = "domoticz/in"           # topic Domoticz subscribed to
+mqttclientid = "doorbell"           # fixed, the broker keeps the session (in-flight messages) of this id
+mqttusername = ""                   # username / password of the broker, "" = none
+mqttpassword = ""
 
-mintimebetweenrings = 1             # in seconds (means bell is 2\X seconds blind after a press)
+mintimebetweenrings = 1             # in seconds the switch stays On, a ring within this time keeps it On
+queuesize = 16                      # rings waiting for Domoticz, more are counted as missed
+spoolfile = "doorbell.spool"        # presses not yet acknowledged by Domoticz, kept over a restart (relative to this script, "" = memory only)
+retrydelay = 1                      # seconds before the first retry after a failed request, doubles every failure
+maxretrydelay = 60                  # seconds, maximum time between two retries
+catchupage = 60                     # seconds, older rings are not rung anymore but reported as one "missed rings" message
+missedidx = 0                       # idx of a Domoticz text device for the missed rings message, 0 = only the Domoticz log
+latencysummary = 20                 # rings between two latency summary lines, 0 = no summary
+latencywindow = 100                 # last rings in the latency percentiles
+latencyidx = 0                      # idx of a Domoticz custom sensor for the p95 of the total latency (ms), 0 = none
+sinkinflight = 2                    # sends per sink at the same time, more presses are dropped for that sink
 logrings = True                     # logging to stdout
 minbuttonpressed = 10               # 0 = do no check, other time in milliseconds
 maxbuttonpressed = 5000             # time (ms)to wait until button press is over (only used if minbuttonpressed > 0)
+bouncetime = 5                      # ms, a release shorter than this is contact bounce / ripple of the 8VAC rectifier
+deadtime = 100                      # ms after a release in which a new press is ignored
+longpressed = 1000                  # ms, a press at least this long is a long press (only if a long pattern is configured)
+patternwindow = 600                 # ms between the release and the next press of a double / triple press
+edgebuffer = 256                    # edges kept until the main loop reads them
 
+# inputs, one line per contact (active low, internal pull up):
+#   pin     BCM pin number
+#   name    used in the log
+#   idx     ID of the Domoticz switch
+#   action  "ring" = On and Off after mintimebetweenrings, "on" / "off" / "toggle" = that switch command
+#   optional per input: minpressed, maxpressed, bouncetime, deadtime, longpressed, patternwindow (ms, defaults above)
+#   optional patterns: idx and action per press pattern "long", "double" and "triple", the input idx / action
+#     is the single short press. A press fires at once, a double press is only delayed by the window when a
+#     triple press is configured. Without patterns every accepted press is a single press
+inputs = [
+  {"pin": 26, "name": "Doorbell", "idx": 48, "action": "ring"},
+  #{"pin": 26, "name": "Doorbell", "idx": 48, "action": "ring", "patterns": {"long": {"idx": 52, "action": "on"}, "double": {"idx": 53, "action": "ring"}}},
+  #{"pin": 19, "name": "Back door", "idx": 49, "action": "ring"},
+  #{"pin": 13, "name": "Mailbox", "idx": 50, "action": "on", "minpressed": 30, "deadtime": 2000},
+  #{"pin": 6, "name": "Gate", "idx": 51, "action": "toggle", "bouncetime": 20},
+]
 
-import RPi.GPIO as GPIO
+# sinks, every press is also sent to these, concurrently with Domoticz and each other (best effort, not spooled).
+# The press is json {"name", "idx", "action", "time" (ms since the epoch)}:
+#   type     "udp" (host, port), "webhook" (url, POST) or "mqtt" (host, port, topic, optional username / password)
+#   name     used in the log and the counters
+#   timeout  seconds, default requesttimeout
+sinks = [
+  #{"type": "udp", "name": "chime", "host": "192.168.13.20", "port": 5005},
+  #{"type": "webhook", "name": "webhook", "url": "http://192.168.13.21:8000/doorbell"},
+  #{"type": "mqtt", "name": "mqtt", "host": "192.168.13.88", "port": 1883, "topic": "doorbell/ring"},
+]
+
+
+import os
 import time
-import urllib.request 
+import http.client
 import json
 import traceback
 import sys
+import queue
+import threading
+import array
+import socket
+import struct
+import collections
+import concurrent.futures
 from base64 import b64encode
+from urllib.parse import quote, urlsplit
+
+if hasattr(time, "monotonic_ns"):
+  monotonicNs = time.monotonic_ns   # python >= 3.7
+else:
+  monotonicNs = lambda: int(time.monotonic() * 1000000000)
+
+class RPiGPIO:
+  # GPIO backend of the Raspberry, contacts are active low with the internal pull up
+  
+  def __init__(self):
+    import RPi.GPIO as GPIO
+    self.gpio = GPIO
+    GPIO.setwarnings(False) 
+    GPIO.setmode(GPIO.BCM) # BOARD does not work for pin 29
+    self.callback = None
+    
+  def Setup(self, pin):
+    self.gpio.setup(pin, self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
+    
+  def Watch(self, pin, callback):
+    # callback(pin, level, monotonic ns) on both edges, from the GPIO callback thread
+    self.callback = callback
+    self.gpio.add_event_detect(pin, self.gpio.BOTH, callback=self.edge)
+    
+  def edge(self, channel):
+    self.callback(channel, self.gpio.input(channel), monotonicNs())
+    
+  def Start(self):
+    pass
+    
+  def Clock(self):
+    return monotonicNs()
+    
+  def Wait(self, signal, timeout):
+    return signal.wait(timeout)
+    
+  def Done(self):
+    return False
+    
+  def Close(self):
+    self.gpio.cleanup()
+  
+class SimulatedGPIO:
+  # GPIO backend replaying an edge trace [(ns, pin, level), ...] (sorted on time) instead of the pins, to
+  # run and time the script without a Raspberry. speed > 0 replays the trace in a thread at speed times
+  # real time. speed 0 replays in virtual time: Wait jumps to the next edge or deadline, as fast as
+  # possible and with the same result every run
+  
+  def __init__(self, trace, speed=0):
+    self.trace = trace
+    self.speed = speed
+    self.callbacks = {}             # pin: callback
+    self.next = 0                   # index of the next edge
+    self.now = 0                    # virtual clock (speed 0)
+    self.started = None
+    
+  def Setup(self, pin):
+    pass
+    
+  def Watch(self, pin, callback):
+    self.callbacks[pin] = callback
+    
+  def Start(self):
+    self.started = time.monotonic()
+    if self.speed > 0:
+      thread = threading.Thread(target=self.replay, name="replay")
+      thread.daemon = True
+      thread.start()
+    
+  def replay(self):
+    for t, pin, level in self.trace:
+      delay = self.started + t / 1e9 / self.speed - time.monotonic()
+      if delay > 0:
+        time.sleep(delay)
+      self.deliver(t, pin, level)
+      
+  def deliver(self, t, pin, level):
+    self.next += 1
+    if pin in self.callbacks:
+      self.callbacks[pin](pin, level, t)
+    
+  def Clock(self):
+    if self.speed > 0:
+      return int((time.monotonic() - self.started) * 1e9 * self.speed)
+    return self.now
+    
+  def Wait(self, signal, timeout):
+    if self.speed > 0:
+      return signal.wait(None if timeout is None else timeout / self.speed)
+    deadline = None if timeout is None else self.now + int(timeout * 1e9)
+    if self.next < len(self.trace) and (deadline is None or self.trace[self.next][0] <= deadline):
+      t = self.trace[self.next][0]
+      self.now = max(self.now, t)
+      while self.next < len(self.trace) and self.trace[self.next][0] == t:
+        self.deliver(*self.trace[self.next])
+      return True
+    if deadline is not None:
+      self.now = deadline
+    return False
+    
+  def Done(self):
+    return self.next >= len(self.trace)
+    
+  def Close(self):
+    pass
+    
+def LoadTrace(filename, pin):
+  # json edge trace [[ms, level, pin], ...], pin is optional (default pin)
+  with open(filename) as f:
+    items = json.load(f)
+  return sorted([(int(item[0] * 1000000), item[2] if len(item) > 2 else pin, item[1]) for item in items])
 
-# Setup IO
-GPIO.setwarnings(False) 
-GPIO.setmode(GPIO.BCM) # BOARD does not work for pin 29
-GPIO.setup(GPIO_doorbell, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+class DomoticzError(Exception):
+  pass
 
-inlog ='%s:%s' % (domoticzusername, domoticzpassword) 
-base64string = b64encode(inlog.encode('utf-8')).decode('utf-8')
+def staleSocket(e, response):
+  # a keep-alive connection closed by the server while idle fails before any response byte, only then
+  # the request is sent again on a new connection. A timeout or a failure after the response started
+  # may have been executed already (a Toggle twice) and goes to the caller
+  return response is None and isinstance(e, (ConnectionResetError, BrokenPipeError))
 
+class DomoticzClient:
+  # JSON API of Domoticz over one keep-alive connection, the request paths and the auth header are
+  # built once, a ring is one round trip on the open socket
+  
+  def __init__(self, server, username, password, timeout):
+    host, sep, port = server.partition(":")
+    self.host = host
+    self.port = int(port) if port else 8080
+    self.timeout = timeout          # seconds, applied to the connect and every read
+    self.headers = {"Connection": "keep-alive"}
+    if username:
+      inlog = '%s:%s' % (username, password)
+      self.headers["Authorization"] = "Basic %s" % b64encode(inlog.encode('utf-8')).decode('utf-8')
+    self.connection = None
+    self.paths = {}                 # (idx, switchcmd): request path
+    self.started = 0                # monotonicNs() of the last request: start, written, response read
+    self.sent = 0
+    self.received = 0
+    
+  def switchPath(self, idx, cmd):
+    key = (idx, cmd)
+    path = self.paths.get(key)
+    if path is None:
+      path = "/json.htm?type=command&param=switchlight&idx=%d&switchcmd=%s" % (idx, cmd)
+      self.paths[key] = path
+    return path
+    
+  def Connect(self):
+    # opens the connection in advance, so the first ring does not wait for the TCP handshake
+    if self.connection is None:
+      self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+      self.connection.connect()
+    
+  def Close(self):
+    if self.connection is not None:
+      self.connection.close()
+      self.connection = None
+    
+  def Switch(self, idx, cmd):
+    return self.request(self.switchPath(idx, cmd))
+    
+  def Log(self, message):
+    return self.request("/json.htm?type=command&param=addlogmessage&message=%s" % quote(message))
+    
+  def UpdateDevice(self, idx, svalue):
+    return self.request("/json.htm?type=command&param=udevice&idx=%d&nvalue=0&svalue=%s" % (idx, quote(svalue)))
+    
+  def request(self, path):
+    # Domoticz closes idle connections, a reused connection found closed is retried once on a new one
+    self.started = monotonicNs()
+    for attempt in range(2):
+      reused = self.connection is not None
+      response = None
+      try:
+        self.Connect()
+        self.connection.request("GET", path, headers=self.headers)
+        self.sent = monotonicNs()
+        response = self.connection.getresponse()
+        body = response.read()
+        self.received = monotonicNs()
+      except (http.client.HTTPException, OSError) as e:
+        self.Close()
+        if reused and attempt == 0 and staleSocket(e, response):
+          continue
+        raise
+      if response.status != 200:
+        raise DomoticzError("HTTP %d %s on %s" % (response.status, response.reason, path))
+      result = json.loads(body.decode('utf-8'))
+      if result.get("status") != "OK":
+        raise DomoticzError("Status '%s' on %s" % (result.get("status"), path))
+      return result
+  
 def microTime():
   return int(round(time.time() * 1000))
   
-def domoticzrequest (url):
-  request = urllib.request.Request(url)
-  request.add_header("Authorization", "Basic %s" % base64string)
-  response = urllib.request.urlopen(request)
-  return response.read().decode('utf-8')
-  
 def microtimeToString(microtime):
   return time.strftime("%d-%m-%Y %H:%M:%S", time.localtime(microtime/1000))
   
-def reportBell():
-  domoticzrequest("http://" + domoticzserver + "/json.htm?type=command&param=switchlight&idx=" + str(domoticzidx) + "&switchcmd=On")
-  time.sleep(mintimebetweenrings)
-  domoticzrequest("http://" + domoticzserver + "/json.htm?type=command&param=switchlight&idx=" + str(domoticzidx) + "&switchcmd=Off")
+class Sink:
+  # a receiver of the presses besides Domoticz, best effort (not spooled). Send runs in a thread of the
+  # fan-out pool, at most sinkinflight at the same time, the socket timeout bounds every send
   
-
-while True:
-  # Doorbell is active low, so a falling edge means the door has been pressed
-  try:
-    sys.stdout.flush()
-    GPIO.wait_for_edge(GPIO_doorbell, GPIO.FALLING)
-    timePressed = microTime()
-    
-    # doorbell is pressed
-    if (minbuttonpressed > 0):
-      result = GPIO.wait_for_edge(GPIO_doorbell, GPIO.RISING, timeout=maxbuttonpressed)
-      if result is None:
-        if logrings:
-          print ("Doorbell pressed at "+ microtimeToString(timePressed)+" but not released after "+str(maxbuttonpressed)+" milliseconds, ignored.")
-      else:
-        timeLoose = microTime()
-        pressedtime = timeLoose - timePressed
+  def __init__(self, item):
+    self.name = item.get("name", item["type"])
+    self.timeout = item.get("timeout", requesttimeout)
+    self.lock = threading.Lock()
+    self.inflight = 0               # sends running or waiting in the pool
+    self.sent = 0
+    self.failed = 0
+    self.dropped = 0                # presses not sent, sinkinflight sends of this sink were running
+    self.latency = collections.deque(maxlen=latencywindow) # ns of the last sends
+    
+  def Submit(self, pool, event):
+    with self.lock:
+      if self.inflight >= sinkinflight:
+        self.dropped += 1
+        return
+      self.inflight += 1
+    pool.submit(self.run, event)
+    
+  def run(self, event):
+    started = monotonicNs()
+    try:
+      self.Send(event)
+      with self.lock:
+        self.sent += 1
+        self.latency.append(monotonicNs() - started)
+    except Exception as e:
+      with self.lock:
+        self.failed += 1
+      print ("Sink "+self.name+" failed: "+ str(e))
+    finally:
+      with self.lock:
+        self.inflight -= 1
+        
+  def Summary(self):
+    with self.lock:
+      values = sorted(self.latency)
+      p95 = values[min(len(values) - 1, int(len(values) * 0.95))] / 1e6 if len(values) > 0 else 0.0
+      return "%s %d sent %d failed %d dropped p95 %.1f ms" % (self.name, self.sent, self.failed, self.dropped, p95)
+    
+  def Send(self, event):
+    raise NotImplementedError
+    
+  def Close(self):
+    pass
+    
+class UDPSink(Sink):
+  # one datagram per press, e.g. a chime daemon: {"type": "udp", "host": ..., "port": ...}
+  
+  def __init__(self, item):
+    Sink.__init__(self, item)
+    self.address = (item["host"], item["port"])
+    self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    self.socket.settimeout(self.timeout)
+    
+  def Send(self, event):
+    self.socket.sendto(json.dumps(event).encode('utf-8'), self.address)
+    
+  def Close(self):
+    self.socket.close()
+    
+class WebhookSink(Sink):
+  # POST of the press as json over a keep-alive connection: {"type": "webhook", "url": "http://..."}
+  
+  def __init__(self, item):
+    Sink.__init__(self, item)
+    url = urlsplit(item["url"])
+    self.host = url.hostname
+    self.port = url.port or 80
+    self.path = (url.path or "/") + ("?" + url.query if url.query else "")
+    self.connection = None
+    self.connectionLock = threading.Lock() # one request at a time on the connection
+    
+  def Send(self, event):
+    body = json.dumps(event).encode('utf-8')
+    with self.connectionLock:
+      for attempt in range(2):
+        reused = self.connection is not None
+        try:
+          if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+          response = None
+          self.connection.request("POST", self.path, body=body, headers={"Content-Type": "application/json", "Connection": "keep-alive"})
+          response = self.connection.getresponse()
+          response.read()
+        except (http.client.HTTPException, OSError) as e:
+          self.close()
+          if reused and attempt == 0 and staleSocket(e, response):
+            continue
+          raise
+        if response.status >= 300:
+          raise IOError("HTTP %d %s" % (response.status, response.reason))
+        return
+        
+  def close(self):
+    if self.connection is not None:
+      self.connection.close()
+      self.connection = None
+      
+  def Close(self):
+    with self.connectionLock:
+      self.close()
+      
+class MQTTClient:
+  # minimal MQTT 3.1.1 publisher over one connection, reconnects on the next publish. QoS 1 waits for
+  # the PUBACK, with clean = False the broker keeps the session and the messages without PUBACK are
+  # sent again (DUP) after a reconnect, a retry of the same message waits for that one
+  
+  def __init__(self, host, port, clientid, timeout, username=None, password=None, clean=True):
+    self.host = host
+    self.port = port
+    self.clientid = clientid
+    self.timeout = timeout
+    self.username = username
+    self.password = password
+    self.clean = clean
+    self.socket = None
+    self.lock = threading.Lock()    # one packet at a time on the socket
+    self.inflight = collections.OrderedDict() # packet id: (topic, payload) without PUBACK
+    self.packetId = 0
+    self.sent = 0                   # monotonicNs() of the last publish written
+    
+  @staticmethod
+  def string(value):
+    data = value.encode('utf-8')
+    return struct.pack("!H", len(data)) + data
+    
+  @staticmethod
+  def packet(kind, payload):
+    # fixed header with the remaining length (7 bits per byte)
+    header = bytearray([kind])
+    length = len(payload)
+    while True:
+      byte = length % 128
+      length //= 128
+      header.append(byte | 0x80 if length > 0 else byte)
+      if length == 0:
+        return bytes(header) + payload
+        
+  def receive(self, count):
+    data = b""
+    while len(data) < count:
+      chunk = self.socket.recv(count - len(data))
+      if not chunk:
+        raise ConnectionResetError("MQTT connection closed by the broker")
+      data += chunk
+    return data
+    
+  def Connect(self):
+    if self.socket is not None:
+      return
+    flags = 0x02 if self.clean else 0x00
+    payload = self.string(self.clientid)
+    if self.username:
+      flags |= 0x80
+      payload += self.string(self.username)
+      if self.password is not None:
+        flags |= 0x40
+        payload += self.string(self.password)
+    # keep alive 0: the broker does not drop an idle connection, TCP keep alive finds a dead one
+    self.socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+    try:
+      self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+      self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+      self.socket.sendall(self.packet(0x10, self.string("MQTT") + struct.pack("!BBH", 4, flags, 0) + payload))
+      connack = self.receive(4)
+      if connack[0] != 0x20 or connack[3] != 0:
+        raise IOError("MQTT connect refused, return code %d" % connack[3])
+      for packetId, message in self.inflight.items():
+        self.socket.sendall(self.publishPacket(message[0], message[1], packetId, True))
+    except Exception:
+      self.Close()
+      raise
+      
+  def publishPacket(self, topic, payload, packetId=None, dup=False):
+    if packetId is None:
+      return self.packet(0x30, self.string(topic) + payload)
+    return self.packet(0x3a if dup else 0x32, self.string(topic) + struct.pack("!H", packetId) + payload)
+    
+  def nextId(self):
+    while True:
+      self.packetId = self.packetId % 65535 + 1
+      if self.packetId not in self.inflight:
+        return self.packetId
+        
+  def waitAck(self, packetId):
+    # reads packets until the PUBACK of packetId, the socket timeout limits every read
+    while packetId in self.inflight:
+      kind = self.receive(1)[0]
+      length = 0
+      shift = 0
+      while True:
+        byte = self.receive(1)[0]
+        length |= (byte & 0x7f) << shift
+        shift += 7
+        if byte & 0x80 == 0:
+          break
+      body = self.receive(length) if length > 0 else b""
+      if kind >> 4 == 4:
+        self.inflight.pop(struct.unpack("!H", body[:2])[0], None)
         
-        if (pressedtime > minbuttonpressed):
-          if logrings:
-            print ("Doorbell pressed at "+ microtimeToString(timePressed)+" for "+str(pressedtime)+ " milliseconds, notified Domoticz.")
-          reportBell()
-   
+  def Publish(self, topic, payload, qos=0):
+    with self.lock:
+      for attempt in range(2):
+        reused = self.socket is not None
+        try:
+          self.Connect()
+          if qos == 0:
+            self.socket.sendall(self.publishPacket(topic, payload))
+            self.sent = monotonicNs()
+            return
+          # a retry of a message without PUBACK: it was sent again by the connect
+          packetId = None
+          for inflightId, message in self.inflight.items():
+            if message == (topic, payload):
+              packetId = inflightId
+              break
+          if packetId is None:
+            packetId = self.nextId()
+            self.inflight[packetId] = (topic, payload)
+            self.socket.sendall(self.publishPacket(topic, payload, packetId))
+          self.sent = monotonicNs()
+          self.waitAck(packetId)
+          return
+        except OSError as e:
+          self.Close()
+          if reused and attempt == 0 and staleSocket(e, None): # a timeout keeps the message in flight for the next publish
+            continue
+          raise
+          
+  def Close(self):
+    if self.socket is not None:
+      try:
+        self.socket.sendall(b"\xe0\x00") # DISCONNECT
+      except OSError:
+        pass
+      self.socket.close()
+      self.socket = None
+      
+class DomoticzMQTT:
+  # the Domoticz requests of the notifier as json messages on the topic Domoticz subscribed to, QoS 1
+  # over one persistent session instead of a HTTP round trip with auth per request. A request is
+  # acknowledged by the PUBACK of the broker, the broker delivers it to Domoticz
+  
+  def __init__(self, server, topic, clientid, username, password, timeout):
+    host, sep, port = server.partition(":")
+    self.topic = topic
+    self.client = MQTTClient(host, int(port) if port else 1883, clientid, timeout, username or None, password or None, clean=False)
+    self.started = 0                # monotonicNs() of the last request: start, written, PUBACK read
+    self.sent = 0
+    self.received = 0
+    
+  def Connect(self):
+    with self.client.lock:
+      self.client.Connect()
+      
+  def Close(self):
+    with self.client.lock:
+      self.client.Close()
+      
+  def Switch(self, idx, cmd):
+    self.publish({"command": "switchlight", "idx": idx, "switchcmd": cmd})
+    
+  def Log(self, message):
+    self.publish({"command": "addlogmessage", "message": message})
+    
+  def UpdateDevice(self, idx, svalue):
+    self.publish({"idx": idx, "nvalue": 0, "svalue": svalue})
+    
+  def publish(self, message):
+    self.started = monotonicNs()
+    self.client.Publish(self.topic, json.dumps(message).encode('utf-8'), qos=1)
+    self.sent = self.client.sent
+    self.received = monotonicNs()
+    
+class MQTTSink(Sink):
+  # publishes the press as json: {"type": "mqtt", "host": ..., "port": 1883, "topic": ...}, optional username / password
+  
+  def __init__(self, item):
+    Sink.__init__(self, item)
+    self.topic = item.get("topic", "doorbell")
+    self.client = MQTTClient(item["host"], item.get("port", 1883), item.get("clientid", "doorbell-"+self.name), self.timeout, item.get("username"), item.get("password"))
+    
+  def Send(self, event):
+    self.client.Publish(self.topic, json.dumps(event).encode('utf-8'))
+    
+  def Close(self):
+    with self.client.lock:
+      self.client.Close()
+      
+class Fanout:
+  # sends every press to the sinks table concurrently, a slow sink only delays itself
+  
+  Types = {"udp": UDPSink, "webhook": WebhookSink, "mqtt": MQTTSink}
+  
+  def __init__(self, items):
+    self.sinks = [self.Types[item["type"]](item) for item in items]
+    self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(self.sinks) * sinkinflight))
+    
+  def Send(self, target, timePressed):
+    # called by the detection loop, never blocks
+    event = {"name": target.name, "idx": target.idx, "action": target.action, "time": timePressed}
+    for sink in self.sinks:
+      sink.Submit(self.pool, event)
+      
+  def Summary(self):
+    return "Sinks: "+ ", ".join([sink.Summary() for sink in self.sinks])
+    
+  def Close(self):
+    self.pool.shutdown(wait=True)
+    for sink in self.sinks:
+      sink.Close()
+      
+class Latency:
+  # rolling percentiles of the stages of a ring in monotonic ns: detect (the last edge of the press to
+  # debounced and classified), queue (notifier queue, spool and earlier requests), send (connect and
+  # request written), response (Domoticz and the network) and total (edge to acknowledgement)
+  
+  Stages = ("detect", "queue", "send", "response", "total")
+  
+  def __init__(self, window):
+    self.samples = {}               # stage: last ns values
+    for stage in self.Stages:
+      self.samples[stage] = collections.deque(maxlen=window)
+    self.count = 0                  # measured rings since start
+    
+  def Add(self, edge, classified, started, sent, received):
+    values = (classified - edge, started - classified, sent - started, received - sent, received - edge)
+    for stage, value in zip(self.Stages, values):
+      self.samples[stage].append(value)
+    self.count += 1
+    
+  def Percentile(self, stage, p):
+    # milliseconds
+    values = sorted(self.samples[stage])
+    if len(values) == 0:
+      return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100.0))] / 1e6
+    
+  def Summary(self):
+    stages = ["%s %.1f/%.1f/%.1f" % (stage, self.Percentile(stage, 50), self.Percentile(stage, 95), self.Percentile(stage, 100)) for stage in self.Stages]
+    return "Latency of the last "+str(len(self.samples["total"]))+" rings in ms (p50/p95/max): "+ ", ".join(stages)
+    
+class Spool:
+  # append-only file of the presses: a line {"p": seq, ...} when queued and {"d": seq} when Domoticz
+  # acknowledged it. The presses of a batch are written with one fsync before the first request, the
+  # acknowledgements are only flushed (a lost one repeats a delivery after a power failure). The file
+  # is rewritten with the pending presses at the start and emptied when nothing is pending
+  
+  def __init__(self, filename, compactsize=65536):
+    self.filename = filename
+    self.compactsize = compactsize  # bytes, the file is only emptied above this size
+    self.file = None
+    self.seq = 0                    # last sequence number
+    self.pending = {}               # seq: record, not acknowledged
+    self.dirty = False              # written but not flushed
+    if filename:
+      try:
+        self.load()
+        self.file = open(filename, "a")
+      except OSError as e:
+        self.fail(e)
+        
+  def load(self):
+    try:
+      with open(self.filename) as f:
+        for line in f:
+          try:
+            record = json.loads(line)
+          except ValueError:
+            continue                # torn last line of a crash
+          if "p" in record:
+            self.pending[record["p"]] = record
+            self.seq = max(self.seq, record["p"])
+          elif "d" in record:
+            self.pending.pop(record["d"], None)
+            self.seq = max(self.seq, record["d"])
+    except FileNotFoundError:
+      pass
+    temp = self.filename + ".tmp"
+    with open(temp, "w") as f:
+      for seq in sorted(self.pending):
+        f.write(json.dumps(self.pending[seq]) + "\n")
+      f.flush()
+      os.fsync(f.fileno())
+    os.replace(temp, self.filename)
+    
+  def fail(self, e):
+    print ("Spool "+self.filename+" failed, presses are only kept in memory: "+ str(e))
+    if self.file is not None:
+      try:
+        self.file.close()
+      except OSError:
+        pass
+    self.file = None
+    
+  def Pending(self):
+    return [self.pending[seq] for seq in sorted(self.pending)]
+    
+  def Add(self, target, timePressed):
+    self.seq += 1
+    record = {"p": self.seq, "t": timePressed, "idx": target.idx, "action": target.action, "name": target.name}
+    self.pending[self.seq] = record
+    self.write(record)
+    return record
+    
+  def Done(self, seq):
+    self.pending.pop(seq, None)
+    self.write({"d": seq})
+    
+  def write(self, record):
+    if self.file is not None:
+      try:
+        self.file.write(json.dumps(record) + "\n")
+        self.dirty = True
+      except OSError as e:
+        self.fail(e)
+        
+  def Flush(self, sync=False):
+    if self.file is None or not self.dirty:
+      return
+    try:
+      self.file.flush()
+      if sync:
+        os.fsync(self.file.fileno())
+      self.dirty = False
+      if len(self.pending) == 0 and self.file.tell() > self.compactsize:
+        self.file.truncate(0)
+    except OSError as e:
+      self.fail(e)
+      
+class Notifier(threading.Thread):
+  # delivers the press patterns of all inputs to Domoticz, the detection loop only queues them and never
+  # waits for Domoticz. The Off of a ring is scheduled (a deadline of the queue wait), not a sleep, so a
+  # ring during the On time is seen. Every press is in the spool until Domoticz acknowledged it, a
+  # failed request keeps it and the presses after it waiting (in order) for one retry timer with backoff
+  
+  def __init__(self, client, spool, ontime, size, fanout=None):
+    threading.Thread.__init__(self, name="notifier")
+    self.daemon = True
+    self.client = client
+    self.spool = spool
+    self.fanout = fanout            # other sinks of the presses
+    self.ontime = ontime            # seconds between On and Off
+    self.queue = queue.Queue(size)
+    self.waiting = collections.deque() # (spool record, Target, latency stamps) not acknowledged, in order
+    self.latency = Latency(latencywindow)
+    self.summaryDue = False         # latency summary after the running deliveries
+    self.offAt = {}                 # Target: time.monotonic() of the scheduled Off
+    self.retryAt = None             # time.monotonic() of the next attempt after a failure
+    self.retryDelay = retrydelay    # seconds, doubles every failure
+    self.missed = 0                 # presses not queued, Domoticz too slow / unreachable
+    self.reported = 0               # missed presses already reported
+    self.failed = 0                 # failed requests
+    
+  def Restore(self, targets):
+    # the presses of the previous run that Domoticz did not acknowledge, sent before the new ones
+    known = {}
+    for target in targets:
+      known[(target.idx, target.action)] = target
+    for record in self.spool.Pending():
+      target = known.get((record["idx"], record["action"]))
+      if target is None:
+        target = Target(record["name"], record)
+      self.waiting.append((record, target, None))
+    if len(self.waiting) > 0:
+      print (str(len(self.waiting))+" presses of the previous run not delivered yet.")
+    
+  def Ring(self, target, timePressed, edge=None):
+    # called by the detection loop, never blocks. edge: monotonicNs() of the last edge of the press
+    target.rings += 1
+    stamps = None if edge is None else (edge, monotonicNs())
+    if self.fanout is not None:
+      self.fanout.Send(target, timePressed)
+    try:
+      self.queue.put_nowait((target, timePressed, stamps))
+    except queue.Full:
+      self.missed += 1
+      print (target.name+" pressed at "+ microtimeToString(timePressed)+" but "+str(self.queue.qsize())+" presses are waiting for Domoticz, missed.")
+    
+  def run(self):
+    while True:
+      batch = self.take(self.timeout())
+      for target, timePressed, stamps in batch:
+        self.waiting.append((self.spool.Add(target, timePressed), target, stamps))
+      self.spool.Flush(sync=True)   # one fsync for the batch, before the first request
+      
+      # a new press is tried at once, otherwise a failure waits for its retry time
+      if len(batch) > 0 or self.retryAt is None or self.retryAt <= time.monotonic():
+        self.deliver()
+      self.switchOff()
+      self.spool.Flush()
+      if self.summaryDue:
+        self.summary()
+      
+      if self.missed > self.reported:
+        print ("Missed "+str(self.missed - self.reported)+" presses while Domoticz was slow or unreachable ("+str(self.missed)+" since start).")
+        self.reported = self.missed
+      for item in batch:
+        self.queue.task_done()
+        
+  def take(self, timeout):
+    # waits for the first press, takes the others that are queued as well
+    batch = []
+    try:
+      batch.append(self.queue.get(timeout=timeout))
+      while True:
+        batch.append(self.queue.get_nowait())
+    except queue.Empty:
+      pass
+    return batch
+    
+  def timeout(self):
+    deadlines = list(self.offAt.values())
+    if self.retryAt is not None and len(self.waiting) > 0:
+      deadlines.append(self.retryAt)
+    return None if len(deadlines) == 0 else max(0.0, min(deadlines) - time.monotonic())
+    
+  def deliver(self):
+    # the waiting presses in order over the one connection, up to the first failure
+    if self.collapse():
+      while len(self.waiting) > 0:
+        record, target, stamps = self.waiting[0]
+        if not self.press(target, record["t"], stamps):
+          break
+        self.waiting.popleft()
+        self.spool.Done(record["p"])
+    if len(self.waiting) == 0:
+      self.retryAt = None
+      self.retryDelay = retrydelay
+    else:
+      self.retryAt = time.monotonic() + self.retryDelay
+      print (str(len(self.waiting))+" presses waiting for Domoticz, retry in "+str(self.retryDelay)+" seconds.")
+      self.retryDelay = min(self.retryDelay * 2, maxretrydelay)
+      
+  def collapse(self):
+    # rings older than catchupage (Domoticz unreachable, the script stopped) are not rung anymore, one
+    # "missed rings" message per switch replaces them. Other actions change a state and are all sent
+    limit = microTime() - catchupage * 1000
+    old = collections.OrderedDict() # Target: [spool record]
+    for record, target, stamps in self.waiting:
+      if target.action == "ring" and record["t"] < limit:
+        old.setdefault(target, []).append(record)
+    for target, records in old.items():
+      message = target.name+" missed rings: "+str(len(records))+", last at "+ microtimeToString(records[-1]["t"])
+      try:
+        self.client.Log(message)
+        if missedidx > 0:
+          self.client.UpdateDevice(missedidx, message)
+      except Exception as e:
+        self.failed += 1
+        print ("Domoticz message '"+message+"' failed: "+ str(e))
+        return False
+      print (message)
+      done = set()
+      for record in records:
+        self.spool.Done(record["p"])
+        done.add(record["p"])
+      self.waiting = collections.deque([item for item in self.waiting if item[0]["p"] not in done])
+    return True
+    
+  def press(self, target, timePressed, stamps):
+    if target.action != "ring":
+      if not self.send(target, target.command):
+        return False
+      self.measure(stamps)
+      if logrings:
+        print (target.name+" pressed at "+ microtimeToString(timePressed)+", "+target.command+" after "+str(microTime() - timePressed)+" milliseconds.")
+    elif target not in self.offAt:
+      if not self.send(target, "On"):
+        return False
+      self.measure(stamps)
+      if logrings:
+        print (target.name+" pressed at "+ microtimeToString(timePressed)+", notified Domoticz after "+str(microTime() - timePressed)+" milliseconds.")
+      self.offAt[target] = time.monotonic() + self.ontime
+    else:
+      target.again += 1
+      if logrings:
+        print (target.name+" pressed at "+ microtimeToString(timePressed)+" while still On, Off postponed.")
+      self.offAt[target] = time.monotonic() + self.ontime
+    return True
+    
+  def measure(self, stamps):
+    # the request of a ring was just acknowledged, rings of a previous run and postponed Offs have no stamps
+    if stamps is None:
+      return
+    edge, classified = stamps
+    self.latency.Add(edge, classified, self.client.started, self.client.sent, self.client.received)
+    if latencysummary > 0 and self.latency.count % latencysummary == 0:
+      self.summaryDue = True
+      
+  def summary(self):
+    self.summaryDue = False
+    print (self.latency.Summary())
+    if self.fanout is not None:
+      print (self.fanout.Summary())
+    if latencyidx > 0:
+      try:
+        self.client.UpdateDevice(latencyidx, "%.1f" % self.latency.Percentile("total", 95))
+      except Exception as e:
+        self.failed += 1
+        print ("Domoticz latency sensor failed: "+ str(e))
+        
+  def switchOff(self):
+    now = time.monotonic()
+    for target, offAt in list(self.offAt.items()):
+      if offAt <= now:
+        if self.send(target, "Off"):
+          del self.offAt[target]
         else:
-          if logrings:
-            print ("Doorbell pressed at "+ microtimeToString(timePressed)+" for "+str(pressedtime)+ " milliseconds, minimal of "+ str(minbuttonpressed) +" is required, ignored.")
+          self.offAt[target] = now + self.retryDelay
+          
+  def send(self, target, cmd):
+    try:
+      self.client.Switch(target.idx, cmd)
+      return True
+    except Exception as e:
+      self.failed += 1
+      print ("Domoticz "+cmd+" of "+target.name+" failed: "+ str(e))
+      return False
+      
+  def Idle(self):
+    # nothing queued, waiting or being sent and no Off scheduled
+    return self.queue.unfinished_tasks == 0 and len(self.waiting) == 0 and len(self.offAt) == 0
+  
+  
+class EdgeRing:
+  # preallocated ring of (pin, monotonic ns, level) written by the GPIO callback thread (RPi.GPIO runs
+  # the callbacks of all pins in one thread) and read by the main loop, one writer and one reader: the
+  # slot is written before the write counter is increased
+  
+  def __init__(self, size):
+    self.pins = bytearray(size)
+    self.times = array.array("q", bytes(8 * size))
+    self.levels = bytearray(size)
+    self.size = size
+    self.written = 0
+    self.read = 0
+    self.overruns = 0               # edges overwritten before they were read
+    self.signal = threading.Event()
+    
+  def Add(self, pin, level, t):
+    i = self.written % self.size
+    self.pins[i] = pin
+    self.times[i] = t
+    self.levels[i] = level
+    self.written += 1
+    self.signal.set()
+    
+  def Read(self):
+    # yields the edges since the previous read, oldest first
+    written = self.written
+    if written - self.read > self.size:
+      self.overruns += written - self.read - self.size
+      self.read = written - self.size
+    while self.read < written:
+      i = self.read % self.size
+      yield self.pins[i], self.times[i], self.levels[i]
+      self.read += 1
+  
+class Debouncer:
+  # state machine over the edges of an active low contact. A press is decided when the release is
+  # stable for bouncetime: accepted between min and max, too short / too long are ignored. Results
+  # are (kind, press time ns, width ns) with kind "accepted", "tooshort" or "toolong"
+  IDLE = 0
+  PRESSED = 1
+  RELEASED = 2                      # released, waiting for bouncetime
+  HELD = 3                          # accepted at the press (min 0) or longer than max, waiting for the release
+  SETTLING = 4                      # released from HELD, waiting for bouncetime before a new press
+  
+  def __init__(self, minpressed, maxpressed, bounce, dead):
+    self.minNs = minpressed * 1000000
+    self.maxNs = maxpressed * 1000000
+    self.bounceNs = bounce * 1000000
+    self.deadNs = dead * 1000000
+    self.state = self.IDLE
+    self.pressed = 0                # time of the press
+    self.released = 0               # time of the (last) release
+    self.deadUntil = 0
+    self.bounces = 0                # releases shorter than bouncetime
+    
+  def Edge(self, t, level):
+    if level == 0:                  # low = pressed
+      if self.state == self.IDLE:
+        if t < self.deadUntil:
+          return None
+        self.pressed = t
+        if self.minNs == 0:
+          self.deadUntil = t + self.deadNs
+          self.state = self.HELD
+          return ("accepted", t, 0)
+        self.state = self.PRESSED
+      elif self.state == self.RELEASED:
+        self.bounces += 1
+        self.state = self.PRESSED
+      elif self.state == self.SETTLING:
+        self.bounces += 1
+        self.state = self.HELD
     else:
+      if self.state == self.PRESSED:
+        self.released = t
+        self.state = self.RELEASED
+      elif self.state == self.HELD:
+        self.released = t
+        self.state = self.SETTLING
+    return None
+    
+  def Poll(self, now):
+    # deadline checks, returns a result or None
+    if self.state == self.RELEASED and now - self.released >= self.bounceNs:
+      self.state = self.IDLE
+      self.deadUntil = self.released + self.deadNs
+      width = self.released - self.pressed
+      return ("accepted" if width > self.minNs else "tooshort", self.pressed, width)
+    if self.state == self.SETTLING and now - self.released >= self.bounceNs:
+      self.state = self.IDLE
+      self.deadUntil = max(self.deadUntil, self.released + self.deadNs)
+      return None
+    if self.state == self.PRESSED and self.maxNs > 0 and now - self.pressed >= self.maxNs:
+      self.state = self.HELD
+      return ("toolong", self.pressed, now - self.pressed)
+    return None
+    
+  def Timeout(self, now):
+    # seconds until the next deadline, None = wait for an edge
+    if self.state == self.RELEASED or self.state == self.SETTLING:
+      return max(0, self.released + self.bounceNs - now) / 1e9
+    if self.state == self.PRESSED and self.maxNs > 0:
+      return max(0, self.pressed + self.maxNs - now) / 1e9
+    return None
+  
+class Classifier:
+  # press patterns of an input from its accepted presses: "short", "long", "double" and "triple".
+  # Only the configured patterns are recognized. A press is reported at once (short or long), the second
+  # press of a sequence at once as double unless a triple is configured, then it waits for the window
+  
+  def __init__(self, patterns, longpressed, window):
+    self.patterns = patterns        # configured patterns
+    self.longNs = longpressed * 1000000 if "long" in patterns else 0
+    self.windowNs = window * 1000000
+    self.counting = "double" in patterns or "triple" in patterns
+    self.count = 0                  # presses in the current sequence
+    self.released = 0               # release of the last press of the sequence
+    self.pending = None             # (pattern, press time) waiting for the window
+    
+  def Press(self, t, width):
+    # list of (pattern, press time ns)
+    results = []
+    if self.pending is not None and t - self.released > self.windowNs:
+      results.append(self.pending)
+      self.pending = None
+    if self.longNs > 0 and width >= self.longNs:
+      self.count = 0                # a long press ends a sequence
+      results.append(("long", t))
+      return results
+    
+    if self.counting and self.count > 0 and t - self.released <= self.windowNs:
+      self.count += 1
+    else:
+      self.count = 1
+    self.released = t + width
+    
+    if self.count == 1:
+      results.append(("short", t))
+    elif self.count == 2:
+      if "triple" in self.patterns:
+        self.pending = ("double", t) if "double" in self.patterns else None
+      else:
+        results.append(("double", t))
+        self.count = 0
+    else:
+      self.pending = None
+      results.append(("triple", t))
+      self.count = 0
+    return results
+    
+  def Poll(self, now):
+    # the pending double when the window passed without a third press, or None
+    if self.pending is not None and now - self.released > self.windowNs:
+      pending = self.pending
+      self.pending = None
+      self.count = 0
+      return pending
+    return None
+    
+  def Timeout(self, now):
+    if self.pending is not None:
+      return max(0, self.released + self.windowNs + 1 - now) / 1e9
+    return None
+  
+class Target:
+  # Domoticz switch and action of an input / press pattern
+  
+  def __init__(self, name, item):
+    self.name = name
+    self.idx = item["idx"]
+    self.action = item.get("action", "ring")
+    self.command = {"on": "On", "off": "Off", "toggle": "Toggle"}.get(self.action)
+    self.rings = 0                  # presses
+    self.again = 0                  # rings while the switch was On
+    
+class Input:
+  # a contact of the inputs table with its own debouncer, pattern classifier and targets
+  
+  def __init__(self, item):
+    self.pin = item["pin"]
+    self.name = item.get("name", "GPIO %d" % self.pin)
+    self.minpressed = item.get("minpressed", minbuttonpressed)
+    self.maxpressed = item.get("maxpressed", maxbuttonpressed)
+    self.debouncer = Debouncer(self.minpressed, self.maxpressed, item.get("bouncetime", bouncetime), item.get("deadtime", deadtime))
+    patterns = item.get("patterns", {})
+    self.targets = {"short": Target(self.name, item)} # pattern: Target
+    for pattern in ("long", "double", "triple"):
+      if pattern in patterns:
+        self.targets[pattern] = Target(self.name+" "+pattern, patterns[pattern])
+    self.classifier = Classifier(self.targets, item.get("longpressed", longpressed), item.get("patternwindow", patternwindow))
+    self.released = None            # backend time of the release of the last accepted press
+    
+class Monitor:
+  # all inputs of a GPIO backend: one edge buffer, one loop and one notifier
+  
+  def __init__(self, backend, items, notifier, size=edgebuffer):
+    self.backend = backend
+    self.notifier = notifier        # Ring(target, timePressed)
+    self.edges = EdgeRing(size)
+    self.inputs = {}                # pin: Input
+    self.overruns = 0
+    for item in items:
+      input = Input(item)
+      self.inputs[input.pin] = input
+      backend.Setup(input.pin)
+      # contacts are active low, so a falling edge means pressed
+      backend.Watch(input.pin, self.edges.Add)
+      
+  def Run(self):
+    # until the backend is done (never for the GPIO pins) and nothing is pending
+    self.backend.Start()
+    while not self.backend.Done() or self.busy():
+      try:
+        sys.stdout.flush()
+        self.Step()
+      except Exception as e:
+        print ("Error occured: "+ traceback.format_exc())
+        
+  def busy(self):
+    return self.edges.written > self.edges.read or self.nextTimeout(self.backend.Clock()) is not None
+    
+  def Step(self):
+    # sleeps until an edge or the next deadline of a debouncer / classifier
+    self.backend.Wait(self.edges.signal, self.nextTimeout(self.backend.Clock()))
+    self.edges.signal.clear()
+    for pin, t, level in self.edges.Read():
+      input = self.inputs[pin]
+      result = input.debouncer.Edge(t, level)
+      if result is not None:
+        self.handle(input, result)
+    now = self.backend.Clock()
+    for input in self.inputs.values():
+      result = input.debouncer.Poll(now)
+      if result is not None:
+        self.handle(input, result)
+      pending = input.classifier.Poll(now)
+      if pending is not None:
+        self.fire(input, pending[0], pending[1])
+    if self.edges.overruns > self.overruns:
+      print ("Lost "+str(self.edges.overruns - self.overruns)+" edges, increase edgebuffer.")
+      self.overruns = self.edges.overruns
+      
+  def nextTimeout(self, now):
+    # seconds until the first deadline of the debouncers / classifiers, None = wait for an edge
+    timeouts = [input.debouncer.Timeout(now) for input in self.inputs.values()] + [input.classifier.Timeout(now) for input in self.inputs.values()]
+    timeouts = [timeout for timeout in timeouts if timeout is not None]
+    return min(timeouts) if len(timeouts) > 0 else None
+    
+  def wallTime(self, t):
+    # milliseconds since the epoch of a backend time, for logging
+    return microTime() - (self.backend.Clock() - t) // 1000000
+    
+  def monotonic(self, t):
+    # monotonicNs() of a backend time, for the latency
+    return monotonicNs() - (self.backend.Clock() - t)
+    
+  def fire(self, input, pattern, t):
+    target = input.targets.get(pattern)
+    if target is not None:
+      edge = input.released if input.released is not None and input.released >= t else t
+      self.notifier.Ring(target, self.wallTime(t), self.monotonic(edge))
+    
+  def handle(self, input, result):
+    kind, t, width = result
+    timePressed = self.wallTime(t)
+    if kind == "accepted":
+      input.released = t + width
       if logrings:
-        print ("Doorbell pressed at "+ microtimeToString(timePressed)+", notified Domoticz")
-      reportBell()
-  except Exception as e:
-    print ("Error occured: "+ traceback.format_exc())
-
-
+        if input.minpressed > 0:
+          print (input.name+" pressed at "+ microtimeToString(timePressed)+" for %.1f milliseconds, accepted." % (width / 1e6))
+        else:
+          print (input.name+" pressed at "+ microtimeToString(timePressed)+", accepted.")
+      for pattern, t in input.classifier.Press(t, width):
+        self.fire(input, pattern, t)
+    elif logrings:
+      if kind == "toolong":
+        print (input.name+" pressed at "+ microtimeToString(timePressed)+" but not released after "+str(input.maxpressed)+" milliseconds, ignored.")
+      else:
+        print (input.name+" pressed at "+ microtimeToString(timePressed)+" for %.1f milliseconds, minimal of %d is required, ignored." % (width / 1e6, input.minpressed))
+    
+def main(argv):
+  import argparse
+  parser = argparse.ArgumentParser(description="Doorbell / contact monitor, reports the presses to Domoticz")
+  parser.add_argument("--simulate", metavar="TRACE", help="replay an edge trace (json [[ms, level, pin], ...]) instead of the GPIO pins")
+  parser.add_argument("--speed", type=float, default=1.0, help="replay speed of the trace, 0 = virtual time")
+  args = parser.parse_args(argv)
+  
+  if args.simulate:
+    backend = SimulatedGPIO(LoadTrace(args.simulate, inputs[0]["pin"]), args.speed)
+  else:
+    backend = RPiGPIO()
+    
+  if domoticzmqtt:
+    domoticz = DomoticzMQTT(domoticzmqtt, mqtttopic, mqttclientid, mqttusername, mqttpassword, requesttimeout)
+  else:
+    domoticz = DomoticzClient(domoticzserver, domoticzusername, domoticzpassword, requesttimeout)
+  try:
+    domoticz.Connect()
+  except OSError as e:
+    print ("Domoticz not reachable yet: "+ str(e))
+  spool = Spool(os.path.join(os.path.dirname(os.path.abspath(__file__)), spoolfile) if spoolfile else None)
+  fanout = Fanout(sinks) if len(sinks) > 0 else None
+  notifier = Notifier(domoticz, spool, mintimebetweenrings, queuesize, fanout)
+  monitor = Monitor(backend, inputs, notifier)
+  notifier.Restore([target for input in monitor.inputs.values() for target in input.targets.values()])
+  notifier.start()
+  
+  try:
+    monitor.Run()
+  finally:
+    backend.Close()
+    
+  # end of a simulated trace, wait for the notifier
+  deadline = time.monotonic() + mintimebetweenrings + 2 * requesttimeout * queuesize
+  while not notifier.Idle() and time.monotonic() < deadline:
+    time.sleep(0.1)
+  if notifier.latency.count > 0 and (latencysummary == 0 or notifier.latency.count % latencysummary != 0):
+    print (notifier.latency.Summary())
+  if fanout is not None:
+    fanout.Close()
+    print (fanout.Summary())
+  return 0
+  
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,129 @@
+# Domoticz stand-in
+#
+# Description: Offline replacement for the Domoticz python plugin API so plugin/*/plugin.py can be
+#   loaded, exercised and timed without a running Domoticz. Every call is forwarded to the active
+#   host (see domoticzhost.py) which owns the Devices / Images dictionaries and the scripted transports.
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+
+_host = None  # set by domoticzhost.Host
+
+####################### Logging #######################
+def Log(Message):
+  _host.log("Log", Message)
+
+def Status(Message):
+  _host.log("Status", Message)
+
+def Error(Message):
+  _host.log("Error", Message)
+
+def Debug(Message):
+  _host.log("Debug", Message)
+
+def Debugging(Mode):
+  _host.debugging = Mode
+
+def Heartbeat(Interval):
+  _host.heartbeat = Interval
+
+####################### Devices #######################
+class Device:
+
+  def __init__(self, Name="", Unit=0, TypeName="", Type=0, Subtype=0, Switchtype=0, Image=0, Options=None, Used=0, DeviceID="", Description="", Color=""):
+    self.ID = 0
+    self.Name = Name
+    self.Unit = Unit
+    self.TypeName = TypeName
+    self.Type = Type
+    self.SubType = Subtype
+    self.SwitchType = Switchtype
+    self.Image = Image
+    self.Options = {} if Options is None else Options
+    self.Used = Used
+    self.DeviceID = DeviceID
+    self.Description = Description
+    self.nValue = 0
+    self.sValue = ""
+    self.Color = Color
+    self.SignalLevel = 12
+    self.BatteryLevel = 255
+    self.TimedOut = 0
+    self.LastUpdate = ""
+
+  def Create(self):
+    _host.createDevice(self)
+
+  def Update(self, nValue, sValue, Image=None, SignalLevel=None, BatteryLevel=None, Options=None, TimedOut=None, Name=None, TypeName=None, Type=None, Subtype=None, Switchtype=None, Used=None, Description=None, Color=None, SuppressTriggers=False):
+    self.nValue = nValue
+    self.sValue = sValue
+    if Image is not None: self.Image = Image
+    if SignalLevel is not None: self.SignalLevel = SignalLevel
+    if BatteryLevel is not None: self.BatteryLevel = BatteryLevel
+    if Options is not None: self.Options = Options
+    if TimedOut is not None: self.TimedOut = TimedOut
+    if Name is not None: self.Name = Name
+    if Used is not None: self.Used = Used
+    if Description is not None: self.Description = Description
+    if Color is not None: self.Color = Color
+    _host.deviceUpdated(self)
+
+  def Delete(self):
+    _host.deleteDevice(self)
+
+  def Refresh(self):
+    pass
+
+  def __str__(self):
+    return "Unit: %d, Name: '%s', nValue: %d, sValue: '%s'" % (self.Unit, self.Name, self.nValue, self.sValue)
+
+class Image:
+
+  def __init__(self, Filename):
+    self.Filename = Filename
+    self.Name = Filename.rsplit(".", 1)[0]
+    self.Base = self.Name
+    self.ID = 0
+
+  def Create(self):
+    _host.createImage(self)
+
+  def Delete(self):
+    _host.images.pop(self.Name, None)
+
+####################### Connections #######################
+class Connection:
+
+  def __init__(self, Name="", Transport="TCP/IP", Protocol="None", Address="", Port="", Baud=-1):
+    self.Name = Name
+    self.Transport = Transport
+    self.Protocol = Protocol
+    self.Address = Address
+    self.Port = Port
+    self.Baud = Baud
+    self.connected = False
+    self.connecting = False
+
+  def Connect(self):
+    _host.connect(self)
+
+  def Listen(self):
+    _host.connect(self)
+
+  def Send(self, Message, Delay=0):
+    _host.send(self, Message, Delay)
+
+  def Disconnect(self):
+    _host.disconnect(self)
+
+  def Connected(self):
+    return self.connected
+
+  def Connecting(self):
+    return self.connecting
+
+  def __str__(self):
+    return "Connection '%s' %s/%s %s:%s" % (self.Name, self.Transport, self.Protocol, self.Address, self.Port)
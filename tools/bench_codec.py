@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+
+# Codec benchmark
+#
+# Description: Checks plugincore.codec against the hand written frame handling it replaced and measures
+#   both: the hosola inverter frame (slice + int.from_bytes per field against one unpack_from), the
+#   ledenet color / mode messages (list + checksum loop against pack_into with Sum8) and the SunnyBoy
+#   32 bit registers (struct.pack per word + struct.unpack against pack_into / unpack_from).
+#   Exits with 1 when a result differs.
+#
+# Usage: python3 tools/bench_codec.py [--number N]
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+
+import os
+import sys
+import random
+import struct
+import timeit
+
+TOOLSDIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TOOLSDIR), "plugin"))
+
+from plugincore import codec
+
+HosolaFields = ((31,2,"temperature"), (33,2,"VDC 1"), (35,2,"VDC 2"), (37,2,"VDC 3"), (51,2,"VAC 1"), (53,2,"VAC 2"), (55,2,"VAC 3"),
+                (59,2,"PAC 1"), (63,2,"PAC 2"), (67,2,"PAC 3"), (71,4,"total energy"))
+HosolaFrame = codec.Frame(">", ((0,"3s","start"),) + tuple([(offset, "H" if length == 2 else "I", name) for offset, length, name in HosolaFields]) + ((154,"2s","end"),))
+
+ColorFrame = codec.Frame(">", ((0,"B","head"), (1,"B","red"), (2,"B","green"), (3,"B","blue"), (4,"B","white"), (5,"B","reserved"), (6,"B","terminator")), Checksum=codec.Sum8)
+RegisterWords = codec.Frame(">", ((0,"H","high"), (2,"H","low")))
+RegisterValue = codec.Frame(">", ((0,"i","value"),))
+
+####################### hand written, as before plugincore.codec #######################
+def hosolaSlices(frame):
+  return [int.from_bytes(frame[offset:(offset+length)], byteorder='big') for offset, length, name in HosolaFields]
+
+def ledenetList(r, g, b, w):
+  checksum = (r + g + b + 0x3F +(w - 0xFF)) % 0x100
+  return bytes([0x31, r, g, b, w, 0x00, 0x0F, checksum])
+
+def sunnyboyStruct(registers):
+  w1 = struct.pack('H', registers[0])
+  w2 = struct.pack('H', registers[1])
+  return struct.unpack('i', w2 + w1)[0]
+
+####################### plugincore.codec #######################
+def hosolaCodec(frame):
+  return list(HosolaFrame.Unpack(frame)[1:12])
+
+def ledenetCodec(r, g, b, w):
+  return ColorFrame.Pack(0x31, r, g, b, w, 0x00, 0x0F)
+
+Buffer = bytearray(4)
+def sunnyboyCodec(registers):
+  RegisterWords.PackInto(Buffer, 0, registers[0], registers[1])
+  return RegisterValue.Unpack(Buffer)[0]
+
+def check():
+  ok = True
+  rnd = random.Random(1)
+  for i in range(1000):
+    frame = bytearray(rnd.getrandbits(8) for j in range(HosolaFrame.size))
+    ok = ok and hosolaSlices(frame) == hosolaCodec(frame)
+    rgbw = [rnd.randrange(256) for j in range(4)]
+    ok = ok and ledenetList(*rgbw) == ledenetCodec(*rgbw)
+    registers = (rnd.randrange(65536), rnd.randrange(65536))
+    ok = ok and sunnyboyStruct(registers) == sunnyboyCodec(registers)
+  return ok
+
+def measure(number):
+  frame = bytearray(random.Random(2).getrandbits(8) for j in range(HosolaFrame.size))
+  cases = [
+    ("hosola frame", lambda: hosolaSlices(frame), lambda: hosolaCodec(frame)),
+    ("ledenet color", lambda: ledenetList(10, 20, 30, 255), lambda: ledenetCodec(10, 20, 30, 255)),
+    ("sunnyboy S32", lambda: sunnyboyStruct((0xFFFF, 0xFF38)), lambda: sunnyboyCodec((0xFFFF, 0xFF38))),
+  ]
+  print("%-14s %14s %14s" % ("frame", "before (ns)", "codec (ns)"))
+  for name, before, after in cases:
+    result = [min(timeit.repeat(call, number=number, repeat=5)) * 1e9 / number for call in (before, after)]
+    print("%-14s %14.1f %14.1f" % (name, result[0], result[1]))
+
+def main(argv):
+  import argparse
+  parser = argparse.ArgumentParser(description="Check and benchmark plugincore.codec")
+  parser.add_argument("--number", type=int, default=100000, help="calls per measurement")
+  args = parser.parse_args(argv)
+
+  if not check():
+    print("codec results differ from the hand written frame handling")
+    return 1
+  measure(args.number)
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
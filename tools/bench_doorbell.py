@@ -0,0 +1,168 @@
+#!/usr/bin/python3
+
+# Doorbell benchmark
+#
+# Description: Replays generated edge traces through the doorbell.py monitor (SimulatedGPIO in virtual
+#   time) and reports per debounce setting the detection latency (from the press and from the release
+#   to the accept, a press is decided after the release unless minbuttonpressed is 0), the false accepts
+#   (an accept without a genuine press, or a second accept of one press) and the false rejects (a
+#   genuine press without accept). The traces contain genuine presses with contact bounce, presses with
+#   ripple of the 8VAC rectifier (short highs every 10 ms), contacts stuck for seconds and noise: short
+#   spikes and bursts of mains hum (short lows every 10 ms) without a press.
+#   The first line is the setting of doorbell.py, followed by variations of minbuttonpressed / bouncetime.
+#
+# Usage: python3 tools/bench_doorbell.py [--presses N] [--seed S] [--ripple P]
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+# 1.0.1   18-10-2026  Ring with the edge time of the latency measurement
+
+import os
+import sys
+import random
+
+TOOLSDIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TOOLSDIR), "scripts"))
+
+import doorbell
+
+Pin = 26
+Ms = 1000000                      # ns per ms
+
+def burst(trace, t, count, rnd):
+  # contact bounce: count short level changes around t, ends at the level before the burst
+  level = trace[-1][2] if len(trace) > 0 else 1
+  for i in range(count):
+    t += int(rnd.uniform(0.05, 1.0) * Ms)
+    level = 1 - level
+    trace.append((t, Pin, level))
+    t += int(rnd.uniform(0.05, 1.0) * Ms)
+    level = 1 - level
+    trace.append((t, Pin, level))
+  return t
+
+def generate(presses, rnd, ripple):
+  # (trace, genuine presses [(start, release, end of the bounce)], stuck contacts [(start, end)])
+  trace = []
+  genuine = []
+  stuck = []
+  t = 1000 * Ms
+  for i in range(presses):
+    kind = rnd.random()
+    if kind < 0.10:
+      # spike: EMI / relay in the same cable
+      width = int(rnd.uniform(0.05, 4.0) * Ms)
+      trace.append((t, Pin, 0))
+      trace.append((t + width, Pin, 1))
+      t += width
+    elif kind < 0.20:
+      # mains hum without a press: lows of 0.5 - 2 ms every 10 ms
+      for j in range(rnd.randint(3, 30)):
+        width = int(rnd.uniform(0.5, 2.0) * Ms)
+        trace.append((t, Pin, 0))
+        trace.append((t + width, Pin, 1))
+        t += 10 * Ms
+    elif kind < 0.22:
+      # stuck contact, longer than maxbuttonpressed
+      width = int(rnd.uniform(6000, 9000) * Ms)
+      trace.append((t, Pin, 0))
+      stuck.append((t, t + width))
+      t += width
+      trace.append((t, Pin, 1))
+    else:
+      # genuine press, 5% quick taps
+      width = int((rnd.uniform(15, 60) if rnd.random() < 0.05 else rnd.uniform(60, 800)) * Ms)
+      start = t
+      trace.append((t, Pin, 0))
+      t = burst(trace, t, rnd.randint(0, 4), rnd)
+      end = start + width
+      if rnd.random() < ripple:
+        # rectifier ripple: the contact is closed but the input is high near the zero crossings
+        t = start + 10 * Ms
+        while t + 3 * Ms < end:
+          trace.append((t, Pin, 1))
+          trace.append((t + int(rnd.uniform(0.3, 2.5) * Ms), Pin, 0))
+          t += 10 * Ms
+      t = max(t, end)
+      release = t
+      trace.append((t, Pin, 1))
+      t = burst(trace, t, rnd.randint(0, 4), rnd)
+      genuine.append((start, release, t))
+    t += int(rnd.uniform(1500, 6000) * Ms)
+  trace.sort()
+  return trace, genuine, stuck
+
+class Recorder:
+  # notifier of the monitor, keeps the (virtual) time of every accepted press
+
+  def __init__(self, backend):
+    self.backend = backend
+    self.accepts = []
+
+  def Ring(self, target, timePressed, edge=None):
+    self.accepts.append(self.backend.Clock())
+
+def run(trace, minpressed, maxpressed, bounce, dead):
+  backend = doorbell.SimulatedGPIO(trace, 0)
+  recorder = Recorder(backend)
+  item = {"pin": Pin, "name": "bench", "idx": 0, "action": "ring", "minpressed": minpressed, "maxpressed": maxpressed, "bouncetime": bounce, "deadtime": dead}
+  doorbell.Monitor(backend, [item], recorder, size=4096).Run()
+  return recorder.accepts
+
+def score(accepts, genuine, margin):
+  # matches every accept with the genuine press it belongs to: (latencies from the press ns, latencies
+  # from the release ns, false accepts, false rejects)
+  latencies = []
+  afterRelease = []
+  falseAccepts = 0
+  matched = set()
+  index = 0
+  for accept in accepts:
+    while index < len(genuine) and genuine[index][2] + margin < accept:
+      index += 1
+    if index < len(genuine) and genuine[index][0] <= accept and index not in matched:
+      matched.add(index)
+      latencies.append(accept - genuine[index][0])
+      afterRelease.append(max(0, accept - genuine[index][1]))
+    else:
+      falseAccepts += 1
+  return latencies, afterRelease, falseAccepts, len(genuine) - len(matched)
+
+def percentile(values, p):
+  if len(values) == 0:
+    return 0.0
+  values = sorted(values)
+  return values[min(len(values) - 1, int(len(values) * p / 100.0))]
+
+def main(argv):
+  import argparse
+  parser = argparse.ArgumentParser(description="Detection latency and false accepts / rejects of the doorbell debounce settings")
+  parser.add_argument("--presses", type=int, default=2000, help="events in the trace")
+  parser.add_argument("--seed", type=int, default=1)
+  parser.add_argument("--ripple", type=float, default=0.3, help="part of the genuine presses with rectifier ripple")
+  args = parser.parse_args(argv)
+
+  doorbell.logrings = False
+  trace, genuine, stuck = generate(args.presses, random.Random(args.seed), args.ripple)
+  print("%d edges, %d genuine presses, %d stuck contacts, %d noise events" % (len(trace), len(genuine), len(stuck), args.presses - len(genuine) - len(stuck)))
+
+  settings = [(doorbell.minbuttonpressed, doorbell.maxbuttonpressed, doorbell.bouncetime, doorbell.deadtime)]
+  for minpressed in (0, 5, 10, 20, 40):
+    for bounce in (0, 2, 5, 12):
+      if minpressed != doorbell.minbuttonpressed or bounce != doorbell.bouncetime:
+        settings.append((minpressed, doorbell.maxbuttonpressed, bounce, doorbell.deadtime))
+
+  print("%5s %6s %6s %6s  %22s  %22s  %7s %7s" % ("", "", "", "", "press to accept (ms)", "release to accept (ms)", "", ""))
+  print("%5s %6s %6s %6s  %7s %7s %6s  %7s %7s %6s  %7s %7s" % ("min", "max", "bounce", "dead", "p50", "p95", "max", "p50", "p95", "max", "f.acc", "f.rej"))
+  for minpressed, maxpressed, bounce, dead in settings:
+    accepts = run(trace, minpressed, maxpressed, bounce, dead)
+    latencies, afterRelease, falseAccepts, falseRejects = score(accepts, genuine, (bounce + 1) * Ms)
+    print("%5d %6d %6d %6d  %7.1f %7.1f %6.1f  %7.1f %7.1f %6.1f  %7d %7d" % (minpressed, maxpressed, bounce, dead,
+          percentile(latencies, 50) / 1e6, percentile(latencies, 95) / 1e6, max(latencies + [0]) / 1e6,
+          percentile(afterRelease, 50) / 1e6, percentile(afterRelease, 95) / 1e6, max(afterRelease + [0]) / 1e6, falseAccepts, falseRejects))
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+
+# Logging benchmark
+#
+# Description: Per message cost of BasePlugin.Log at log level 0 (filtered) against level 10 (written
+#   to a discarding Domoticz stand-in), for the old eager string building and the lazy format / callable
+#   forms of plugincore.pluginlog. Also runs the hosola and marantz scenarios at Mode6 0 and 10.
+#
+# Usage: python3 tools/bench_log.py [--number N]
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+
+import os
+import sys
+import json
+import timeit
+
+TOOLSDIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TOOLSDIR)
+sys.path.insert(0, os.path.join(os.path.dirname(TOOLSDIR), "plugin"))
+
+import Domoticz
+import domoticzhost
+from plugincore import pluginlog
+
+class NullHost:
+  def log(self, kind, message):
+    pass
+
+class Device:
+  Name = "Power 1"
+  nValue = 0
+  sValue = "1432;1234567.0"
+
+class EagerPlugin:
+  # BasePlugin.Log as it was before plugincore
+  def __init__(self, level):
+    self.logLevel = level
+
+  def Log(self, Message, Level, Type):
+    if self.logLevel >= Level:
+      if Type == 2:
+        Domoticz.Status(Message)
+      elif Type == 3:
+        Domoticz.Error(Message)
+      else:
+        Domoticz.Log(Message)
+
+class LazyPlugin:
+  def __init__(self, level):
+    self.logLevel = level
+
+  def Log(self, Message, Level, Type, *Args):
+    if self.logLevel >= Level:
+      pluginlog.Write(Message, Type, Args)
+
+def micro(number):
+  device = Device()
+  nValue = 0
+  sValue = "1500;1234568.0"
+  cases = [
+    ("eager concat", EagerPlugin, lambda p: p.Log("Update ["+device.Name+"] from: ('"+str(device.nValue)+":'"+str(device.sValue )+"') to: ("+str(nValue)+":'"+str(sValue)+"')", 5, 1)),
+    ("lazy format", LazyPlugin, lambda p: p.Log("Update [%s] from: ('%s:'%s') to: (%s:'%s')", 5, 1, device.Name, device.nValue, device.sValue, nValue, sValue)),
+    ("lazy callable", LazyPlugin, lambda p: p.Log(lambda: "Update [%s] from: ('%s:'%s') to: (%s:'%s')" % (device.Name, device.nValue, device.sValue, nValue, sValue), 5, 1)),
+  ]
+  print("%-14s %14s %14s" % ("form", "level 0 (ns)", "level 10 (ns)"))
+  for name, cls, call in cases:
+    result = []
+    for level in (0, 10):
+      plugin = cls(level)
+      seconds = min(timeit.repeat(lambda: call(plugin), number=number, repeat=5))
+      result.append(seconds * 1e9 / number)
+    print("%-14s %14.1f %14.1f" % (name, result[0], result[1]))
+
+def scenarios():
+  print("")
+  print("%-10s %8s %16s %16s" % ("scenario", "Mode6", "onMessage(us)", "onHeartbeat(us)"))
+  for name in ("hosola", "marantz"):
+    with open(os.path.join(TOOLSDIR, "scenarios", name + ".json")) as f:
+      scenario = json.load(f)
+    for level in ("0", "10"):
+      scenario["parameters"]["Mode6"] = level
+      host = domoticzhost.Host(scenario)
+      host.run(5)
+      callbacks = host.report()["callbacks"]
+      print("%-10s %8s %16.1f %16.1f" % (name, level, callbacks["onMessage"]["mean_us"], callbacks["onHeartbeat"]["mean_us"]))
+
+def main(argv):
+  import argparse
+  parser = argparse.ArgumentParser(description="Benchmark plugin logging at level 0 and 10")
+  parser.add_argument("--number", type=int, default=200000, help="calls per measurement")
+  args = parser.parse_args(argv)
+
+  Domoticz._host = NullHost()
+  micro(args.number)
+  scenarios()
+
+if __name__ == "__main__":
+  main(sys.argv[1:])
@@ -0,0 +1,383 @@
+#!/usr/bin/python3
+
+# Domoticz host emulator
+#
+# Description: Loads a plugin/*/plugin.py outside Domoticz, drives onStart / onConnect / onMessage /
+#   onCommand / onHeartbeat / onStop from a scripted scenario (see tools/scenarios) and reports per
+#   callback wall time, allocations and the number of Devices[...].Update calls.
+#
+#   Transports are scripted per connection name ('*' matches all): connect status and replies
+#   on a Send. Payloads are written as "hex:..." (bytes), plain text (utf-8 bytes) or for HTTP
+#   connections as {"status": "200", "data": "..."}.
+#
+# Usage: python3 tools/domoticzhost.py tools/scenarios/hosola.json [--alloc] [--repeat N] [--log] [--json]
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+# 1.0.1   18-10-2026  Wait for the worker pool of the plugin after every callback
+
+import os
+import sys
+import re
+import json
+import time
+import types
+import importlib.util
+import collections
+import tracemalloc
+
+TOOLSDIR = os.path.dirname(os.path.abspath(__file__))
+ROOTDIR = os.path.dirname(TOOLSDIR)
+sys.path.insert(0, TOOLSDIR)
+
+import Domoticz
+
+CALLBACKS = ("onStart", "onStop", "onConnect", "onMessage", "onCommand", "onNotification", "onDisconnect", "onHeartbeat")
+
+def toPayload(value, protocol="None"):
+  # scenario notation => what Domoticz would hand to onMessage
+  if isinstance(value, dict):
+    data = value.get("data", "")
+    return {"Status": str(value.get("status", "200")), "Data": toPayload(data), "Headers": value.get("headers", {})}
+  if isinstance(value, list):
+    return bytes(value)
+  if value.startswith("hex:"):
+    return bytes.fromhex(value[4:])
+  return value.encode("utf-8")
+
+def sentToText(message):
+  # text used to match a send against the reply rules
+  if isinstance(message, dict):
+    data = message.get("Data", "")
+    if isinstance(data, (bytes, bytearray)):
+      data = data.decode("utf-8", "ignore")
+    return message.get("Verb", "") + " " + message.get("URL", "") + " " + str(data)
+  if isinstance(message, (bytes, bytearray)):
+    return bytes(message).hex()
+  return str(message)
+
+class CallbackStats:
+  __slots__ = ("count", "total", "max", "allocated", "peak", "updates")
+
+  def __init__(self):
+    self.count = 0
+    self.total = 0.0
+    self.max = 0.0
+    self.allocated = 0
+    self.peak = 0
+    self.updates = 0
+
+class Transport:
+  # scripted behaviour of the remote side of a connection
+  def __init__(self, script):
+    self.status = int(script.get("connect", 0))
+    self.description = script.get("description", "" if self.status == 0 else "Connection refused")
+    self.chunk = int(script.get("chunk", 0))
+    self.onConnect = script.get("onconnect", [])
+    self.replies = []
+    for rule in script.get("replies", []):
+      self.replies.append((re.compile(rule.get("match", "")), rule.get("data", []), rule.get("close", False)))
+
+  def reply(self, message):
+    text = sentToText(message)
+    for pattern, data, close in self.replies:
+      if pattern.search(text):
+        return data, close
+    return [], False
+
+class ModbusResult:
+  def __init__(self, registers):
+    self.registers = registers
+
+  def isError(self):
+    return self.registers is None
+
+class ModbusTcpClient:
+  # stand-in for pymodbus.client.sync.ModbusTcpClient, registers come from the scenario
+  host = None
+
+  def __init__(self, host="127.0.0.1", port=502, **kwargs):
+    self.open = False
+
+  def connect(self):
+    self.open = ModbusTcpClient.host.modbus.get("connect", True)
+    return self.open
+
+  def close(self):
+    self.open = False
+
+  def is_socket_open(self):
+    return self.open
+
+  def read_holding_registers(self, address, count=1, unit=0):
+    ModbusTcpClient.host.modbusReads += 1
+    registers = ModbusTcpClient.host.modbus.get("registers", {}).get(str(address))
+    if registers is None or not self.open:
+      return ModbusResult(None)
+    return ModbusResult(registers[:count])
+
+class Host:
+
+  def __init__(self, scenario, trackAlloc=False, printLog=False):
+    self.scenario = scenario
+    self.trackAlloc = trackAlloc
+    self.printLog = printLog
+    self.devices = {}
+    self.images = {}
+    self.parameters = {}
+    self.heartbeat = 10
+    self.debugging = 0
+    self.nextDeviceId = 1
+    self.nextImageId = 100
+    self.events = collections.deque()
+    self.transports = {}
+    self.modbus = scenario.get("modbus", {})
+    self.modbusReads = 0
+    self.stats = collections.OrderedDict((name, CallbackStats()) for name in CALLBACKS)
+    self.logCount = collections.Counter()
+    self.updates = 0
+    self.sends = 0
+    self.connects = 0
+    self.module = None
+    self.connections = []
+    self.setTransports(scenario.get("transports", {}))
+
+  ####################### Domoticz API (called from Domoticz.py) #######################
+  def log(self, kind, message):
+    self.logCount[kind] += 1
+    if self.printLog:
+      print("  [%s] %s" % (kind, message))
+
+  def createDevice(self, device):
+    if device.Unit in self.devices:
+      self.log("Error", "Device unit %d already exists" % device.Unit)
+      return
+    device.ID = self.nextDeviceId
+    self.nextDeviceId += 1
+    self.devices[device.Unit] = device
+
+  def deleteDevice(self, device):
+    self.devices.pop(device.Unit, None)
+
+  def deviceUpdated(self, device):
+    self.updates += 1
+
+  def createImage(self, image):
+    image.ID = self.nextImageId
+    self.nextImageId += 1
+    self.images[image.Name] = image
+
+  def transportFor(self, connection):
+    return self.transports.get(connection.Name) or self.transports.get("*") or Transport({})
+
+  def connect(self, connection):
+    self.connects += 1
+    if connection not in self.connections:
+      self.connections.append(connection)
+    connection.connecting = True
+    self.events.append(("connect", connection))
+
+  def send(self, connection, message, delay=0):
+    self.sends += 1
+    if not connection.connected:
+      self.log("Error", "Send on '%s' while not connected" % connection.Name)
+      return
+    data, close = self.transportFor(connection).reply(message)
+    self.queueData(connection, data)
+    if close:
+      self.events.append(("disconnect", connection))
+
+  def disconnect(self, connection):
+    if connection.connected or connection.connecting:
+      self.events.append(("disconnect", connection))
+
+  ####################### Scenario handling #######################
+  def setTransports(self, scripts):
+    for name, script in scripts.items():
+      self.transports[name] = Transport(script)
+
+  def queueData(self, connection, data):
+    if not isinstance(data, list):
+      data = [data]
+    transport = self.transportFor(connection)
+    for item in data:
+      payload = toPayload(item, connection.Protocol)
+      if connection.Protocol == "Line" and isinstance(payload, bytes):
+        for line in payload.replace(b"\n", b"\r").split(b"\r"):
+          if len(line) > 0:
+            self.events.append(("message", connection, line + b"\r"))
+      elif transport.chunk > 0 and isinstance(payload, bytes):
+        for idx in range(0, len(payload), transport.chunk):
+          self.events.append(("message", connection, payload[idx:idx + transport.chunk]))
+      else:
+        self.events.append(("message", connection, payload))
+
+  def drain(self):
+    # deliver everything the plugin triggered, like the Domoticz plugin thread does
+    while len(self.events) > 0:
+      event = self.events.popleft()
+      connection = event[1]
+      if event[0] == "connect":
+        transport = self.transportFor(connection)
+        connection.connecting = False
+        connection.connected = (transport.status == 0)
+        self.dispatch("onConnect", connection, transport.status, transport.description)
+        if connection.connected:
+          self.queueData(connection, transport.onConnect)
+      elif event[0] == "message":
+        if connection.connected:
+          self.dispatch("onMessage", connection, event[2])
+      elif event[0] == "disconnect":
+        if connection.connected or connection.connecting:
+          connection.connected = False
+          connection.connecting = False
+          self.dispatch("onDisconnect", connection)
+    self.waitWorkers()
+
+  def waitWorkers(self, timeout=10.0):
+    # in Domoticz the jobs of plugincore.workerpool finish between two heartbeats, here the heartbeats
+    # come back to back, so wait until every submitted job is done (the plugin drains them itself)
+    workers = getattr(getattr(self.module, "_plugin", None), "workers", None)
+    if workers is None:
+      return
+    deadline = time.monotonic() + timeout
+    while len(workers.results) < len(workers.pending) and time.monotonic() < deadline:
+      time.sleep(0.0005)
+
+  def dispatch(self, name, *args):
+    function = getattr(self.module, name, None)
+    if function is None:
+      return
+    stat = self.stats[name]
+    updates = self.updates
+    if self.trackAlloc:
+      tracemalloc.reset_peak()
+      before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+      function(*args)
+    except Exception as e:
+      self.log("Error", "%s raised %s: %s" % (name, type(e).__name__, e))
+    duration = time.perf_counter() - start
+    if self.trackAlloc:
+      current, peak = tracemalloc.get_traced_memory()
+      stat.allocated += max(0, current - before)
+      stat.peak = max(stat.peak, peak - before)
+    stat.count += 1
+    stat.total += duration
+    if duration > stat.max:
+      stat.max = duration
+    stat.updates += self.updates - updates
+
+  def load(self):
+    plugindir = os.path.join(ROOTDIR, "plugin", self.scenario["plugin"])
+    self.parameters.update({"HomeFolder": plugindir + os.sep, "StartupFolder": ROOTDIR + os.sep, "Key": self.scenario["plugin"], "Name": self.scenario["plugin"], "Author": "", "Version": "", "Address": "", "Port": "", "Username": "", "Password": "", "SerialPort": "", "Mode1": "", "Mode2": "", "Mode3": "", "Mode4": "", "Mode5": "", "Mode6": "0"})
+    self.parameters.update(self.scenario.get("parameters", {}))
+    for unit, values in self.scenario.get("devices", {}).items():
+      device = Domoticz.Device(**values.get("create", {"Name": "Unit " + unit}))
+      device.Unit = int(unit)
+      device.nValue = values.get("nValue", 0)
+      device.sValue = values.get("sValue", "")
+      device.Color = values.get("Color", "")
+      self.createDevice(device)
+
+    if "modbus" in self.scenario:
+      ModbusTcpClient.host = self
+      for name in ("pymodbus", "pymodbus.client"):
+        sys.modules.setdefault(name, types.ModuleType(name))
+      syncmodule = types.ModuleType("pymodbus.client.sync")
+      syncmodule.ModbusTcpClient = ModbusTcpClient
+      sys.modules["pymodbus.client.sync"] = syncmodule
+
+    Domoticz._host = self
+    if plugindir not in sys.path:
+      sys.path.insert(0, plugindir)
+    spec = importlib.util.spec_from_file_location("plugin_" + self.scenario["plugin"], os.path.join(plugindir, "plugin.py"))
+    self.module = importlib.util.module_from_spec(spec)
+    self.module.Devices = self.devices
+    self.module.Images = self.images
+    self.module.Parameters = self.parameters
+    spec.loader.exec_module(self.module)
+
+  def runSteps(self, steps):
+    for step in steps:
+      if "heartbeat" in step:
+        for i in range(int(step["heartbeat"])):
+          self.dispatch("onHeartbeat")
+          self.drain()
+      if "command" in step:
+        cmd = step["command"]
+        self.dispatch("onCommand", int(cmd.get("unit", 1)), cmd.get("command", "On"), int(cmd.get("level", 0)), cmd.get("hue", ""))
+        self.drain()
+      if "message" in step:
+        for connection in self.connections:
+          if connection.Name == step.get("connection", connection.Name):
+            self.queueData(connection, step["message"])
+        self.drain()
+      if "transports" in step:
+        self.setTransports(step["transports"])
+      if "disconnect" in step:
+        for connection in self.connections:
+          if connection.Name == step["disconnect"] or step["disconnect"] == "*":
+            self.disconnect(connection)
+        self.drain()
+      if "repeat" in step:
+        for i in range(int(step["repeat"])):
+          self.runSteps(step.get("steps", []))
+
+  def run(self, repeat=1):
+    if self.trackAlloc:
+      tracemalloc.start()
+    self.load()
+    self.dispatch("onStart")
+    self.drain()
+    for i in range(repeat):
+      self.runSteps(self.scenario.get("steps", []))
+    self.dispatch("onStop")
+    self.drain()
+    if self.trackAlloc:
+      tracemalloc.stop()
+
+  ####################### Reporting #######################
+  def report(self):
+    result = collections.OrderedDict()
+    for name, stat in self.stats.items():
+      if stat.count > 0:
+        result[name] = {"count": stat.count, "total_ms": stat.total * 1000, "mean_us": stat.total * 1e6 / stat.count, "max_us": stat.max * 1e6, "updates": stat.updates, "alloc_bytes": stat.allocated, "peak_bytes": stat.peak}
+    return {"plugin": self.scenario["plugin"], "callbacks": result, "updates": self.updates, "sends": self.sends, "connects": self.connects, "modbusReads": self.modbusReads, "log": dict(self.logCount), "devices": len(self.devices)}
+
+  def printReport(self):
+    report = self.report()
+    print("Plugin: %s, devices: %d, Update() calls: %d, sends: %d, connects: %d, log lines: %s" % (report["plugin"], report["devices"], report["updates"], report["sends"], report["connects"], report["log"]))
+    print("%-14s %8s %10s %10s %10s %8s" % ("callback", "count", "mean(us)", "max(us)", "total(ms)", "updates") + ("  %10s %10s" % ("alloc(B)", "peak(B)") if self.trackAlloc else ""))
+    for name, values in report["callbacks"].items():
+      line = "%-14s %8d %10.1f %10.1f %10.2f %8d" % (name, values["count"], values["mean_us"], values["max_us"], values["total_ms"], values["updates"])
+      if self.trackAlloc:
+        line += "  %10d %10d" % (values["alloc_bytes"], values["peak_bytes"])
+      print(line)
+
+def main(argv):
+  import argparse
+  parser = argparse.ArgumentParser(description="Run a Domoticz plugin against a scripted scenario")
+  parser.add_argument("scenario", nargs="+", help="scenario json file(s)")
+  parser.add_argument("--alloc", action="store_true", help="track allocations with tracemalloc (slows down timing)")
+  parser.add_argument("--repeat", type=int, default=1, help="run the scenario steps N times")
+  parser.add_argument("--log", action="store_true", help="print plugin log lines")
+  parser.add_argument("--json", action="store_true", help="print report as json")
+  args = parser.parse_args(argv)
+
+  for filename in args.scenario:
+    with open(filename) as f:
+      scenario = json.load(f)
+    host = Host(scenario, trackAlloc=args.alloc, printLog=args.log)
+    host.run(args.repeat)
+    if args.json:
+      print(json.dumps(host.report(), indent=2))
+    else:
+      host.printReport()
+      print("")
+
+if __name__ == "__main__":
+  main(sys.argv[1:])
@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+
+# Capture replay
+#
+# Description: Feeds a capture file of plugincore.capture back through the onMessage callback of a
+#   plugin as fast as possible, to reproduce field issues and to measure the parser throughput on real
+#   traffic. The plugin is loaded and started by the host emulator with the parameters and devices of
+#   a scenario and gets heartbeats until it connects, the scenario steps are not run. Every record goes
+#   to the connection of the plugin with the name it was received on, a capture of version 1 (without
+#   names) is only replayed to a plugin with one connection. Sends of the plugin get no reply during
+#   the replay.
+#
+# Usage: python3 tools/replay.py tools/scenarios/hosola.json plugin/hosola/capture.bin [--repeat N] [--log] [--json]
+#
+# Author: elgringo
+#
+# History:
+# 1.0.0   18-10-2026  Initial version
+# 1.0.1   18-10-2026  Replay to the connection the data was captured on
+
+import os
+import sys
+import json
+import time
+
+TOOLSDIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TOOLSDIR)
+sys.path.insert(0, os.path.join(os.path.dirname(TOOLSDIR), "plugin"))
+
+import domoticzhost
+from plugincore import capture
+
+def replay(scenario, filename, repeat=1, printLog=False):
+  records = [(name, data) for timestamp, name, data in capture.Read(filename)]
+
+  host = domoticzhost.Host(scenario, printLog=printLog)
+  host.load()
+  host.dispatch("onStart")
+  host.drain()
+  if getattr(host.module, "_capture", None) is not None:
+    host.module._capture.Stop()       # never record the replay itself
+  host.transports = {}
+  names = set([name for name, data in records])
+  for i in range(10):
+    opened = set([connection.Name for connection in host.connections])
+    if len(opened) > 0 and (None in names or names <= opened):
+      break
+    host.dispatch("onHeartbeat")      # most plugins connect from the heartbeat
+    host.drain()
+  if len(host.connections) == 0:
+    raise RuntimeError("Plugin '%s' did not open a connection" % scenario["plugin"])
+
+  # the last connection opened with a name, plugins recreate their connection after a disconnect
+  connections = dict([(connection.Name, connection) for connection in host.connections])
+  if None in names:
+    if len(connections) > 1:
+      raise RuntimeError("'%s' has no connection names (version 1), plugin '%s' has %d connections" % (filename, scenario["plugin"], len(connections)))
+    connections[None] = host.connections[-1]
+  missing = names - set(connections)
+  if len(missing) > 0:
+    raise RuntimeError("Plugin '%s' did not open connection %s" % (scenario["plugin"], ", ".join(sorted(["'%s'" % name for name in missing]))))
+  records = [(connections[name], data) for name, data in records]
+
+  size = sum([len(data) if isinstance(data, bytes) else len(capture.Encode(data)[1]) for connection, data in records])
+  start = time.perf_counter()
+  for i in range(repeat):
+    for connection, data in records:
+      if not connection.connected:
+        connection.connecting = False
+        connection.connected = True   # the device is always there in a replay
+      host.dispatch("onMessage", connection, data)
+      host.drain()
+  elapsed = time.perf_counter() - start
+  host.dispatch("onStop")
+  host.drain()
+
+  count = len(records) * repeat
+  return host, {"records": count, "bytes": size * repeat, "seconds": elapsed,
+                "messages_per_s": count / elapsed if elapsed > 0 else 0.0,
+                "mb_per_s": size * repeat / elapsed / 1e6 if elapsed > 0 else 0.0,
+                "mean_us": elapsed * 1e6 / count if count > 0 else 0.0}
+
+def main(argv):
+  import argparse
+  parser = argparse.ArgumentParser(description="Replay a capture file through the onMessage of a plugin")
+  parser.add_argument("scenario", help="scenario json file with the plugin, parameters and devices")
+  parser.add_argument("capture", help="capture file written by plugincore.capture")
+  parser.add_argument("--repeat", type=int, default=1, help="replay the capture N times")
+  parser.add_argument("--log", action="store_true", help="print plugin log lines")
+  parser.add_argument("--json", action="store_true", help="print report as json")
+  args = parser.parse_args(argv)
+
+  with open(args.scenario) as f:
+    scenario = json.load(f)
+  host, result = replay(scenario, args.capture, args.repeat, args.log)
+  if args.json:
+    report = host.report()
+    report["replay"] = result
+    print(json.dumps(report, indent=2))
+  else:
+    print("Replayed %d records, %d bytes in %.3f s: %.0f messages/s, %.2f MB/s, %.1f us/message" % (result["records"], result["bytes"], result["seconds"], result["messages_per_s"], result["mb_per_s"], result["mean_us"]))
+    host.printReport()
+
+if __name__ == "__main__":
+  main(sys.argv[1:])